@@ -1,4 +1,5 @@
 import logging
+import os
 from flask import Flask, render_template
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
@@ -23,6 +24,10 @@ def register_blueprints(app):
         from .views.test_views import test
         app.register_blueprint(test)
 
+    if app.config['INGREDIENT_PARSER_SERVICE']:
+        from .views.parser_views import parser
+        app.register_blueprint(parser)
+
 
 def set_errorhandlers(app):
     @app.errorhandler(404)
@@ -67,6 +72,23 @@ def configure_logger(app):
     # Add the file handler to the app's logger
     app.logger.addHandler(file_handler)
 
+def configure_parser(app):
+    # Parsed sentences are cached, configure the size of the cache and its (optional) persistent tier
+    from app.utils.ingredient_parser import PARSE_CACHE, STEM_CACHE, TOKENIZER
+    PARSE_CACHE.configure(maxsize=app.config['PARSE_CACHE_SIZE'], path=app.config['PARSE_CACHE_PATH'])
+
+    # Stems of the model vocabulary are precomputed, configure the size of the cache of other stems
+    STEM_CACHE.configure(maxsize=app.config['STEM_CACHE_SIZE'])
+
+    # Select the tokenizer, raises a ValueError if the configured one does not exist
+    TOKENIZER.configure(name=app.config['INGREDIENT_PARSER_TOKENIZER'])
+
+    # The parser resources are loaded on the first parse, unless configured to load them at start up.
+    # Under gunicorn this also preloads the app in the master (see gunicorn.conf.py), so the workers share the resources
+    if app.config['PRELOAD_INGREDIENT_PARSER']:
+        from app.utils.ingredient_parser import preload_parser
+        preload_parser()
+
 def create_app():
     app = Flask(__name__, template_folder='templates')
 
@@ -79,5 +101,20 @@ def create_app():
     set_errorhandlers(app)
     configure_db(app)
     configure_logger(app)
+    configure_parser(app)
+
+    return app
+
+def create_parser_app():
+    # Standalone ingredient parser service, without the database and the website (see parser_service.py)
+    app = Flask(__name__)
+
+    # Load the configuration named by PARSER_SERVICE_CONFIG, production unless set otherwise, so the service never runs with DEBUG by accident
+    app.config.from_object(config_dict[os.getenv('PARSER_SERVICE_CONFIG', 'production')])
+
+    from .views.parser_views import parser
+    app.register_blueprint(parser)
+    configure_logger(app)
+    configure_parser(app)
 
     return app
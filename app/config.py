@@ -32,9 +32,34 @@ class Config(object):
     # Folder to store uploaded files
     UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), 'uploads')
 
+    # File with the version of the ingredient and conversion data, shared by all workers so they rebuild their in-memory indexes after an upload
+    INDEX_VERSION_PATH = os.getenv('INDEX_VERSION_PATH', os.path.join(os.path.dirname(__file__), 'uploads', '.index_version'))
+
+    # Seconds between checks of the version file, so a lookup does not touch the file system every time. Other workers see an upload at most this much later
+    INDEX_VERSION_CHECK_INTERVAL = float(os.getenv('INDEX_VERSION_CHECK_INTERVAL', '1.0'))
+
     # FoodData Central API key
     FDC_API_KEY = os.getenv("API_KEY")
 
+    # Load the ingredient parser resources (model, POS tagger, unit registry) at start up instead of on the first parse.
+    # gunicorn.conf.py reads the same variable to preload the app in the master, so the forked workers share the resources
+    PRELOAD_INGREDIENT_PARSER = os.getenv('PRELOAD_INGREDIENT_PARSER', 'False').lower() in ('true', '1')
+
+    # Parsed ingredient sentences kept in memory, and an optional SQLite file to keep them across restarts
+    PARSE_CACHE_SIZE = int(os.getenv('PARSE_CACHE_SIZE', '4096'))
+    PARSE_CACHE_PATH = os.getenv('PARSE_CACHE_PATH')
+
+    # Stems of tokens outside the parser model vocabulary kept in memory, the vocabulary itself is always precomputed
+    STEM_CACHE_SIZE = int(os.getenv('STEM_CACHE_SIZE', '4096'))
+
+    # Tokenizer of the ingredient parser, 'single_pass' or the original 'multipass' one (both give the same tokens)
+    INGREDIENT_PARSER_TOKENIZER = os.getenv('INGREDIENT_PARSER_TOKENIZER', 'single_pass')
+
+    # Serve the ingredient parser over HTTP (/parse/batch) for other processes, and the maximum number of lines per request.
+    # The routes are not authenticated: only bind the service to an internal interface (the parser process in the Procfile binds to 127.0.0.1)
+    INGREDIENT_PARSER_SERVICE = os.getenv('INGREDIENT_PARSER_SERVICE', 'False').lower() in ('true', '1')
+    PARSER_SERVICE_MAX_LINES = int(os.getenv('PARSER_SERVICE_MAX_LINES', '10000'))
+
 class ProductionConfig(Config):
     """
     Configuration class for the Flask app in production
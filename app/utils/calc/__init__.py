@@ -1 +1,141 @@
-THRESHOLD = 80
\ No newline at end of file
+import os
+import re
+import time
+import uuid
+from difflib import SequenceMatcher
+
+from flask import current_app
+
+#--------------------
+
+THRESHOLD = 80
+
+# Weight of a match where the tokens of one name are a subset of the tokens of the other name,
+# so that names with exactly the same tokens are always preferred
+SUBSET_WEIGHT = 0.95
+
+# Matches every character that is not a letter or a digit
+NON_WORD_PATTERN = re.compile(r"[^\w]+|_")
+
+# Last version read from the version file of this process: path, time of the last check, (mtime, inode, size) of the file and the version
+_index_version_cache = {'path': None, 'checked': None, 'signature': None, 'version': None}
+
+
+def name_tokens(name: str) -> list[str]:
+    """
+    This function splits an ingredient name into lowercase word tokens, ignoring punctuation
+
+    Arguments:
+    name (str): The ingredient name
+
+    Returns:
+    list[str]: The tokens of the name
+
+    Raises:
+    None
+    """
+    return NON_WORD_PATTERN.sub(' ', name.lower()).split()
+
+
+def normalize_name(name: str) -> str:
+    """
+    This function normalizes an ingredient name, so that names only differing in case, punctuation or word order are equal
+
+    Arguments:
+    name (str): The ingredient name
+
+    Returns:
+    str: The normalized name, eg. "Milk, whole" -> "milk whole" and "whole milk" -> "milk whole"
+
+    Raises:
+    None
+    """
+    return ' '.join(sorted(name_tokens(name)))
+
+
+def similarity(first: str, second: str) -> float:
+    """
+    This function calculates how likely two ingredient names refer to the same ingredient, on a scale of 0 to 100.
+    The names are compared on their sets of tokens, so word order and additional descriptive words weigh less.
+
+    Arguments:
+    first (str): The first ingredient name
+    second (str): The second ingredient name
+
+    Returns:
+    float: The likeliness of both names referring to the same ingredient
+
+    Raises:
+    None
+    """
+    first_tokens = set(name_tokens(first))
+    second_tokens = set(name_tokens(second))
+    if not first_tokens or not second_tokens:
+        return 0.0
+
+    shared = ' '.join(sorted(first_tokens & second_tokens))
+    first_joined = ' '.join(sorted(first_tokens))
+    second_joined = ' '.join(sorted(second_tokens))
+
+    return 100 * max(
+        SUBSET_WEIGHT * SequenceMatcher(None, shared, first_joined).ratio(),
+        SUBSET_WEIGHT * SequenceMatcher(None, shared, second_joined).ratio(),
+        SequenceMatcher(None, first_joined, second_joined).ratio()
+    )
+
+
+def index_version() -> str | None:
+    """
+    This function returns the version of the database content the in-memory indexes (RESOLVER in resolve.py and CONVERSIONS in convertion.py) are built from.
+    The version is kept in a file shared by all processes of the app, so an update handled by one gunicorn worker is seen by every worker on the same machine.
+    The file is checked at most once every INDEX_VERSION_CHECK_INTERVAL seconds, and only read again when its modification time, inode or size changed
+
+    Returns:
+    str | None: The version, None if the database was never updated through the app
+
+    Raises:
+    None
+    """
+    path = current_app.config['INDEX_VERSION_PATH']
+    cache = _index_version_cache
+    now = time.monotonic()
+    if cache['path'] == path and cache['checked'] is not None and now - cache['checked'] < current_app.config['INDEX_VERSION_CHECK_INTERVAL']:
+        return cache['version']
+
+    try:
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+        if cache['path'] != path or signature != cache['signature']:
+            with open(path, encoding='utf-8') as file:
+                cache['version'] = file.read()
+    except FileNotFoundError:
+        signature = None
+        cache['version'] = None
+
+    cache.update(path=path, checked=now, signature=signature)
+    return cache['version']
+
+
+def bump_index_version() -> None:
+    """
+    This function sets a new version of the database content, so every process rebuilds its in-memory indexes on its next lookup
+
+    Returns:
+    None
+
+    Raises:
+    OSError: If the version file cannot be written
+    """
+    path = current_app.config['INDEX_VERSION_PATH']
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # Write to a temporary file and rename it, so other processes never read a partially written version
+    temporary = f"{path}.{os.getpid()}"
+    version = uuid.uuid4().hex
+    with open(temporary, 'w', encoding='utf-8') as file:
+        file.write(version)
+    os.replace(temporary, path)
+
+    # This process sees its own update immediately, without waiting for the next check of the file
+    stat = os.stat(path)
+    _index_version_cache.update(path=path, checked=time.monotonic(), signature=(stat.st_mtime_ns, stat.st_ino, stat.st_size), version=version)
@@ -1,8 +1,11 @@
+from flask import current_app
+
 from app import db
 from app.models import Ingredient, Nutrition, Conversion
-from app.utils.calc import THRESHOLD
 from app.utils.calc.convertion import convert_amount_db, convert_amount_API
-from app.utils.calc.parse_ingredient import parse_ingredient, find_best_match_db, find_best_match_API, extract_API_info
+from app.utils.calc.parse_ingredient import parse_ingredient, extract_API_info
+from app.utils.calc.resolve import RESOLVER
+from app.utils.exceptions import ConversionError
 
 #--------------------
 
@@ -27,16 +30,20 @@ def process_ingredients(ingredient_list: list[str]) -> dict:
         # Parse string into ingredient
         ingredient, amount, unit = parse_ingredient(ingredient_line)
 
-        # Find the best matching ingredient in the database
-        best_ingredient, likeliness = find_best_match_db(ingredient)
+        # Resolve the ingredient locally (exact name, synonym, fuzzy name) or through the FDC API
+        match = RESOLVER.resolve(ingredient)
 
-        if likeliness > THRESHOLD:
+        if match.ingredient_id is not None:
             # Search for the corresponding nutritional values in the database
-            nutri = db.session.query(Nutrition).filter_by(ingredient_id=best_ingredient.id).first()
+            nutri = db.session.query(Nutrition).filter_by(ingredient_id=match.ingredient_id).first()
 
             if nutri:
                 # Converse the ingredient amount into grams
-                grams = convert_amount_db(best_ingredient, amount, unit)
+                try:
+                    grams = convert_amount_db(match.ingredient_id, amount, unit)
+                except ConversionError:
+                    na_ingredients.append((ingredient, "Amount could not be converted to grams"))
+                    continue
 
                 # Update nutrition dictionary with values from the database
                 nutri_dict['energy_kj'] += nutri.energy_kj * grams
@@ -51,56 +58,59 @@ def process_ingredients(ingredient_list: list[str]) -> dict:
                 # Mark ingredient as used
                 info = {
                     'og_name': ingredient,
-                    'used_name': best_ingredient.name,
+                    'used_name': match.name,
                     'og_amount': amount,
                     'used_amount': grams,
                     'og_unit': unit,
                     'used_unit': 'g',
-                    'likeliness': likeliness
+                    'likeliness': match.likeliness,
+                    'stage': match.stage
                 }
                 used_ingredients.append(info)
             else:
                 # Mark ingredient as not found
                 na_ingredients.append((ingredient, "No Nutritional values found in database"))
-        else:
-            # If the likeliness is below the threshold, query the FDC API for a possibly better ingredient
-            fdc_id, new_like = find_best_match_API(ingredient)
+        elif match.fdc_id is not None:
+            info, nutri, conversion = extract_API_info(match.fdc_id)
 
-            # Check if new founds are better than the old ones
-            if (new_like > likeliness) and (new_like > THRESHOLD):
-                info, nutri, conversion = extract_API_info(fdc_id)
-
-                if nutri:
-                    # Converse the ingredient amount into grams
+            if nutri:
+                # Converse the ingredient amount into grams
+                try:
                     grams = convert_amount_API(conversion, amount, unit)
+                except ConversionError:
+                    na_ingredients.append((ingredient, "Amount could not be converted to grams"))
+                    continue
 
-                    # Update nutrition dictionary with values from the API response
-                    nutri_dict['energy_kj'] += nutri['energy_kj'] * grams
-                    nutri_dict['energy_kcal'] += nutri['energy_kcal'] * grams
-                    nutri_dict['protein'] += nutri['protein'] * grams
-                    nutri_dict['fat'] += nutri['fat'] * grams
-                    nutri_dict['saturated'] += nutri['saturated'] * grams
-                    nutri_dict['carbs'] += nutri['carbs'] * grams
-                    nutri_dict['sugar'] += nutri['sugar'] * grams
-                    nutri_dict['salt'] += nutri['salt'] * grams
+                # Update nutrition dictionary with values from the API response
+                nutri_dict['energy_kj'] += nutri['energy_kj'] * grams
+                nutri_dict['energy_kcal'] += nutri['energy_kcal'] * grams
+                nutri_dict['protein'] += nutri['protein'] * grams
+                nutri_dict['fat'] += nutri['fat'] * grams
+                nutri_dict['saturated'] += nutri['saturated'] * grams
+                nutri_dict['carbs'] += nutri['carbs'] * grams
+                nutri_dict['sugar'] += nutri['sugar'] * grams
+                nutri_dict['salt'] += nutri['salt'] * grams
 
-                    # Mark ingredient as used
-                    info = {
-                        'og_name': ingredient,
-                        'used_name': info['name'],
-                        'og_amount': amount,
-                        'used_amount': grams,
-                        'og_unit': unit,
-                        'used_unit': 'g',
-                        'likeliness': new_like
-                    }
-                    used_ingredients.append(info)
-                else:
-                    # Mark ingredient as not found
-                    na_ingredients.append((ingredient, "No Nutritional values found in API"))
+                # Mark ingredient as used
+                info = {
+                    'og_name': ingredient,
+                    'used_name': info['name'],
+                    'og_amount': amount,
+                    'used_amount': grams,
+                    'og_unit': unit,
+                    'used_unit': 'g',
+                    'likeliness': match.likeliness,
+                    'stage': match.stage
+                }
+                used_ingredients.append(info)
             else:
                 # Mark ingredient as not found
-                na_ingredients.append((ingredient, "No sufficient match found in database or API"))
+                na_ingredients.append((ingredient, "No Nutritional values found in API"))
+        else:
+            # Mark ingredient as not found
+            na_ingredients.append((ingredient, "No sufficient match found in database or API"))
+
+    current_app.logger.debug(f"Ingredient resolution stats: {RESOLVER.summary()}")
 
     # Return dictionary with nutrition values and list of used / not available ingredients
     return {
@@ -1,16 +1,329 @@
+import re
+from functools import lru_cache
+from tokenize import TokenError
+
+import pint
+from pint.util import UnitsContainer
+from flask import current_app
+
 from app import db
 from app.models import Ingredient, Nutrition, Conversion
+from app.utils.calc import bump_index_version, index_version
+from app.utils.exceptions import ConversionError
+from app.utils.ingredient_parser.en._constants import UNITS
+from app.utils.ingredient_parser.en._utils import convert_to_pint_unit, get_unit_registry
 
 #--------------------
 
-def convert_amount_db():
+# Dimensionalities of the units that can be converted by pint
+MASS = UnitsContainer({'[mass]': 1})
+VOLUME = UnitsContainer({'[length]': 3})
+
+# Units that are tried, in order, when an amount has no unit (eg. "2 eggs")
+COUNT_UNITS = ['', 'each', 'unit', 'piece', 'medium', 'large', 'small', 'serving']
+
+# Matches tokens that are no unit, like amounts and punctuation in free-text portion descriptions
+NON_UNIT_TOKEN = re.compile(r"^[\d\W]+$")
+
+# Matches parenthesised text (eg. "slice (1 oz)"), stray parentheses and quote and inch marks (eg. 'large (3" dia)') in free-text portion descriptions
+UNIT_NOISE = re.compile(r"\([^)]*\)?|[()\"'\u2018\u2019\u201c\u201d\u2032\u2033]")
+
+# Errors pint (or the Python tokenizer it uses) raises for text it cannot parse as a unit
+UNIT_PARSE_ERRORS = (TokenError, pint.errors.DefinitionSyntaxError, pint.errors.UndefinedUnitError, ValueError, AttributeError)
+
+# Unit FDC gives portions whose measure unit is unknown
+UNDETERMINED_UNIT = 'undetermined'
+
+
+@lru_cache(maxsize=1024)
+def normalize_unit(unit: str | pint.Unit) -> tuple[str, bool]:
     """
+    This function normalizes a unit, either a free-text unit from the Conversion table (eg. "cup chopped") or a parsed unit, to a canonical unit.
+    Mass and volume units are resolved through pint (eg. "tbsp" -> "tablespoon"), other units are reduced to their first word in singular form (eg. "slices, thin" -> "slice").
+
+    Arguments:
+    unit (str | pint.Unit): The unit to normalize
+
+    Returns:
+    tuple[str, bool]: The canonical unit (an empty string if there is no unit) and whether the unit consisted of nothing but the canonical unit
 
+    Raises:
+    None
     """
-    raise NotImplementedError()
+    if isinstance(unit, pint.Unit):
+        return (str(unit), True)
 
-def convert_amount_API():
+    # Drop parenthesised text, quotes, amounts and punctuation and make the remaining words singular
+    text = UNIT_NOISE.sub(' ', unit.lower()).replace(',', ' ')
+    words = [UNITS.get(word, word) for word in text.split() if not NON_UNIT_TOKEN.match(word)]
+    if not words:
+        return ('', True)
+
+    # Try the longest leading phrase first, to match units like "fl oz" and "cubic inch".
+    # Text pint cannot parse is no mass or volume unit
+    for length in (2, 1):
+        try:
+            pint_unit = convert_to_pint_unit(' '.join(words[:length]))
+        except UNIT_PARSE_ERRORS:
+            continue
+        if isinstance(pint_unit, pint.Unit) and pint_unit.dimensionality in (MASS, VOLUME):
+            return (str(pint_unit), len(words) <= length)
+
+    return (words[0], len(words) == 1)
+
+
+def canonical_unit(unit: str | pint.Unit | None) -> str:
+    """
+    This function returns the canonical unit of a unit, see normalize_unit
+
+    Arguments:
+    unit (str | pint.Unit | None): The unit to normalize
+
+    Returns:
+    str: The canonical unit, an empty string if there is no unit
+
+    Raises:
+    None
     """
+    return normalize_unit(unit if unit is not None else '')[0]
+
+
+@lru_cache(maxsize=256)
+def unit_factor(canonical: str) -> tuple[str | None, float]:
+    """
+    This function looks up the dimension of a canonical unit and its size in grams (mass) or milliliters (volume)
+
+    Arguments:
+    canonical (str): The canonical unit, see canonical_unit
+
+    Returns:
+    tuple[str | None, float]: 'mass', 'volume' or None for units pint cannot convert, and the size of the unit
+
+    Raises:
+    None
+    """
+    ureg = get_unit_registry()
+    try:
+        unit = ureg(canonical).units if canonical else None
+    except UNIT_PARSE_ERRORS:
+        unit = None
+
+    if unit is not None and unit.dimensionality == MASS:
+        return ('mass', ureg.Quantity(1, unit).to(ureg.gram).magnitude)
+    if unit is not None and unit.dimensionality == VOLUME:
+        return ('volume', ureg.Quantity(1, unit).to(ureg.milliliter).magnitude)
+    return (None, 1.0)
+
+
+class ConversionIndex:
+    """
+    This class holds precompiled gram factors per (ingredient, canonical unit) and the density of each ingredient.
+    All unit strings are normalized once when the index is built, so each conversion is a dictionary lookup.
+    """
+
+    def __init__(self):
+        self.factors = {}
+        self.densities = {}
+
+    def add(self, key: int, amount: float, unit: str, grams: float) -> None:
+        """
+        This function adds a single portion to the index
+        The undetermined unit is left out of the unit of the portion, and portions without any other unit or description are skipped,
+        so they are never used as gram factor (eg. for amounts without unit)
+
+        Arguments:
+        key (int): The id of the ingredient the portion belongs to
+        amount (float): The amount of units in the portion
+        unit (str): The (free-text) unit of the portion
+        grams (float): The weight of the portion in grams
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        if not amount or not grams:
+            return
+
+        words = (unit or '').split()
+        if any(word.lower() == UNDETERMINED_UNIT for word in words):
+            unit = " ".join([word for word in words if word.lower() != UNDETERMINED_UNIT])
+            if not unit:
+                return
+
+        canonical, plain = normalize_unit(unit or '')
+        grams_per_unit = grams / amount
+
+        # Keep the first portion for each unit, but prefer portions without additional description (eg. "cup" over "cup chopped")
+        if plain or (key, canonical) not in self.factors:
+            self.factors[(key, canonical)] = grams_per_unit
+
+        # Derive the density from volume portions, to convert volume units without a portion of their own
+        dimension, milliliters = unit_factor(canonical)
+        if dimension == 'volume' and (plain or key not in self.densities):
+            self.densities[key] = grams_per_unit / milliliters
+
+    @classmethod
+    def from_db(cls) -> 'ConversionIndex':
+        """
+        This function builds the index from all Conversions in the database
+
+        Returns:
+        ConversionIndex: The index
+
+        Raises:
+        None
+        """
+        index = cls()
+        for ingredient_id, amount, unit, value in db.session.query(Conversion.ingredient_id, Conversion.amount, Conversion.unit, Conversion.value):
+            index.add(ingredient_id, amount, unit, value)
+        return index
+
+    @classmethod
+    def from_portions(cls, key: int, portions: list[dict]) -> 'ConversionIndex':
+        """
+        This function builds the index from the portions of a single food from the FDC API
+
+        Arguments:
+        key (int): The FDC ID of the food
+        portions (list[dict]): The portions of the food, as returned by food_data_central.match
+
+        Returns:
+        ConversionIndex: The index
+
+        Raises:
+        None
+        """
+        index = cls()
+        for portion in portions:
+            unit = " ".join([elem for elem in [portion.get('unit'), portion.get('portionDescription'), portion.get('modifier')] if elem])
+            index.add(key, portion.get('amount'), unit, portion.get('gramWeight'))
+        return index
+
+    def grams(self, key: int, amount: float, unit: str | pint.Unit) -> float:
+        """
+        This function converts an amount of an ingredient to grams
+
+        Arguments:
+        key (int): The id of the ingredient
+        amount (float): The amount
+        unit (str | pint.Unit): The unit of the amount
+
+        Returns:
+        float: The amount in grams
+
+        Raises:
+        ConversionError: If there is no portion or density to convert the unit with
+        """
+        canonical = canonical_unit(unit)
+
+        # Portion of the ingredient in this exact unit
+        factor = self.factors.get((key, canonical))
+        if factor is not None:
+            return amount * factor
+
+        # Mass units convert directly, volume units through the density of the ingredient
+        dimension, size = unit_factor(canonical)
+        if dimension == 'mass':
+            return amount * size
+        if dimension == 'volume' and key in self.densities:
+            return amount * size * self.densities[key]
+
+        # Amounts without unit are counted in pieces of the ingredient
+        if canonical == '':
+            for count_unit in COUNT_UNITS:
+                factor = self.factors.get((key, count_unit))
+                if factor is not None:
+                    return amount * factor
+
+        raise ConversionError(f"Could not convert unit '{unit}' to grams for ingredient {key}")
+
+    def __len__(self) -> int:
+        """
+        This function returns the number of gram factors in the index
+
+        Returns:
+        int: The number of (ingredient, unit) pairs
+        """
+        return len(self.factors)
+
+
+class ConversionCache:
+    """
+    This class holds the conversion index shared between requests, so it is only built once per process.
+    The index is rebuilt when the database content changes, see index_version in app/utils/calc/__init__.py
+    """
+
+    def __init__(self):
+        self._index = None
+        self._version = None
+
+    @property
+    def index(self) -> ConversionIndex:
+        """
+        This function returns the conversion index, building it from the database on first use and rebuilding it when the database was updated by any process
+
+        Returns:
+        ConversionIndex: The conversion index
+        """
+        # The version is read before building, so an update during the build causes another rebuild
+        version = index_version()
+        if self._index is None or version != self._version:
+            self._index = ConversionIndex.from_db()
+            self._version = version
+            current_app.logger.debug(f"Built conversion index with {len(self._index)} gram factors")
+        return self._index
+
+    def invalidate(self) -> None:
+        """
+        This function discards the conversion index after the database has been updated, and sets a new index version so the other processes rebuild theirs too
+
+        Returns:
+        None
+
+        Raises:
+        OSError: If the index version cannot be written
+        """
+        self._index = None
+        bump_index_version()
+
+
+# Conversion index shared between requests
+CONVERSIONS = ConversionCache()
+
+
+def convert_amount_db(ingredient_id: int, amount: float, unit: str | pint.Unit) -> float:
+    """
+    This function converts an amount of an ingredient from the database to grams
+
+    Arguments:
+    ingredient_id (int): The id of the Ingredient
+    amount (float): The amount
+    unit (str | pint.Unit): The unit of the amount
+
+    Returns:
+    float: The amount in grams
+
+    Raises:
+    ConversionError: If the unit cannot be converted for this ingredient
+    """
+    return CONVERSIONS.index.grams(ingredient_id, amount, unit)
+
+
+def convert_amount_API(conversion: list[dict], amount: float, unit: str | pint.Unit) -> float:
+    """
+    This function converts an amount of a food from the FDC API to grams
+
+    Arguments:
+    conversion (list[dict]): The portions of the food, as returned by food_data_central.match
+    amount (float): The amount
+    unit (str | pint.Unit): The unit of the amount
+
+    Returns:
+    float: The amount in grams
 
+    Raises:
+    ConversionError: If the unit cannot be converted for this food
     """
-    raise NotImplementedError()
\ No newline at end of file
+    return ConversionIndex.from_portions(0, conversion).grams(0, amount, unit)
@@ -1,5 +1,7 @@
 from app import db
 from app.models import Ingredient, Nutrition, Conversion
+from app.utils.calc import similarity
+from app.utils.data.food_data_central import search
 
 #--------------------
 
@@ -15,11 +17,28 @@ def find_best_match_db():
     """
     raise NotImplementedError()
 
-def find_best_match_API():
+def find_best_match_API(ingredient: str) -> tuple[int | None, float]:
     """
-    
+    This function searches the FoodData Central API for the food that best matches the given ingredient name
+
+    Arguments:
+    ingredient (str): The ingredient name to search for
+
+    Returns:
+    tuple[int | None, float]: The FDC ID of the best matching food (None if nothing was found) and its likeliness on a scale of 0 to 100
+
+    Raises:
+    APIRequestError: The API request failed
+    APISearchError: The API response could not be parsed
     """
-    raise NotImplementedError()
+    best_id, best_likeliness = None, 0.0
+
+    for food in search(ingredient)['foods']:
+        likeliness = similarity(ingredient, food.get('description', ''))
+        if likeliness > best_likeliness:
+            best_id, best_likeliness = food.get('fdcId'), likeliness
+
+    return (best_id, best_likeliness)
 
 def extract_API_info():
     """
@@ -0,0 +1,344 @@
+import json
+import time
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass
+
+from flask import current_app
+
+from app import db
+from app.models import Ingredient
+from app.utils.calc import THRESHOLD, bump_index_version, index_version, name_tokens, normalize_name, similarity
+from app.utils.calc.parse_ingredient import find_best_match_API
+from app.utils.exceptions import APIRequestError, APISearchError, APIRateLimitError
+
+#--------------------
+
+# Resolution stages, in the order they are tried
+STAGES = ['exact', 'synonym', 'fuzzy', 'api']
+
+# Number of most recent latencies kept per stage to calculate percentiles
+LATENCY_SAMPLES = 1024
+
+# Maximum number of candidates (with the most tokens in common) scored by the fuzzy stage
+FUZZY_CANDIDATES = 50
+
+
+@dataclass
+class Resolution:
+    """
+    Dataclass for the result of resolving an ingredient name
+
+    Attributes:
+    stage (str | None): The stage that resolved the name, None if the name could not be resolved
+    ingredient_id (int | None): The id of the matching Ingredient in the database, if resolved locally
+    fdc_id (int | None): The FDC ID of the matching food, if resolved by the API
+    name (str | None): The name of the matching ingredient or food
+    likeliness (float): The likeliness of the match on a scale of 0 to 100
+    """
+    stage: str | None
+    ingredient_id: int | None
+    fdc_id: int | None
+    name: str | None
+    likeliness: float
+
+
+class StageStats:
+    """
+    This class keeps track of the hit rate and latency of a single resolution stage
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.hits = 0
+        self.total_ns = 0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def record(self, hit: bool, elapsed_ns: int) -> None:
+        """
+        This function records a single call of the stage
+
+        Arguments:
+        hit (bool): True if the stage resolved the name
+        elapsed_ns (int): The time spent in the stage in nanoseconds
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        self.calls += 1
+        self.hits += int(hit)
+        self.total_ns += elapsed_ns
+        self.latencies.append(elapsed_ns)
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        This function calculates the fraction of calls in which the stage resolved the name
+
+        Returns:
+        float: The hit rate, 0.0 if the stage was never called
+        """
+        return self.hits / self.calls if self.calls else 0.0
+
+    def percentile(self, q: float) -> float:
+        """
+        This function calculates a latency percentile over the most recent calls
+
+        Arguments:
+        q (float): The percentile, between 0 and 100
+
+        Returns:
+        float: The latency in milliseconds, 0.0 if the stage was never called
+
+        Raises:
+        None
+        """
+        if not self.latencies:
+            return 0.0
+
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+        return ordered[index] / 1e6
+
+    def summary(self) -> dict:
+        """
+        This function summarizes the statistics of the stage
+
+        Returns:
+        dict: The number of calls and hits, the hit rate and the mean, p50 and p99 latency in milliseconds
+        """
+        return {
+            'calls': self.calls,
+            'hits': self.hits,
+            'hit_rate': round(self.hit_rate, 4),
+            'mean_ms': round(self.total_ns / self.calls / 1e6, 4) if self.calls else 0.0,
+            'p50_ms': round(self.percentile(50), 4),
+            'p99_ms': round(self.percentile(99), 4)
+        }
+
+
+class IngredientIndex:
+    """
+    This class holds in-memory lookup tables of the ingredient names in the database
+
+    Arguments:
+    rows (list[tuple]): Tuples of (id, name_en, name_nl, synonyms JSON string) for each Ingredient
+    """
+
+    def __init__(self, rows: list[tuple]):
+        self.exact = {}
+        self.synonyms = {}
+        self.names = {}
+        self.entries = []
+        self.inverted = defaultdict(list)
+
+        for ingredient_id, name_en, name_nl, synonyms in rows:
+            self.names[ingredient_id] = name_en or name_nl
+
+            for name in (name_en, name_nl):
+                if name:
+                    # Keep the first ingredient for names that occur more than once
+                    self.exact.setdefault(normalize_name(name), ingredient_id)
+                    self.__add_entry(ingredient_id, name)
+
+            for synonym in (json.loads(synonyms) if synonyms else []):
+                if synonym:
+                    self.synonyms.setdefault(normalize_name(synonym), ingredient_id)
+                    self.__add_entry(ingredient_id, synonym)
+
+    def __add_entry(self, ingredient_id: int, name: str) -> None:
+        """
+        This function adds a name to the entries scored by the fuzzy stage
+
+        Arguments:
+        ingredient_id (int): The id of the Ingredient
+        name (str): The name or synonym of the Ingredient
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        entry = len(self.entries)
+        self.entries.append((ingredient_id, name))
+        for token in set(name_tokens(name)):
+            self.inverted[token].append(entry)
+
+    @classmethod
+    def from_db(cls) -> 'IngredientIndex':
+        """
+        This function builds the index from all Ingredients in the database
+
+        Returns:
+        IngredientIndex: The index
+
+        Raises:
+        None
+        """
+        rows = db.session.query(Ingredient.id, Ingredient.name_en, Ingredient.name_nl, Ingredient.synonyms).all()
+        return cls(rows)
+
+    def exact_match(self, name: str) -> int | None:
+        """
+        This function looks up the ingredient with the same normalized name
+
+        Arguments:
+        name (str): The ingredient name
+
+        Returns:
+        int | None: The id of the matching Ingredient, or None
+
+        Raises:
+        None
+        """
+        return self.exact.get(normalize_name(name))
+
+    def synonym_match(self, name: str) -> int | None:
+        """
+        This function looks up the ingredient with a synonym equal to the normalized name
+
+        Arguments:
+        name (str): The ingredient name
+
+        Returns:
+        int | None: The id of the matching Ingredient, or None
+
+        Raises:
+        None
+        """
+        return self.synonyms.get(normalize_name(name))
+
+    def fuzzy_match(self, name: str) -> tuple[int | None, float]:
+        """
+        This function finds the most similar ingredient name, only scoring the names sharing the most tokens with the given name
+
+        Arguments:
+        name (str): The ingredient name
+
+        Returns:
+        tuple[int | None, float]: The id of the most similar Ingredient (None if no name shares a token) and its likeliness
+
+        Raises:
+        None
+        """
+        shared = Counter()
+        for token in set(name_tokens(name)):
+            shared.update(self.inverted.get(token, ()))
+
+        best_id, best_likeliness = None, 0.0
+        for entry, _ in shared.most_common(FUZZY_CANDIDATES):
+            ingredient_id, candidate = self.entries[entry]
+            likeliness = similarity(name, candidate)
+            if likeliness > best_likeliness:
+                best_id, best_likeliness = ingredient_id, likeliness
+
+        return (best_id, best_likeliness)
+
+
+class IngredientResolver:
+    """
+    This class resolves ingredient names to an ingredient in the database or in the FoodData Central API.
+    The stages are tried in order (exact name, synonym, fuzzy name, API) and the first stage with a sufficient match wins.
+    The hit rate and latency of each stage are recorded in the stats attribute.
+    The index is built once per process and rebuilt within INDEX_VERSION_CHECK_INTERVAL seconds when the database content changes, see index_version.
+    This works for all processes on the same machine; processes on other machines only see the update after a restart.
+    """
+
+    def __init__(self):
+        self._index = None
+        self._version = None
+        self.stats = {stage: StageStats() for stage in STAGES}
+
+    @property
+    def index(self) -> IngredientIndex:
+        """
+        This function returns the ingredient index, building it from the database on first use and rebuilding it when the database was updated by any process
+
+        Returns:
+        IngredientIndex: The ingredient index
+        """
+        # The version is read before building, so an update during the build causes another rebuild
+        version = index_version()
+        if self._index is None or version != self._version:
+            start = time.perf_counter()
+            self._index = IngredientIndex.from_db()
+            self._version = version
+            current_app.logger.debug(f"Built ingredient index with {len(self._index.entries)} names in {time.perf_counter() - start:.3f}s")
+        return self._index
+
+    def invalidate(self) -> None:
+        """
+        This function discards the ingredient index after the database has been updated, and sets a new index version so the other processes rebuild theirs too
+
+        Returns:
+        None
+
+        Raises:
+        OSError: If the index version cannot be written
+        """
+        self._index = None
+        bump_index_version()
+
+    def resolve(self, name: str) -> Resolution:
+        """
+        This function resolves an ingredient name to the best matching ingredient
+
+        Arguments:
+        name (str): The ingredient name
+
+        Returns:
+        Resolution: The resolved ingredient, with stage None if no sufficient match was found
+
+        Raises:
+        None
+        """
+        index = self.index
+
+        # Exact and synonym lookups
+        for stage, lookup in (('exact', index.exact_match), ('synonym', index.synonym_match)):
+            start = time.perf_counter_ns()
+            ingredient_id = lookup(name)
+            self.stats[stage].record(ingredient_id is not None, time.perf_counter_ns() - start)
+
+            if ingredient_id is not None:
+                return Resolution(stage, ingredient_id, None, index.names[ingredient_id], 100.0)
+
+        # Fuzzy lookup
+        start = time.perf_counter_ns()
+        ingredient_id, likeliness = index.fuzzy_match(name)
+        hit = (ingredient_id is not None) and (likeliness > THRESHOLD)
+        self.stats['fuzzy'].record(hit, time.perf_counter_ns() - start)
+
+        if hit:
+            return Resolution('fuzzy', ingredient_id, None, index.names[ingredient_id], likeliness)
+
+        # Remote lookup, only accepted if it is better than the local one
+        start = time.perf_counter_ns()
+        try:
+            fdc_id, new_likeliness = find_best_match_API(name)
+        except (APIRequestError, APISearchError, APIRateLimitError) as e:
+            current_app.logger.warning(f"FDC API lookup failed for '{name}': {str(e)}")
+            fdc_id, new_likeliness = None, 0.0
+        hit = (fdc_id is not None) and (new_likeliness > likeliness) and (new_likeliness > THRESHOLD)
+        self.stats['api'].record(hit, time.perf_counter_ns() - start)
+
+        if hit:
+            return Resolution('api', None, fdc_id, None, new_likeliness)
+
+        return Resolution(None, None, None, None, max(likeliness, new_likeliness))
+
+    def summary(self) -> dict:
+        """
+        This function summarizes the statistics of all stages
+
+        Returns:
+        dict: The statistics per stage, see StageStats.summary
+        """
+        return {stage: stats.summary() for stage, stats in self.stats.items()}
+
+
+# Resolver shared between requests, so the index is only built once per process
+RESOLVER = IngredientResolver()
@@ -10,6 +10,18 @@ FDC_SEARCH_URL = "https://api.nal.usda.gov/fdc/v1/foods/search?"
 FDC_MATCH_URL = "https://api.nal.usda.gov/fdc/v1/food"
 FDC_BULK_MATCH_URL = "https://api.nal.usda.gov/fdc/v1/foods?"
 
+# Nutrients used in the nutrition calculation, as (nutrient id, nutrient number) per nutrition field
+# The ids correspond to those used when loading the FDC csv files, the numbers are used by the 'abridged' format
+FDC_NUTRIENTS = {
+    'energy_kcal': (1008, '208'),
+    'protein': (1003, '203'),
+    'fat': (1004, '204'),
+    'saturated': (1258, '606'),
+    'carbs': (1005, '205'),
+    'sugar': (1063, '269.3'),
+    'salt': (1093, '307'),
+}
+
 TO_SCRAPE = ['sr_legacy_food', 'foundation_food']
 
 
@@ -1,13 +1,22 @@
 import requests
-import json
 
 from flask import current_app
 
 from app.utils.exceptions import APIRequestError, APISearchError
-from app.utils.data import FDC_API_KEY, FDC_SEARCH_URL, FDC_MATCH_URL, FDC_BULK_MATCH_URL
+from app.utils.data import FDC_API_KEY, FDC_SEARCH_URL, FDC_MATCH_URL, FDC_BULK_MATCH_URL, FDC_NUTRIENTS
+from app.utils.data.json_stream import JSONStream, iter_response
 
 #--------------------
 
+# Fields kept from the foods in the API responses, all other fields are skipped while parsing
+SEARCH_FIELDS = {'fdcId', 'description', 'dataType', 'score'}
+FOOD_FIELDS = {'fdcId', 'description', 'dataType'}
+
+# Nutrient ids and numbers of the nutrients used in the nutrition calculation
+NUTRIENT_IDS = {nutrient_id for nutrient_id, _ in FDC_NUTRIENTS.values()}
+NUTRIENT_NUMBERS = {number for _, number in FDC_NUTRIENTS.values()}
+
+
 def search(query: str, dataType: list[str] = ['Foundation', 'SR Legacy'], pageSize: int = 200) -> dict:
     """
     This function searches the FoodData Central API for a given query and returns a dictionary containing the results.
@@ -18,7 +27,7 @@ def search(query: str, dataType: list[str] = ['Foundation', 'SR Legacy'], pageSi
         pageSize (int): The number of results to return, possible values: integer between 1 and 200. The default is 200.
 
     Returns:
-        dict: The API response.
+        dict: The total number of hits and the found foods, reduced to their fdcId, description, dataType and score.
 
     Raises:
         APIRequestError: The API request failed.
@@ -38,16 +47,17 @@ def search(query: str, dataType: list[str] = ['Foundation', 'SR Legacy'], pageSi
     current_app.logger.debug(f"Searching FDC API by name, with parameters: {log_params}")
 
     # Make the API request
-    response = requests.get(FDC_SEARCH_URL, params=params)
+    response = requests.get(FDC_SEARCH_URL, params=params, stream=True)
 
     # Check if the API request was successful
     if response.status_code != 200:
+        response.close()
         raise APIRequestError(f"API request failed with status code {response.status_code}")
     
     # Parse the API response
     try:
         current_app.logger.debug(f"API response succesfull, parsing...")
-        return json.loads(response.content)
+        return extract_search(JSONStream(iter_response(response)))
     except:
         raise APISearchError("API response could not be parsed")
 
@@ -62,7 +72,7 @@ def match(fdcId: str, format: str = 'full') -> dict:
         format (str): The format of the response, possible values: 'full', 'abridged'. The default is 'full'.
 
     Returns:
-        dict: The API response.
+        dict: The food, reduced to its fdcId, description, dataType, the nutrients used in the calculation and its portions.
 
     Raises:
         APIRequestError: The API request failed.
@@ -81,31 +91,32 @@ def match(fdcId: str, format: str = 'full') -> dict:
     current_app.logger.debug(f"Searching FDC API by FDC ID {fdcId}, with parameters: {log_params}")
     
     # Make the API request
-    response = requests.get(url, params=params)
+    response = requests.get(url, params=params, stream=True)
 
     # Check if the API request was successful
     if response.status_code != 200:
+        response.close()
         raise APIRequestError(f"API request failed with status code {response.status_code}")
     
     # Parse the API response
     try:
         current_app.logger.debug(f"API response succesfull, parsing...")
-        return json.loads(response.content)
+        return extract_food(JSONStream(iter_response(response)))
     except:
         raise APISearchError("API response could not be parsed")
     
 
 
-def bulk_match(fdcIds: list[str], format: str = 'full') -> list[dict]:
+def bulk_match(fdcIds: list[str], format: str = 'abridged') -> list[dict]:
     """
     This function searches the FoodData Central API for a list of given FDC IDs and returns a list of dictionaries containing the results.
 
     Arguments:
         fdcIds (list[str]): The list of FDC IDs to search for.
-        format (str): The format of the response, possible values: 'full', 'abridged'. The default is 'full'.
+        format (str): The format of the response, possible values: 'full', 'abridged'. The default is 'abridged', use 'full' when the portions are required.
 
     Returns:
-        list[dict]: The API response.
+        list[dict]: The foods, each reduced to its fdcId, description, dataType, the nutrients used in the calculation and its portions.
 
     Raises:
         APIRequestError: The API request failed.
@@ -124,16 +135,139 @@ def bulk_match(fdcIds: list[str], format: str = 'full') -> list[dict]:
     current_app.logger.debug(f"Bulk searching FDC API by FDC IDs, with parameters: {log_params}")
     
     # Make the API request
-    response = requests.get(FDC_BULK_MATCH_URL, params=params)
+    response = requests.get(FDC_BULK_MATCH_URL, params=params, stream=True)
 
     # Check if the API request was successful
     if response.status_code != 200:
+        response.close()
         raise APIRequestError(f"API request failed with status code {response.status_code}")
     
     # Parse the API response
     try:
         current_app.logger.debug(f"API response succesfull, parsing...")
-        return json.loads(response.content)
+        stream = JSONStream(iter_response(response))
+        return [extract_food(stream) for _ in stream.elements()]
     except:
         raise APISearchError("API response could not be parsed")
 
+
+
+def extract_search(stream: JSONStream) -> dict:
+    """
+    This function extracts the total number of hits and the relevant fields of the found foods from a streamed search response.
+
+    Arguments:
+        stream (JSONStream): The streamed API response.
+
+    Returns:
+        dict: The total number of hits and the found foods, reduced to their fdcId, description, dataType and score.
+
+    Raises:
+        ValueError: The API response is not valid JSON.
+    """
+    result = {'totalHits': 0, 'foods': []}
+
+    for key in stream.items():
+        if key == 'totalHits':
+            result['totalHits'] = stream.value()
+        elif key == 'foods':
+            for _ in stream.elements():
+                # Only decode the fields needed to pick the best match
+                food = {}
+                for field in stream.items():
+                    if field in SEARCH_FIELDS:
+                        food[field] = stream.value()
+                    else:
+                        stream.skip()
+                result['foods'].append(food)
+        else:
+            stream.skip()
+
+    return result
+
+
+def extract_food(stream: JSONStream) -> dict:
+    """
+    This function extracts the relevant fields of a single food from a streamed API response, in either the 'full' or 'abridged' format.
+
+    Arguments:
+        stream (JSONStream): The streamed API response, positioned at the start of the food.
+
+    Returns:
+        dict: The food, reduced to its fdcId, description, dataType, the nutrients used in the calculation and its portions.
+
+    Raises:
+        ValueError: The API response is not valid JSON.
+    """
+    food = {'foodNutrients': [], 'foodPortions': []}
+
+    for key in stream.items():
+        if key in FOOD_FIELDS:
+            food[key] = stream.value()
+        elif key == 'foodNutrients':
+            # Decode the nutrients one at a time and only keep the nutrients used in the calculation
+            for _ in stream.elements():
+                nutrient = __reduce_nutrient(stream.value())
+                if nutrient:
+                    food['foodNutrients'].append(nutrient)
+        elif key == 'foodPortions':
+            for _ in stream.elements():
+                food['foodPortions'].append(__reduce_portion(stream.value()))
+        else:
+            stream.skip()
+
+    return food
+
+
+def __reduce_nutrient(nutrient: dict) -> dict | None:
+    """
+    This function reduces a food nutrient from the API response to its id, number, amount and unit.
+
+    Arguments:
+        nutrient (dict): The food nutrient as given in the API response.
+
+    Returns:
+        dict | None: The reduced food nutrient, or None if the nutrient is not used in the calculation.
+
+    Raises:
+        None
+    """
+    # The 'full' format nests the nutrient information, the 'abridged' format does not
+    info = nutrient.get('nutrient', nutrient)
+    nutrient_id = info.get('id', nutrient.get('nutrientId'))
+    number = info.get('number', nutrient.get('nutrientNumber'))
+
+    if (nutrient_id not in NUTRIENT_IDS) and (number not in NUTRIENT_NUMBERS):
+        return None
+
+    return {
+        'nutrientId': nutrient_id,
+        'number': number,
+        'amount': nutrient.get('amount', nutrient.get('value')),
+        'unitName': info.get('unitName')
+    }
+
+
+def __reduce_portion(portion: dict) -> dict:
+    """
+    This function reduces a food portion from the API response to the fields needed for unit conversion.
+
+    Arguments:
+        portion (dict): The food portion as given in the API response.
+
+    Returns:
+        dict: The reduced food portion.
+
+    Raises:
+        None
+    """
+    measure_unit = portion.get('measureUnit') or {}
+
+    return {
+        'amount': portion.get('amount'),
+        'unit': measure_unit.get('name'),
+        'portionDescription': portion.get('portionDescription'),
+        'modifier': portion.get('modifier'),
+        'gramWeight': portion.get('gramWeight')
+    }
+
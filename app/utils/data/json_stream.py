@@ -0,0 +1,226 @@
+import codecs
+import json
+from typing import Any, Iterator
+
+#--------------------
+
+# Whitespace characters allowed between JSON tokens
+JSON_WHITESPACE = ' \t\n\r'
+
+# Characters that can continue a JSON number
+JSON_NUMBER_CHARS = '0123456789.eE+-'
+
+# Default amount of bytes read from the response per chunk
+CHUNK_SIZE = 64 * 1024
+
+
+class JSONStream:
+    """
+    This class incrementally walks a JSON document that is delivered in chunks (eg. a streamed HTTP response).
+    Only the value that is currently being decoded is kept in memory, which allows large responses to be
+    reduced to the required fields without ever building the full document.
+
+    Arguments:
+        chunks (Iterator[bytes]): The chunks of the (utf-8 encoded) JSON document.
+
+    Raises:
+        ValueError: If the document is not valid JSON.
+    """
+
+    def __init__(self, chunks: Iterator[bytes]):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._exhausted = False
+
+    def _fill(self) -> bool:
+        """
+        This function reads the next chunk into the buffer, dropping the part of the buffer that is already consumed.
+
+        Returns:
+            bool: False if there is no more data to read, otherwise True.
+        """
+        if self._exhausted:
+            return False
+
+        # Drop the consumed part of the buffer to keep memory bounded
+        self._buffer = self._buffer[self._pos:]
+        self._pos = 0
+
+        for chunk in self._chunks:
+            text = self._decoder.decode(chunk)
+            if text:
+                self._buffer += text
+                return True
+
+        self._buffer += self._decoder.decode(b'', final=True)
+        self._exhausted = True
+        return False
+
+    def _peek(self) -> str:
+        """
+        This function skips whitespace and returns the next character, without consuming it.
+
+        Returns:
+            str: The next character, or an empty string at the end of the document.
+        """
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in JSON_WHITESPACE:
+                self._pos += 1
+
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+
+            if not self._fill():
+                return ''
+
+    def _expect(self, char: str) -> None:
+        """
+        This function consumes the next character, which must be the given character.
+
+        Arguments:
+            char (str): The expected character.
+
+        Raises:
+            ValueError: If the next character is not the expected character.
+        """
+        found = self._peek()
+        if found != char:
+            raise ValueError(f"Expected '{char}' but found '{found}' in JSON document")
+        self._pos += 1
+
+    def _next_separator(self, closing: str) -> bool:
+        """
+        This function consumes the separator after a member of an object or array.
+
+        Arguments:
+            closing (str): The character that closes the current object or array.
+
+        Returns:
+            bool: True if another member follows, False if the object or array is closed.
+
+        Raises:
+            ValueError: If the separator is invalid.
+        """
+        found = self._peek()
+        self._pos += 1
+        if found == ',':
+            return True
+        if found == closing:
+            return False
+        raise ValueError(f"Expected ',' or '{closing}' but found '{found}' in JSON document")
+
+    def value(self) -> Any:
+        """
+        This function decodes the next complete JSON value.
+
+        Returns:
+            Any: The decoded value.
+
+        Raises:
+            ValueError: If the value is not valid JSON.
+        """
+        self._peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                # The value may be cut off by the end of the current chunk
+                if self._fill():
+                    continue
+                raise
+
+            # A number at the end of the buffer may continue in the next chunk
+            at_end = end == len(self._buffer)
+            cut_number = isinstance(value, (int, float)) and not at_end and self._buffer[end] in JSON_NUMBER_CHARS
+            if (at_end or cut_number) and self._fill():
+                continue
+
+            self._pos = end
+            return value
+
+    def items(self) -> Iterator[str]:
+        """
+        This function iterates over the keys of the next JSON object.
+        After each key, the caller must consume the corresponding value with value(), items() or elements().
+
+        Yields:
+            str: The keys of the object.
+
+        Raises:
+            ValueError: If the next value is not an object.
+        """
+        self._expect('{')
+        if self._peek() == '}':
+            self._pos += 1
+            return
+
+        while True:
+            key = self.value()
+            self._expect(':')
+            yield key
+
+            if not self._next_separator('}'):
+                return
+
+    def elements(self) -> Iterator[None]:
+        """
+        This function iterates over the elements of the next JSON array.
+        For each iteration, the caller must consume the element with value(), items() or elements().
+
+        Yields:
+            None: Once for each element of the array.
+
+        Raises:
+            ValueError: If the next value is not an array.
+        """
+        self._expect('[')
+        if self._peek() == ']':
+            self._pos += 1
+            return
+
+        while True:
+            yield
+
+            if not self._next_separator(']'):
+                return
+
+    def skip(self) -> None:
+        """
+        This function consumes the next JSON value without keeping it.
+        Objects and arrays are walked member by member, so the skipped value is never held in memory as a whole.
+
+        Raises:
+            ValueError: If the value is not valid JSON.
+        """
+        char = self._peek()
+        if char == '{':
+            for _ in self.items():
+                self.skip()
+        elif char == '[':
+            for _ in self.elements():
+                self.skip()
+        else:
+            self.value()
+
+
+def iter_response(response, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    This function yields the body of a streamed requests response in chunks and closes the response afterwards.
+
+    Arguments:
+        response (requests.Response): The response, requested with stream=True.
+        chunk_size (int): The amount of bytes per chunk.
+
+    Yields:
+        bytes: The chunks of the response body.
+
+    Raises:
+        None
+    """
+    try:
+        yield from response.iter_content(chunk_size=chunk_size)
+    finally:
+        response.close()
@@ -42,4 +42,12 @@ class ElementInvalid(DatabaseError):
     """
     Exception for when an element is invalid.
     """
+    pass
+
+
+
+class ConversionError(ApplicationException):
+    """
+    Exception for when an amount cannot be converted to grams.
+    """
     pass
\ No newline at end of file
@@ -1,13 +1,29 @@
-from app.utils.ingredient_parser._common import SUPPORTED_LANGUAGES, download_nltk_resources, show_model_card
-from app.utils.ingredient_parser.parsers import inspect_parser, parse_ingredient, parse_multiple_ingredients
-
-download_nltk_resources()
+from app.utils.ingredient_parser._cache import PARSE_CACHE, decode_parsed, encode_parsed
+from app.utils.ingredient_parser._common import SUPPORTED_LANGUAGES, show_model_card
+from app.utils.ingredient_parser.en import STEM_CACHE, TOKENIZER
+from app.utils.ingredient_parser.parsers import (
+    inspect_parser,
+    iter_parse_ingredients,
+    parse_ingredient,
+    parse_multiple_ingredients,
+    preload_parser,
+)
+from app.utils.ingredient_parser.profiling import ParserProfiler, profile_parser
 
 __all__ = [
+    "PARSE_CACHE",
+    "STEM_CACHE",
     "SUPPORTED_LANGUAGES",
+    "TOKENIZER",
+    "ParserProfiler",
+    "decode_parsed",
+    "encode_parsed",
     "inspect_parser",
+    "iter_parse_ingredients",
     "parse_ingredient",
     "parse_multiple_ingredients",
+    "preload_parser",
+    "profile_parser",
     "show_model_card",
 ]
 
@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from functools import cache, lru_cache
+from importlib.resources import files
+from typing import Iterable
+
+import pint
+from pint.util import UnitsContainer
+
+from app.utils.ingredient_parser._common import call_after_fork
+from app.utils.ingredient_parser.dataclasses import (
+    CompositeIngredientAmount,
+    IngredientAmount,
+    IngredientText,
+    ParsedIngredient,
+)
+from app.utils.ingredient_parser.en._tagger import MODEL_FILE
+from app.utils.ingredient_parser.en._utils import get_unit_registry
+
+# Default maximum number of parsed sentences kept in memory
+DEFAULT_CACHE_SIZE = 4096
+
+# Model file of each supported language, as (package, file name)
+MODEL_FILES = {
+    "en": ("app.utils.ingredient_parser.en", MODEL_FILE),
+}
+
+# Order of the IngredientAmount flags in the encoded flags integer
+AMOUNT_FLAGS = ("APPROXIMATE", "SINGULAR", "RANGE", "MULTIPLIER")
+
+
+@cache
+def model_hash(lang: str) -> str:
+    """Return the SHA-256 hash of the model file for a language.
+
+    The hash is part of every cache key, so cached results are never served for a
+    different model.
+
+    Parameters
+    ----------
+    lang : str
+        Language of the model
+
+    Returns
+    -------
+    str
+        Hex digest of the model file
+    """
+    package, file_name = MODEL_FILES[lang]
+    return hashlib.sha256((files(package) / file_name).read_bytes()).hexdigest()
+
+
+def cache_key(
+    sentence: str,
+    lang: str,
+    discard_isolated_stop_words: bool,
+    expect_name_in_output: bool,
+    string_units: bool,
+    imperial_units: bool,
+) -> str:
+    """Return the cache key of a sentence parsed with the given options.
+
+    Parameters
+    ----------
+    sentence : str
+        Ingredient sentence
+    lang : str
+        Language of sentence
+    discard_isolated_stop_words : bool
+        Option passed to parse_ingredient
+    expect_name_in_output : bool
+        Option passed to parse_ingredient
+    string_units : bool
+        Option passed to parse_ingredient
+    imperial_units : bool
+        Option passed to parse_ingredient
+
+    Returns
+    -------
+    str
+        Hex digest identifying the sentence, options and model
+    """
+    key = json.dumps(
+        [
+            model_hash(lang),
+            sentence,
+            lang,
+            bool(discard_isolated_stop_words),
+            bool(expect_name_in_output),
+            bool(string_units),
+            bool(imperial_units),
+        ]
+    )
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+@lru_cache(maxsize=512)
+def _unit(dimensions: tuple[tuple[str, int | float], ...]) -> pint.Unit:
+    """Return the pint.Unit made up of the given units and exponents.
+
+    Parameters
+    ----------
+    dimensions : tuple[tuple[str, int | float], ...]
+        Name and exponent of each unit, in the order of the original pint.Unit
+
+    Returns
+    -------
+    pint.Unit
+    """
+    return get_unit_registry().Unit(UnitsContainer(dict(dimensions)))
+
+
+def _encode_text(text: IngredientText | None) -> list | None:
+    """Encode an IngredientText, see encode_parsed."""
+    if text is None:
+        return None
+    return [text.text, text.confidence]
+
+
+def _decode_text(encoded: list | None) -> IngredientText | None:
+    """Decode an IngredientText, see decode_parsed."""
+    if encoded is None:
+        return None
+    return IngredientText(*encoded)
+
+
+def _encode_amount(amount: IngredientAmount | CompositeIngredientAmount) -> list:
+    """Encode an IngredientAmount or CompositeIngredientAmount, see encode_parsed."""
+    if isinstance(amount, CompositeIngredientAmount):
+        return [
+            "C",
+            [_encode_amount(a) for a in amount.amounts],
+            amount.join,
+            amount.subtractive,
+            amount.text,
+            amount.confidence,
+            amount.starting_index,
+        ]
+
+    flags = sum(1 << i for i, flag in enumerate(AMOUNT_FLAGS) if getattr(amount, flag))
+    return [
+        "A",
+        amount.quantity,
+        amount.quantity_max,
+        # pint.Unit objects are stored as their units and exponents, strings as is
+        (
+            [[name, exponent] for name, exponent in amount.unit._units.items()]
+            if isinstance(amount.unit, pint.Unit)
+            else amount.unit
+        ),
+        amount.text,
+        amount.confidence,
+        amount.starting_index,
+        flags,
+    ]
+
+
+def _decode_amount(encoded: list) -> IngredientAmount | CompositeIngredientAmount:
+    """Decode an IngredientAmount or CompositeIngredientAmount, see decode_parsed."""
+    if encoded[0] == "C":
+        _, amounts, join, subtractive, text, confidence, starting_index = encoded
+        composite = CompositeIngredientAmount(
+            [_decode_amount(a) for a in amounts], join, subtractive
+        )
+        composite.text = text
+        composite.confidence = confidence
+        composite.starting_index = starting_index
+        return composite
+
+    _, quantity, quantity_max, unit, text, confidence, index, flags = encoded
+    return IngredientAmount(
+        quantity=quantity,
+        quantity_max=quantity_max,
+        unit=unit if isinstance(unit, str) else _unit(tuple(map(tuple, unit))),
+        text=text,
+        confidence=confidence,
+        starting_index=index,
+        **{flag: bool(flags & (1 << i)) for i, flag in enumerate(AMOUNT_FLAGS)},
+    )
+
+
+def encode_parsed(parsed: ParsedIngredient) -> list:
+    """Encode a ParsedIngredient as nested lists of plain values.
+
+    pint.Unit objects are stored by their units and exponents. The encoded value can
+    be serialised as JSON and decoded with decode_parsed.
+
+    Parameters
+    ----------
+    parsed : ParsedIngredient
+        Parsed ingredient to encode
+
+    Returns
+    -------
+    list
+        Encoded parsed ingredient
+    """
+    return [
+        _encode_text(parsed.name),
+        _encode_text(parsed.size),
+        [_encode_amount(amount) for amount in parsed.amount],
+        _encode_text(parsed.preparation),
+        _encode_text(parsed.comment),
+        _encode_text(parsed.purpose),
+        parsed.sentence,
+    ]
+
+
+def decode_parsed(encoded: list) -> ParsedIngredient:
+    """Decode a ParsedIngredient encoded by encode_parsed.
+
+    Parameters
+    ----------
+    encoded : list
+        Encoded parsed ingredient
+
+    Returns
+    -------
+    ParsedIngredient
+        New ParsedIngredient object, equal to the encoded one
+    """
+    name, size, amounts, preparation, comment, purpose, sentence = encoded
+    return ParsedIngredient(
+        name=_decode_text(name),
+        size=_decode_text(size),
+        amount=[_decode_amount(amount) for amount in amounts],
+        preparation=_decode_text(preparation),
+        comment=_decode_text(comment),
+        purpose=_decode_text(purpose),
+        sentence=sentence,
+    )
+
+
+class ParseCache:
+    """Cache of parsed ingredient sentences.
+
+    Parsed sentences are kept in a size-bounded in-memory LRU and, if a path is
+    given, in a persistent SQLite database that survives restarts and is shared
+    between processes. Entries are stored encoded (see encode_parsed), so every hit
+    returns a new ParsedIngredient object that can be modified safely.
+
+    The cache can be used after the process forks, e.g. in gunicorn workers forked
+    from a master that preloaded the application. A forked child keeps the entries
+    in memory, but opens its own connection to the SQLite database, because SQLite
+    connections must not be used across a fork.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        Maximum number of parsed sentences kept in memory.
+        Default is DEFAULT_CACHE_SIZE.
+    path : str | None, optional
+        Path of the SQLite database of the persistent tier.
+        Default is None, which only caches in memory.
+
+    Attributes
+    ----------
+    maxsize : int
+        Maximum number of parsed sentences kept in memory.
+    path : str | None
+        Path of the SQLite database of the persistent tier.
+    hits : int
+        Number of lookups served from memory.
+    persistent_hits : int
+        Number of lookups served from the persistent tier.
+    misses : int
+        Number of lookups not found in the cache.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE, path: str | None = None):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.configure(maxsize=maxsize, path=path)
+        call_after_fork(self._after_fork)
+
+    def configure(
+        self, maxsize: int = DEFAULT_CACHE_SIZE, path: str | None = None
+    ) -> None:
+        """Change the settings of the cache.
+
+        The in-memory LRU is emptied and the statistics are reset. Entries in the
+        persistent tier are kept.
+
+        Parameters
+        ----------
+        maxsize : int, optional
+            Maximum number of parsed sentences kept in memory. If 0, nothing is kept
+            in memory.
+            Default is DEFAULT_CACHE_SIZE.
+        path : str | None, optional
+            Path of the SQLite database of the persistent tier.
+            Default is None, which only caches in memory.
+        """
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+            if path is not None:
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS parsed "
+                    "(key TEXT PRIMARY KEY, value TEXT)"
+                )
+                self._db.commit()
+
+            self.maxsize = maxsize
+            self.path = path
+            self.hits = 0
+            self.persistent_hits = 0
+            self.misses = 0
+            self._entries.clear()
+
+    def get(self, key: str) -> ParsedIngredient | None:
+        """Return the cached parsed sentence for a key.
+
+        Parameters
+        ----------
+        key : str
+            Cache key, see cache_key
+
+        Returns
+        -------
+        ParsedIngredient | None
+            Parsed sentence, or None if the key is not cached
+        """
+        with self._lock:
+            encoded = self._entries.get(key)
+            if encoded is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            elif self._db is not None:
+                row = self._db.execute(
+                    "SELECT value FROM parsed WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    encoded = json.loads(row[0])
+                    self._remember(key, encoded)
+                    self.persistent_hits += 1
+
+            if encoded is None:
+                self.misses += 1
+                return None
+
+        return decode_parsed(encoded)
+
+    def put(self, key: str, parsed: ParsedIngredient) -> None:
+        """Add a parsed sentence to the cache.
+
+        Parameters
+        ----------
+        key : str
+            Cache key, see cache_key
+        parsed : ParsedIngredient
+            Parsed sentence
+        """
+        self.put_many([(key, parsed)])
+
+    def put_many(self, entries: Iterable[tuple[str, ParsedIngredient]]) -> None:
+        """Add parsed sentences to the cache.
+
+        The entries are written to the persistent tier in a single transaction, so a
+        batch of sentences needs one commit instead of one per sentence.
+
+        Parameters
+        ----------
+        entries : Iterable[tuple[str, ParsedIngredient]]
+            Cache key (see cache_key) and parsed sentence of each entry
+        """
+        encoded = [(key, encode_parsed(parsed)) for key, parsed in entries]
+        if not encoded:
+            return
+
+        with self._lock:
+            for key, value in encoded:
+                self._remember(key, value)
+            if self._db is not None:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO parsed (key, value) VALUES (?, ?)",
+                    [
+                        (key, json.dumps(value, separators=(",", ":")))
+                        for key, value in encoded
+                    ],
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, encoded: list) -> None:
+        """Add an encoded parsed sentence to the in-memory LRU.
+
+        The least recently used entry is evicted if the LRU is full.
+
+        Parameters
+        ----------
+        key : str
+            Cache key
+        encoded : list
+            Encoded parsed sentence
+        """
+        self._entries[key] = encoded
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _after_fork(self) -> None:
+        """Make the cache usable in a forked child process.
+
+        The lock is replaced, in case another thread held it during the fork, and
+        the persistent tier gets a new connection. The inherited connection belongs
+        to the parent process and is left alone.
+        """
+        self._lock = threading.Lock()
+        if self.path is not None:
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+
+    def clear(self) -> None:
+        """Remove all entries from the in-memory LRU and the persistent tier."""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM parsed")
+                self._db.commit()
+
+    def info(self) -> dict[str, int | str | None]:
+        """Return the statistics of the cache.
+
+        Returns
+        -------
+        dict[str, int | str | None]
+            Number of hits from memory and from the persistent tier, number of
+            misses, maximum and current size of the in-memory LRU and the path of
+            the persistent tier.
+        """
+        return {
+            "hits": self.hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "maxsize": self.maxsize,
+            "currsize": len(self._entries),
+            "path": self.path,
+        }
+
+
+# Cache shared by parse_ingredient and parse_multiple_ingredients.
+# Use PARSE_CACHE.configure() to change its size or add the persistent tier.
+PARSE_CACHE = ParseCache()
@@ -5,12 +5,11 @@ import os
 import platform
 import re
 import subprocess
+import weakref
 from importlib.resources import as_file, files
 from itertools import groupby, islice
 from operator import itemgetter
-from typing import Generator, Iterator
-
-from nltk import data, download
+from typing import Callable, Generator, Iterator
 
 SUPPORTED_LANGUAGES = ["en"]
 
@@ -51,6 +50,36 @@ def consume(iterator: Iterator, n: int | None) -> None:
         next(islice(iterator, n, n), None)
 
 
+def call_after_fork(method: Callable[[], None]) -> None:
+    """Call a bound method in the child process after every fork.
+
+    This is used to make objects shared by the whole process safe to use after a
+    fork, e.g. when gunicorn forks workers from a master that has preloaded the
+    parser: locks are replaced, because a lock held by another thread at the time of
+    the fork is never released in the child, and connections that cannot be shared
+    between processes are reopened.
+
+    The object is only referenced weakly, so registering does not keep it alive.
+    Nothing is registered on platforms without os.register_at_fork.
+
+    Parameters
+    ----------
+    method : Callable[[], None]
+        Bound method to call in the child process
+    """
+    if not hasattr(os, "register_at_fork"):
+        return
+
+    ref = weakref.WeakMethod(method)
+
+    def after_in_child():
+        bound = ref()
+        if bound is not None:
+            bound()
+
+    os.register_at_fork(after_in_child=after_in_child)
+
+
 def group_consecutive_idx(idx: list[int]) -> Generator[Iterator[int], None, None]:
     """Yield groups of consecutive indices.
 
@@ -77,6 +106,129 @@ def group_consecutive_idx(idx: list[int]) -> Generator[Iterator[int], None, None
         yield map(itemgetter(1), g)
 
 
+class LabelPatternMatcher:
+    """Matcher that finds sequences of labels in a list of labels.
+
+    All patterns are compiled into a single Aho-Corasick automaton over labels, so
+    the occurrences of every pattern are found in one left to right scan of the
+    labels, instead of comparing each pattern at each position.
+
+    The matches of each pattern do not overlap each other: scanning from the left,
+    an occurrence is only a match if there is at least one label between it and the
+    previous match of the same pattern. Matches of different patterns may overlap.
+    This gives the same matches as searching for each pattern on its own.
+
+    Parameters
+    ----------
+    patterns : list[list[str]]
+        Patterns of labels to find.
+    ignore_other_labels : bool, optional
+        If True, labels not found in any of the patterns are ignored, meaning the
+        indices of a match may not be consecutive.
+        If False, the pattern must be found without any interruptions in the labels.
+        Default is True.
+
+    Examples
+    --------
+    >>> matcher = LabelPatternMatcher([["QTY", "UNIT"], ["QTY", "QTY", "UNIT"]])
+    >>> matcher.match(["QTY", "QTY", "NAME", "UNIT", "NAME"])
+    [[[1, 3]], [[0, 1, 3]]]
+    """
+
+    def __init__(self, patterns: list[list[str]], ignore_other_labels: bool = True):
+        self.patterns = [list(pattern) for pattern in patterns]
+        self.ignore_other_labels = ignore_other_labels
+        self.alphabet = frozenset(label for p in self.patterns for label in p)
+        self._lengths = [len(pattern) for pattern in self.patterns]
+        self._transitions, self._outputs = self._compile()
+
+    def _compile(self) -> tuple[list[dict[str, int]], list[tuple[int, ...]]]:
+        """Compile the patterns into the transitions and outputs of the automaton.
+
+        The transitions are complete for the labels in the patterns, so scanning
+        never needs to follow failure links. Any other label returns to the root
+        state.
+
+        Returns
+        -------
+        list[dict[str, int]]
+            Next state for each label, for each state
+        list[tuple[int, ...]]
+            Indices of the patterns that end in each state
+        """
+        # Build trie of patterns
+        goto: list[dict[str, int]] = [{}]
+        outputs: list[list[int]] = [[]]
+        for pattern_idx, pattern in enumerate(self.patterns):
+            state = 0
+            for label in pattern:
+                if label not in goto[state]:
+                    goto.append({})
+                    outputs.append([])
+                    goto[state][label] = len(goto) - 1
+                state = goto[state][label]
+            outputs[state].append(pattern_idx)
+
+        # Breadth first over the trie to set the failure link of each state, so the
+        # shallower states are complete before they are used by the deeper ones
+        fail = [0] * len(goto)
+        transitions: list[dict[str, int]] = [{} for _ in goto]
+        queue = collections.deque([0])
+        while queue:
+            state = queue.popleft()
+            for label in self.alphabet:
+                if label in goto[state]:
+                    next_state = goto[state][label]
+                    fail[next_state] = transitions[fail[state]][label] if state else 0
+                    outputs[next_state].extend(outputs[fail[next_state]])
+                    queue.append(next_state)
+                else:
+                    next_state = transitions[fail[state]].get(label, 0) if state else 0
+                transitions[state][label] = next_state
+
+        return transitions, [tuple(sorted(output)) for output in outputs]
+
+    def match(self, labels: list[str]) -> list[list[list[int]]]:
+        """Find the patterns in labels, returning the indices of the matching labels.
+
+        Parameters
+        ----------
+        labels : list[str]
+            List of labels to find the patterns in.
+
+        Returns
+        -------
+        list[list[list[int]]]
+            For each pattern, in the order given when creating the matcher, the list
+            of label index lists that match the pattern.
+        """
+        if self.ignore_other_labels:
+            idx = [i for i, label in enumerate(labels) if label in self.alphabet]
+            lbls = [labels[i] for i in idx]
+        else:
+            idx = range(len(labels))
+            lbls = labels
+
+        transitions = self._transitions
+        outputs = self._outputs
+        lengths = self._lengths
+        matches: list[list[list[int]]] = [[] for _ in self.patterns]
+        # First position a new match of each pattern can start at. The label
+        # following a match is skipped, as the pattern matching always has.
+        next_start = [0] * len(self.patterns)
+
+        state = 0
+        for end, label in enumerate(lbls, start=1):
+            state = transitions[state].get(label, 0)
+            for pattern_idx in outputs[state]:
+                start = end - lengths[pattern_idx]
+                if start >= next_start[pattern_idx]:
+                    matches[pattern_idx].append(list(idx[start:end]))
+                    next_start[pattern_idx] = end + 1
+
+        return matches
+
+
 def show_model_card(lang: str = "en") -> None:
     """Open model card for specified langauge in default application.
 
@@ -98,7 +250,13 @@ def show_model_card(lang: str = "en") -> None:
 
 
 def download_nltk_resources() -> None:
-    """Check if required nltk resources can be found and if not, download them."""
+    """Check if required nltk resources can be found and if not, download them.
+
+    nltk is imported here rather than at module level, because importing nltk is
+    slow and is not needed until the first sentence is parsed.
+    """
+    from nltk import data, download
+
     try:
         data.find(
             "taggers/averaged_perceptron_tagger/averaged_perceptron_tagger.pickle"
@@ -0,0 +1,21 @@
+from app.utils.ingredient_parser.benchmark.runner import (
+    DEFAULT_THRESHOLD,
+    STAGES,
+    compare_results,
+    format_results,
+    load_corpus,
+    read_results,
+    run_benchmark,
+    write_results,
+)
+
+__all__ = [
+    "DEFAULT_THRESHOLD",
+    "STAGES",
+    "compare_results",
+    "format_results",
+    "load_corpus",
+    "read_results",
+    "run_benchmark",
+    "write_results",
+]
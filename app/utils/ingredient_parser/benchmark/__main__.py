@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+import argparse
+import sys
+
+from app.utils.ingredient_parser.benchmark.runner import (
+    DEFAULT_THRESHOLD,
+    compare_results,
+    format_results,
+    read_results,
+    run_benchmark,
+    write_results,
+)
+
+
+def main() -> int:
+    """Run the parser benchmark from the command line.
+
+    Returns
+    -------
+    int
+        Exit code, 1 if a regression against the baseline was found, otherwise 0
+    """
+    parser = argparse.ArgumentParser(
+        description="Measure the throughput and per stage time of the parser."
+    )
+    parser.add_argument(
+        "--rounds",
+        type=int,
+        default=5,
+        help="Number of rounds per measurement, the fastest one is reported.",
+    )
+    parser.add_argument("--output", help="Path of JSON file to write the results to.")
+    parser.add_argument(
+        "--baseline", help="Path of JSON file with results to compare against."
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Allowed slow down relative to the baseline, as a fraction.",
+    )
+    args = parser.parse_args()
+
+    results = run_benchmark(rounds=args.rounds)
+    print(format_results(results))
+
+    if args.output:
+        write_results(results, args.output)
+
+    if args.baseline:
+        regressions = compare_results(
+            results, read_results(args.baseline), threshold=args.threshold
+        )
+        if regressions:
+            print(f"\nRegressions beyond {args.threshold:.0%} of the baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+
+        print(f"\nNo regressions beyond {args.threshold:.0%} of the baseline.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
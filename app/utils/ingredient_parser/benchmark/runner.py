@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+
+import json
+import platform
+import time
+from importlib.resources import files
+from typing import Any, Callable
+
+from app.utils.ingredient_parser import parse_ingredient, parse_multiple_ingredients
+from app.utils.ingredient_parser.en import PreProcessor
+from app.utils.ingredient_parser.en._tagger import TAGGERS
+from app.utils.ingredient_parser.en._utils import get_pos_tagger, tokenize
+from app.utils.ingredient_parser.en.parser import _postprocess, preload_en
+
+# File name of the corpus of ingredient sentences, relative to this package
+CORPUS_FILE = "corpus.txt"
+
+# Stages of parse_ingredient, in the order they are applied
+STAGES = ("normalise", "tokenize", "pos_tagging", "features", "crf", "postprocess")
+
+# Allowed slow down relative to the baseline before a measurement is a regression
+DEFAULT_THRESHOLD = 0.2
+
+# Minimum slow down of a stage in microseconds per sentence before it is a regression,
+# so timer noise in the fastest stages is not reported
+MIN_STAGE_REGRESSION_US = 5.0
+
+# Version of the format of the results, stored in the results
+RESULTS_VERSION = 1
+
+
+def load_corpus() -> list[str]:
+    """Load the benchmark corpus of ingredient sentences.
+
+    Returns
+    -------
+    list[str]
+        Ingredient sentences, one per non-empty line of the corpus
+    """
+    text = (files(__package__) / CORPUS_FILE).read_text(encoding="utf-8")
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+def _timed(func: Callable[[], Any]) -> tuple[Any, float]:
+    """Call a function and measure how long it takes.
+
+    Parameters
+    ----------
+    func : Callable[[], Any]
+        Function to call
+
+    Returns
+    -------
+    Any
+        Return value of the function
+    float
+        Duration in seconds
+    """
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def _time_stages(sentences: list[str], options: dict[str, bool]) -> dict[str, float]:
+    """Parse sentences one stage at a time and measure the duration of each stage.
+
+    Each stage is applied to all sentences before the next stage starts, so the
+    duration of a stage is measured over the whole corpus at once. The stages do the
+    same work as parse_ingredient_en.
+
+    Parameters
+    ----------
+    sentences : list[str]
+        Sentences to parse
+    options : dict[str, bool]
+        Keyword arguments for parse_ingredient_en
+
+    Returns
+    -------
+    dict[str, float]
+        Duration of each stage in seconds
+    """
+    durations = {}
+    scratch = PreProcessor("", defer_pos_tagging=True)
+
+    normalised, durations["normalise"] = _timed(
+        lambda: [scratch._normalise(sentence) for sentence in sentences]
+    )
+    _, durations["tokenize"] = _timed(
+        lambda: [scratch._singlarise_units(tokenize(s)) for s in normalised]
+    )
+
+    # Build the PreProcessor objects for the remaining stages outside the timings
+    processors = [PreProcessor(s, defer_pos_tagging=True) for s in sentences]
+    tagger = get_pos_tagger()
+
+    def tag_partofspeech():
+        for processor in processors:
+            processor.pos_tags = processor._pos_tags(
+                tagger.tag(processor.tokenized_sentence)
+            )
+            processor.defer_pos_tagging = False
+
+    _, durations["pos_tagging"] = _timed(tag_partofspeech)
+    features, durations["features"] = _timed(
+        lambda: [processor.sentence_attributes() for processor in processors]
+    )
+    tagged, durations["crf"] = _timed(lambda: [TAGGERS.tag(f) for f in features])
+    _, durations["postprocess"] = _timed(
+        lambda: [
+            _postprocess(sentence, processor, tagged_sentence, **options).parsed
+            for sentence, processor, tagged_sentence in zip(
+                sentences, processors, tagged
+            )
+        ]
+    )
+    return durations
+
+
+def run_benchmark(
+    sentences: list[str] | None = None,
+    rounds: int = 5,
+    discard_isolated_stop_words: bool = True,
+    expect_name_in_output: bool = True,
+    string_units: bool = False,
+    imperial_units: bool = False,
+) -> dict[str, Any]:
+    """Measure the throughput of the parser and the time spent in each stage.
+
+    The parse cache is bypassed, so every sentence is parsed in every round. The
+    fastest of the rounds is reported for every measurement. The parser resources
+    are loaded before the first round.
+
+    Parameters
+    ----------
+    sentences : list[str] | None, optional
+        Sentences to parse.
+        Default is None, which uses the benchmark corpus.
+    rounds : int, optional
+        Number of times each measurement is repeated.
+        Default is 5.
+    discard_isolated_stop_words : bool, optional
+        Option passed to parse_ingredient.
+        Default is True.
+    expect_name_in_output : bool, optional
+        Option passed to parse_ingredient.
+        Default is True.
+    string_units : bool, optional
+        Option passed to parse_ingredient.
+        Default is False.
+    imperial_units : bool, optional
+        Option passed to parse_ingredient.
+        Default is False.
+
+    Returns
+    -------
+    dict[str, Any]
+        Results, with the throughput of parse_ingredient and
+        parse_multiple_ingredients in sentences per second, and the time per sentence
+        of each stage in microseconds.
+    """
+    if sentences is None:
+        sentences = load_corpus()
+
+    options = {
+        "discard_isolated_stop_words": discard_isolated_stop_words,
+        "expect_name_in_output": expect_name_in_output,
+        "string_units": string_units,
+        "imperial_units": imperial_units,
+    }
+    preload_en()
+
+    single = min(
+        _timed(
+            lambda: [parse_ingredient(s, **options, use_cache=False) for s in sentences]
+        )[1]
+        for _ in range(rounds)
+    )
+    batch = min(
+        _timed(
+            lambda: parse_multiple_ingredients(sentences, **options, use_cache=False)
+        )[1]
+        for _ in range(rounds)
+    )
+
+    stage_rounds = [_time_stages(sentences, options) for _ in range(rounds)]
+    stages = {
+        stage: min(durations[stage] for durations in stage_rounds)
+        / len(sentences)
+        * 1e6
+        for stage in STAGES
+    }
+
+    return {
+        "version": RESULTS_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sentences": len(sentences),
+        "rounds": rounds,
+        "options": options,
+        "throughput": {
+            "parse_ingredient": len(sentences) / single,
+            "parse_multiple_ingredients": len(sentences) / batch,
+        },
+        "stages_us_per_sentence": stages,
+    }
+
+
+def compare_results(
+    results: dict[str, Any],
+    baseline: dict[str, Any],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> list[str]:
+    """Compare benchmark results to a baseline and list the regressions.
+
+    A throughput is a regression if it is lower than the baseline throughput divided
+    by (1 + threshold). A stage is a regression if its time per sentence is higher
+    than the baseline time multiplied by (1 + threshold), and at least
+    MIN_STAGE_REGRESSION_US higher than the baseline time.
+
+    Parameters
+    ----------
+    results : dict[str, Any]
+        Results from run_benchmark
+    baseline : dict[str, Any]
+        Earlier results from run_benchmark to compare with
+    threshold : float, optional
+        Allowed slow down, as a fraction of the baseline.
+        Default is DEFAULT_THRESHOLD.
+
+    Returns
+    -------
+    list[str]
+        Description of each regression, empty if there are none
+    """
+    regressions = []
+
+    for name, throughput in results["throughput"].items():
+        expected = baseline["throughput"].get(name)
+        if expected is not None and throughput < expected / (1 + threshold):
+            regressions.append(
+                f"{name}: {throughput:.1f} sentences/s, "
+                f"baseline {expected:.1f} sentences/s"
+            )
+
+    for stage, duration in results["stages_us_per_sentence"].items():
+        expected = baseline["stages_us_per_sentence"].get(stage)
+        if expected is None:
+            continue
+        if (
+            duration > expected * (1 + threshold)
+            and duration - expected >= MIN_STAGE_REGRESSION_US
+        ):
+            regressions.append(
+                f"{stage}: {duration:.1f} us/sentence, "
+                f"baseline {expected:.1f} us/sentence"
+            )
+
+    return regressions
+
+
+def format_results(results: dict[str, Any]) -> str:
+    """Format benchmark results as a human readable table.
+
+    Parameters
+    ----------
+    results : dict[str, Any]
+        Results from run_benchmark
+
+    Returns
+    -------
+    str
+        Formatted results
+    """
+    lines = [
+        f"Sentences: {results['sentences']} (fastest of {results['rounds']} rounds)",
+        "",
+        f"{'throughput':>28}  {'sentences/s':>12}",
+    ]
+    for name, throughput in results["throughput"].items():
+        lines.append(f"{name:>28}  {throughput:>12.1f}")
+
+    stages = results["stages_us_per_sentence"]
+    total = sum(stages.values())
+    lines.extend(["", f"{'stage':>28}  {'us/sentence':>12}  {'share':>6}"])
+    for stage, duration in stages.items():
+        lines.append(f"{stage:>28}  {duration:>12.1f}  {duration / total:>6.1%}")
+
+    return "\n".join(lines)
+
+
+def write_results(results: dict[str, Any], path: str) -> None:
+    """Write benchmark results to a JSON file.
+
+    Parameters
+    ----------
+    results : dict[str, Any]
+        Results from run_benchmark
+    path : str
+        Path of JSON file
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+
+def read_results(path: str) -> dict[str, Any]:
+    """Read benchmark results from a JSON file.
+
+    Parameters
+    ----------
+    path : str
+        Path of JSON file written by write_results
+
+    Returns
+    -------
+    dict[str, Any]
+        Results
+    """
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
@@ -1,6 +1,9 @@
 #!/usr/bin/env python3
 
 import operator
+import sys
+from array import array
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass, field
 from functools import reduce
 from statistics import mean
@@ -10,7 +13,7 @@ import pint
 import pycrfsuite
 
 
-@dataclass
+@dataclass(slots=True)
 class IngredientAmount:
     """Dataclass for holding a parsed ingredient amount.
 
@@ -62,7 +65,7 @@ class IngredientAmount:
     MULTIPLIER: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class CompositeIngredientAmount:
     """Dataclass for a composite ingredient amount.
 
@@ -152,10 +155,12 @@ class CompositeIngredientAmount:
         return reduce(op, (amount.quantity * amount.unit for amount in self.amounts))  # type: ignore
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class IngredientText:
     """Dataclass for holding a parsed ingredient string.
 
+    Objects are immutable, so the same object can be shared between parsed sentences.
+
     Attributes
     ----------
     text : str
@@ -170,7 +175,7 @@ class IngredientText:
     confidence: float
 
 
-@dataclass
+@dataclass(slots=True)
 class ParsedIngredient:
     """Dataclass for holding the parsed values for an input sentence.
 
@@ -207,6 +212,344 @@ class ParsedIngredient:
     sentence: str
 
 
+# Order of the IngredientAmount flags in the flags column of a ParsedBatch
+AMOUNT_FLAGS = ("APPROXIMATE", "SINGULAR", "RANGE", "MULTIPLIER")
+
+
+@dataclass(slots=True)
+class TextColumn:
+    """Column of optional IngredientText values, for holding a field of a ParsedBatch.
+
+    Attributes
+    ----------
+    text : list[str | None]
+        Text of each value, or None if there is no value.
+        The text is interned, so repeated values are only stored once.
+    confidence : array
+        Confidence of each value, or 0 if there is no value.
+    """
+
+    text: list[str | None] = field(default_factory=list)
+    confidence: array = field(default_factory=lambda: array("d"))
+
+    def append(self, value: IngredientText | None) -> None:
+        """Add a value to the end of the column.
+
+        Parameters
+        ----------
+        value : IngredientText | None
+            Value to add
+        """
+        if value is None:
+            self.text.append(None)
+            self.confidence.append(0.0)
+        else:
+            self.text.append(sys.intern(value.text))
+            self.confidence.append(value.confidence)
+
+    def __getitem__(self, index: int) -> IngredientText | None:
+        """Return the value at an index of the column.
+
+        Parameters
+        ----------
+        index : int
+            Index of value
+
+        Returns
+        -------
+        IngredientText | None
+        """
+        text = self.text[index]
+        if text is None:
+            return None
+        return IngredientText(text, self.confidence[index])
+
+
+@dataclass(slots=True, eq=False)
+class ParsedBatch:
+    """Columnar container for the parsed values of many input sentences.
+
+    Each field of ParsedIngredient is stored in a column, with one entry per
+    sentence, so bulk results do not need an object per parsed value. The amounts of
+    all sentences are stored in one set of amount columns, where the amounts of
+    sentence i are at indices amount_offsets[i] to amount_offsets[i + 1].
+    Indexing the batch returns the ParsedIngredient of a sentence.
+
+    Attributes
+    ----------
+    sentence : list[str]
+        Normalised input sentence of each parsed sentence.
+    name : TextColumn
+        Ingredient name of each parsed sentence.
+    size : TextColumn
+        Size modifier of each parsed sentence.
+    preparation : TextColumn
+        Ingredient preparation instructions of each parsed sentence.
+    comment : TextColumn
+        Ingredient comment of each parsed sentence.
+    purpose : TextColumn
+        Purpose of the ingredient of each parsed sentence.
+    amount_offsets : array
+        Index of the first amount of each sentence in the amount columns, followed by
+        the total number of amounts.
+    quantity : array
+        Quantity of each amount, or NaN if the quantity is a string.
+    quantity_max : array
+        Upper limit of the quantity of each amount, or NaN if it is a string.
+    string_quantities : dict[int, tuple[float | str, float | str]]
+        Quantity and upper limit of the amounts whose quantity is a string, by index.
+    unit : array
+        Index of the unit of each amount in units.
+    units : list[str | pint.Unit]
+        Distinct units of all amounts.
+    amount_text : list[str]
+        Text of each amount.
+    amount_confidence : array
+        Confidence of each amount.
+    starting_index : array
+        Index of the token that starts each amount.
+    flags : array
+        Flags of each amount, with bit i set if AMOUNT_FLAGS[i] is True.
+    composite : array
+        Index of the composite amount each amount is part of in composites, or -1 if
+        the amount is not part of a composite amount.
+    composites : list[tuple[str, bool]]
+        Join and subtractive attributes of each composite amount.
+    """
+
+    sentence: list[str] = field(default_factory=list)
+    name: TextColumn = field(default_factory=TextColumn)
+    size: TextColumn = field(default_factory=TextColumn)
+    preparation: TextColumn = field(default_factory=TextColumn)
+    comment: TextColumn = field(default_factory=TextColumn)
+    purpose: TextColumn = field(default_factory=TextColumn)
+    amount_offsets: array = field(default_factory=lambda: array("L", [0]))
+    quantity: array = field(default_factory=lambda: array("d"))
+    quantity_max: array = field(default_factory=lambda: array("d"))
+    string_quantities: dict[int, tuple[float | str, float | str]] = field(
+        default_factory=dict
+    )
+    unit: array = field(default_factory=lambda: array("L"))
+    units: list[str | pint.Unit] = field(default_factory=list)
+    amount_text: list[str] = field(default_factory=list)
+    amount_confidence: array = field(default_factory=lambda: array("d"))
+    starting_index: array = field(default_factory=lambda: array("L"))
+    flags: array = field(default_factory=lambda: array("B"))
+    composite: array = field(default_factory=lambda: array("l"))
+    composites: list[tuple[str, bool]] = field(default_factory=list)
+    _unit_index: dict[tuple[bool, str | tuple[tuple[str, int], ...]], int] = field(
+        default_factory=dict, init=False, repr=False
+    )
+
+    @classmethod
+    def from_parsed(cls, parsed: Iterable[ParsedIngredient]) -> "ParsedBatch":
+        """Create a batch from parsed sentences.
+
+        Parameters
+        ----------
+        parsed : Iterable[ParsedIngredient]
+            Parsed sentences
+
+        Returns
+        -------
+        ParsedBatch
+        """
+        batch = cls()
+        batch.extend(parsed)
+        return batch
+
+    def extend(self, parsed: Iterable[ParsedIngredient]) -> None:
+        """Add parsed sentences to the end of the batch.
+
+        Parameters
+        ----------
+        parsed : Iterable[ParsedIngredient]
+            Parsed sentences
+        """
+        for ingredient in parsed:
+            self.append(ingredient)
+
+    def append(self, parsed: ParsedIngredient) -> None:
+        """Add a parsed sentence to the end of the batch.
+
+        Parameters
+        ----------
+        parsed : ParsedIngredient
+            Parsed sentence
+        """
+        self.sentence.append(sys.intern(parsed.sentence))
+        self.name.append(parsed.name)
+        self.size.append(parsed.size)
+        self.preparation.append(parsed.preparation)
+        self.comment.append(parsed.comment)
+        self.purpose.append(parsed.purpose)
+
+        for amount in parsed.amount:
+            if isinstance(amount, CompositeIngredientAmount):
+                self.composites.append((amount.join, amount.subtractive))
+                for part in amount.amounts:
+                    self._append_amount(part, len(self.composites) - 1)
+            else:
+                self._append_amount(amount, -1)
+
+        self.amount_offsets.append(len(self.amount_text))
+
+    def _append_amount(self, amount: IngredientAmount, composite: int) -> None:
+        """Add an amount to the end of the amount columns.
+
+        Parameters
+        ----------
+        amount : IngredientAmount
+            Amount to add
+        composite : int
+            Index of the composite amount the amount is part of, or -1
+        """
+        if isinstance(amount.quantity, float) and isinstance(
+            amount.quantity_max, float
+        ):
+            self.quantity.append(amount.quantity)
+            self.quantity_max.append(amount.quantity_max)
+        else:
+            self.string_quantities[len(self.amount_text)] = (
+                amount.quantity,
+                amount.quantity_max,
+            )
+            self.quantity.append(float("nan"))
+            self.quantity_max.append(float("nan"))
+
+        # pint.Unit objects compare equal to their name, so the type is part of the key.
+        # Units are keyed on their ordered units and exponents, because compound units
+        # that only differ in the order of their parts compare equal, but print
+        # differently (e.g. gram * pound and pound * gram).
+        if isinstance(amount.unit, str):
+            key = (True, amount.unit)
+        else:
+            key = (False, tuple(amount.unit._units.items()))
+        unit_index = self._unit_index.get(key)
+        if unit_index is None:
+            unit_index = self._unit_index[key] = len(self.units)
+            self.units.append(amount.unit)
+        self.unit.append(unit_index)
+
+        self.amount_text.append(sys.intern(amount.text))
+        self.amount_confidence.append(amount.confidence)
+        self.starting_index.append(amount.starting_index)
+        self.flags.append(
+            sum(1 << i for i, flag in enumerate(AMOUNT_FLAGS) if getattr(amount, flag))
+        )
+        self.composite.append(composite)
+
+    def _amount(self, index: int) -> IngredientAmount:
+        """Return the IngredientAmount at an index of the amount columns.
+
+        Parameters
+        ----------
+        index : int
+            Index of amount
+
+        Returns
+        -------
+        IngredientAmount
+        """
+        if index in self.string_quantities:
+            quantity, quantity_max = self.string_quantities[index]
+        else:
+            quantity, quantity_max = self.quantity[index], self.quantity_max[index]
+
+        flags = self.flags[index]
+        return IngredientAmount(
+            quantity=quantity,
+            quantity_max=quantity_max,
+            unit=self.units[self.unit[index]],
+            text=self.amount_text[index],
+            confidence=self.amount_confidence[index],
+            starting_index=self.starting_index[index],
+            **{flag: bool(flags & (1 << i)) for i, flag in enumerate(AMOUNT_FLAGS)},
+        )
+
+    def amounts(self, index: int) -> list[IngredientAmount | CompositeIngredientAmount]:
+        """Return the amounts of a parsed sentence.
+
+        Parameters
+        ----------
+        index : int
+            Index of parsed sentence
+
+        Returns
+        -------
+        list[IngredientAmount | CompositeIngredientAmount]
+        """
+        amounts = []
+        start, end = self.amount_offsets[index], self.amount_offsets[index + 1]
+        i = start
+        while i < end:
+            composite = self.composite[i]
+            if composite == -1:
+                amounts.append(self._amount(i))
+                i += 1
+                continue
+
+            # Amounts that are part of the same composite amount are consecutive
+            j = i
+            while j < end and self.composite[j] == composite:
+                j += 1
+            join, subtractive = self.composites[composite]
+            amounts.append(
+                CompositeIngredientAmount(
+                    [self._amount(k) for k in range(i, j)], join, subtractive
+                )
+            )
+            i = j
+
+        return amounts
+
+    def __len__(self) -> int:
+        """Return the number of parsed sentences in the batch.
+
+        Returns
+        -------
+        int
+        """
+        return len(self.sentence)
+
+    def __getitem__(self, index: int) -> ParsedIngredient:
+        """Return a parsed sentence of the batch.
+
+        Parameters
+        ----------
+        index : int
+            Index of parsed sentence
+
+        Returns
+        -------
+        ParsedIngredient
+        """
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ParsedBatch index out of range")
+
+        return ParsedIngredient(
+            name=self.name[index],
+            size=self.size[index],
+            amount=self.amounts(index),
+            preparation=self.preparation[index],
+            comment=self.comment[index],
+            purpose=self.purpose[index],
+            sentence=self.sentence[index],
+        )
+
+    def __iter__(self) -> Iterator[ParsedIngredient]:
+        """Iterate over the parsed sentences of the batch.
+
+        Yields
+        ------
+        ParsedIngredient
+        """
+        for index in range(len(self)):
+            yield self[index]
+
+
 @dataclass
 class ParserDebugInfo:
     """Dataclass for holding intermediate objects generated during parsing.
@@ -1,10 +1,21 @@
-from app.utils.ingredient_parser.en.parser import inspect_parser_en, parse_ingredient_en
+from app.utils.ingredient_parser.en._utils import STEM_CACHE, TOKENIZER
+from app.utils.ingredient_parser.en.parser import (
+    inspect_parser_en,
+    parse_ingredient_en,
+    parse_multiple_ingredients_en,
+    preload_en,
+)
 from app.utils.ingredient_parser.en.postprocess import PostProcessor
-from app.utils.ingredient_parser.en.preprocess import PreProcessor
+from app.utils.ingredient_parser.en.preprocess import PreProcessor, preprocess_sentences
 
 __all__ = [
+    "STEM_CACHE",
+    "TOKENIZER",
     "inspect_parser_en",
     "parse_ingredient_en",
+    "parse_multiple_ingredients_en",
+    "preload_en",
     "PreProcessor",
+    "preprocess_sentences",
     "PostProcessor",
 ]
@@ -113,6 +113,8 @@ UNITS = UNITS | _capitalized_units
 # Create a flattened list of all keys and values in UNITS dict
 # since we need this in a few places
 FLATTENED_UNITS_LIST = list(chain.from_iterable(UNITS.items()))
+# Set of the singular units, for checking if a token is a unit without scanning UNITS
+SINGULAR_UNITS = set(UNITS.values())
 
 # Words that can modify a unit
 UNIT_MODIFIERS = [
@@ -182,6 +184,14 @@ for s, n in STRING_NUMBERS.items():
     # the start of the sentence
     STRING_NUMBERS_REGEXES[s] = (re.compile(rf"\b({s})\b", flags=re.IGNORECASE), n)
 
+# Regular expression matching any of the string numbers, used to find which of the
+# STRING_NUMBERS_REGEXES need to be applied to a sentence in a single scan.
+# "one-half" is left out because it is always found through "one".
+STRING_NUMBERS_PATTERN = re.compile(
+    rf"\b({'|'.join(s for s in STRING_NUMBERS if s != 'one-half')})\b",
+    flags=re.IGNORECASE,
+)
+
 # Unicode fractions and their replacements as fake fractions
 # Most of the time we need to insert a space in front of the replacement so we don't
 # merge the replacement with the previous token i.e. 1½ != 11/2
@@ -219,6 +229,10 @@ UNICODE_FRACTIONS = {
     "\u2154": " 2/3",
     "\xbd": " 1/2",
 }
+# Regular expression matching any of the unicode fractions, so they can all be
+# replaced in a single scan. The keys with a hyphen come first in UNICODE_FRACTIONS,
+# so they take precedence over the bare fractions.
+UNICODE_FRACTIONS_PATTERN = re.compile("|".join(map(re.escape, UNICODE_FRACTIONS)))
 
 # Stop words - high frequency grammatical words
 # Taken from nltk.corpus.stopwords
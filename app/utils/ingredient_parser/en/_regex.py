@@ -9,6 +9,16 @@ from app.utils.ingredient_parser.en._constants import FLATTENED_UNITS_LIST
 # a forward slash then another number.
 FRACTION_PARTS_PATTERN = re.compile(r"(\d*\s*\d/\d+)")
 
+# Regex pattern for the common forms of numeric tokens e.g. 1, 0.5, .5, 2x, 1-2, 1.5-2x.
+# Any token this matches is numeric; tokens it does not match still need the full
+# check in is_numeric_token.
+NUMERIC_TOKEN_PATTERN = re.compile(
+    r"(?:[0-9]+\.?[0-9]*|\.[0-9]+)x?(?:-(?:[0-9]+\.?[0-9]*|\.[0-9]+)x?)*"
+)
+
+# Regex pattern for checking if a sentence contains a digit.
+DIGIT_PATTERN = re.compile(r"\d")
+
 # Regex pattern for checking if token starts with a capital letter.
 CAPITALISED_PATTERN = re.compile(r"^[A-Z]")
 
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+
+import threading
+from array import array
+from dataclasses import dataclass
+from importlib.resources import as_file, files
+
+import pycrfsuite
+
+from app.utils.ingredient_parser._common import call_after_fork
+
+# File name of the CRF model, relative to this package
+MODEL_FILE = "model.en.crfsuite"
+
+
+@dataclass(slots=True)
+class TaggedSentence:
+    """Dataclass for holding the output of the CRF model for a sentence.
+
+    Attributes
+    ----------
+    labels : list[str]
+        Most likely label for each token.
+    scores : list[float]
+        Marginal probability of the label of each token.
+    marginals : array
+        Marginal probability of the labels in columns for every token, as a
+        tokens x columns matrix of floats in row-major order.
+    columns : tuple[str, ...]
+        Labels in the columns of marginals. This is every label of the model if the
+        full matrix was read, otherwise only the labels needed to parse the
+        sentence: NAME if no token was labelled NAME, for guessing the name of the
+        ingredient.
+    """
+
+    labels: list[str]
+    scores: list[float]
+    marginals: array
+    columns: tuple[str, ...]
+
+    def marginal(self, label: str, index: int) -> float:
+        """Return the marginal probability of a label for a token.
+
+        Parameters
+        ----------
+        label : str
+            Label of the model
+        index : int
+            Index of the token
+
+        Returns
+        -------
+        float
+            Marginal probability of the label for the token
+
+        Raises
+        ------
+        ValueError
+            If the marginal probabilities of the label were not read
+        """
+        return self.marginals[index * len(self.columns) + self._column(label)]
+
+    def label_scores(self, label: str) -> list[float]:
+        """Return the marginal probability of a label for each token.
+
+        Parameters
+        ----------
+        label : str
+            Label of the model
+
+        Returns
+        -------
+        list[float]
+            Marginal probability of the label for each token
+
+        Raises
+        ------
+        ValueError
+            If the marginal probabilities of the label were not read
+        """
+        return self.marginals[self._column(label) :: len(self.columns)].tolist()
+
+    def _column(self, label: str) -> int:
+        """Return the column of marginals of a label.
+
+        Parameters
+        ----------
+        label : str
+            Label of the model
+
+        Returns
+        -------
+        int
+            Index of the column
+
+        Raises
+        ------
+        ValueError
+            If the marginal probabilities of the label were not read
+        """
+        try:
+            return self.columns.index(label)
+        except ValueError:
+            raise ValueError(
+                f"Marginal probabilities of {label} were not read, "
+                "tag the sentence with full_marginals=True."
+            ) from None
+
+
+class TaggerPool:
+    """Pool of CRF model taggers, with one pycrfsuite.Tagger per thread.
+
+    A pycrfsuite.Tagger keeps the state of the last tagged sequence, which is used to
+    calculate the marginal probabilities, so a single Tagger cannot be shared between
+    threads. Each thread gets its own Tagger, which opens the model once, the first
+    time the thread tags a sentence.
+
+    A Tagger opened before the process forks is inherited by the thread that forked,
+    so a gunicorn master that preloads the model shares its memory copy-on-write
+    with the workers, instead of every worker opening the model again.
+
+    Parameters
+    ----------
+    model : str, optional
+        File name of the CRF model, relative to this package.
+        Default is MODEL_FILE.
+
+    Attributes
+    ----------
+    model : str
+        File name of the CRF model, relative to this package.
+    opened : int
+        Number of taggers opened so far, i.e. the number of threads that have
+        tagged a sentence.
+    model_labels : tuple[str, ...] | None
+        Labels of the model, set when the first tagger is opened.
+    """
+
+    def __init__(self, model: str = MODEL_FILE):
+        self.model = model
+        self.opened = 0
+        self.model_labels: tuple[str, ...] | None = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        call_after_fork(self._after_fork)
+
+    def get(self) -> pycrfsuite.Tagger:
+        """Return the tagger of the current thread, opening the model if needed.
+
+        Returns
+        -------
+        pycrfsuite.Tagger
+            Tagger with the model loaded
+        """
+        tagger = getattr(self._local, "tagger", None)
+        if tagger is None:
+            tagger = pycrfsuite.Tagger()
+            with as_file(files(__package__) / self.model) as p:
+                tagger.open(str(p))
+
+            self._local.tagger = tagger
+            with self._lock:
+                self.opened += 1
+                if self.model_labels is None:
+                    self.model_labels = tuple(tagger.labels())
+
+        return tagger
+
+    def _after_fork(self) -> None:
+        """Replace the lock in a forked child, in case it was held during the fork."""
+        self._lock = threading.Lock()
+
+    def tag(
+        self,
+        features: list[dict[str, str | bool]] | list[list[str]],
+        full_marginals: bool = False,
+    ) -> TaggedSentence:
+        """Tag the tokens of a sentence.
+
+        Parameters
+        ----------
+        features : list[dict[str, str | bool]] | list[list[str]]
+            Features of each token in the sentence, from
+            PreProcessor.sentence_attributes or PreProcessor.sentence_features
+        full_marginals : bool, optional
+            If True, read the marginal probability of every label of the model for
+            every token, see TaggerPool.marginals.
+            Default is False.
+
+        Returns
+        -------
+        TaggedSentence
+            Labels and marginal probabilities of the tokens
+        """
+        return self._tag(self.get(), features, full_marginals)
+
+    def tag_many(
+        self,
+        sentences: list[list[dict[str, str | bool]] | list[list[str]]],
+        full_marginals: bool = False,
+    ) -> list[TaggedSentence]:
+        """Tag the tokens of multiple sentences.
+
+        All sentences are tagged with the tagger of the current thread, which is only
+        looked up once.
+
+        Parameters
+        ----------
+        sentences : list[list[dict[str, str | bool]] | list[list[str]]]
+            Features of each token, for each sentence
+        full_marginals : bool, optional
+            If True, read the marginal probability of every label of the model for
+            every token, see TaggerPool.marginals.
+            Default is False.
+
+        Returns
+        -------
+        list[TaggedSentence]
+            Labels and marginal probabilities of the tokens, for each sentence
+        """
+        tagger = self.get()
+        return [self._tag(tagger, features, full_marginals) for features in sentences]
+
+    def _tag(
+        self,
+        tagger: pycrfsuite.Tagger,
+        features: list[dict[str, str | bool]] | list[list[str]],
+        full_marginals: bool = False,
+    ) -> TaggedSentence:
+        """Tag the tokens of a sentence with the given tagger.
+
+        The marginal probabilities are read from the tagger straight after tagging,
+        because the tagger only keeps the state of the last tagged sentence.
+
+        Parameters
+        ----------
+        tagger : pycrfsuite.Tagger
+            Tagger with the model loaded
+        features : list[dict[str, str | bool]] | list[list[str]]
+            Features of each token in the sentence
+        full_marginals : bool, optional
+            If True, read the marginal probability of every label of the model for
+            every token.
+            Default is False.
+
+        Returns
+        -------
+        TaggedSentence
+            Labels and marginal probabilities of the tokens
+        """
+        return self.marginals(tagger, tagger.tag(features), full_marginals)
+
+    def marginals(
+        self,
+        tagger: pycrfsuite.Tagger,
+        labels: list[str],
+        full_marginals: bool = False,
+    ) -> TaggedSentence:
+        """Read the marginal probabilities of the labels of the last tagged sentence.
+
+        This must be called straight after the tagger tagged the sentence, because
+        the tagger only keeps the state of the last tagged sentence.
+
+        All marginal probabilities that are needed later are read in one pass into
+        TaggedSentence.marginals, so nothing needs to be read from the tagger again,
+        e.g. to guess the name of the ingredient. pycrfsuite only returns one marginal
+        probability per call, so by default only the columns needed to parse the
+        sentence are read. The full matrix takes a call for every label of the model
+        for every token.
+
+        Parameters
+        ----------
+        tagger : pycrfsuite.Tagger
+            Tagger that tagged the sentence
+        labels : list[str]
+            Labels returned by the tagger
+        full_marginals : bool, optional
+            If True, read the marginal probability of every label of the model for
+            every token, and take the scores from this matrix.
+            Default is False.
+
+        Returns
+        -------
+        TaggedSentence
+            Labels and marginal probabilities of the tokens
+        """
+        marginal = tagger.marginal
+        positions = range(len(labels))
+
+        if full_marginals:
+            columns = self.model_labels
+            marginals = array(
+                "d", [marginal(label, i) for i in positions for label in columns]
+            )
+            width = len(columns)
+            offsets = {label: column for column, label in enumerate(columns)}
+            scores = [
+                marginals[i * width + offsets[label]] for i, label in enumerate(labels)
+            ]
+            return TaggedSentence(labels, scores, marginals, columns)
+
+        scores = [marginal(label, i) for i, label in enumerate(labels)]
+
+        if "NAME" in labels:
+            return TaggedSentence(labels, scores, array("d"), ())
+
+        marginals = array("d", [marginal("NAME", i) for i in positions])
+        return TaggedSentence(labels, scores, marginals, ("NAME",))
+
+
+# Taggers shared between function calls. The model is only loaded when a thread
+# first needs it (from parse_ingredient() or inspect_parser()) and not whenever
+# anything from ingredient_parser is imported.
+TAGGERS = TaggerPool()
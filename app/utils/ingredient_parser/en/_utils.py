@@ -1,17 +1,28 @@
 #!/usr/bin/env python3
 
+import json
 import re
-from functools import lru_cache
+from functools import cache, lru_cache
+from importlib.resources import files
 from itertools import chain
+from typing import TYPE_CHECKING
 
 import pint
-from nltk.stem.porter import PorterStemmer
 
-from app.utils.ingredient_parser._common import is_float, is_range
+from app.utils.ingredient_parser._common import download_nltk_resources, is_float, is_range
 from app.utils.ingredient_parser.dataclasses import IngredientAmount
-from app.utils.ingredient_parser.en._constants import UNITS
-
-UREG = pint.UnitRegistry()
+from app.utils.ingredient_parser.en._constants import (
+    APPROXIMATE_TOKENS,
+    SINGULAR_TOKENS,
+    STOP_WORDS,
+    STRING_NUMBERS,
+    UNITS,
+)
+from app.utils.ingredient_parser.en._tagger import TAGGERS
+
+if TYPE_CHECKING:
+    from nltk.stem.porter import PorterStemmer
+    from nltk.tag.perceptron import PerceptronTagger
 
 # Dict mapping certain units to their imperial version in pint
 IMPERIAL_UNITS = {
@@ -56,8 +67,68 @@ UNIT_REPLACEMENTS = [
     (re.compile(r"\b(Tb)\b"), "tablespoon"),
 ]
 
+# Maximum number of (unit, imperial_units) pairs kept in the pint unit cache.
+# This is large enough to hold every entry in UNITS, for both US customary and
+# imperial units, with plenty of room for other units found in sentences.
+PINT_UNIT_CACHE_SIZE = 2048
+
+# File name of the precomputed stems of the model vocabulary, relative to this package.
+# See build_stem_table.
+STEMS_FILE = "stems.en.json"
+
+# Default maximum number of stems of tokens outside the model vocabulary kept in memory
+STEM_CACHE_SIZE = 4096
+
+
+@cache
+def get_unit_registry() -> pint.UnitRegistry:
+    """Return the pint Unit Registry, creating it on first use.
+
+    Creating the Unit Registry takes a significant amount of time, so it is deferred
+    until it is needed instead of happening whenever ingredient_parser is imported.
+
+    The Unit Registry is also set as pint's application registry, because pint.Unit
+    objects are unpickled into the application registry. This keeps units returned
+    by worker processes compatible with units created in this process.
+
+    Returns
+    -------
+    pint.UnitRegistry
+    """
+    ureg = pint.UnitRegistry()
+    pint.set_application_registry(ureg)
+    return ureg
+
+
+@cache
+def get_stemmer() -> "PorterStemmer":
+    """Return the PorterStemmer, creating it on first use.
+
+    Returns
+    -------
+    PorterStemmer
+    """
+    from nltk.stem.porter import PorterStemmer
 
-STEMMER = PorterStemmer()
+    return PorterStemmer()
+
+
+@cache
+def get_pos_tagger() -> "PerceptronTagger":
+    """Return the nltk part of speech tagger, loading it on first use.
+
+    The required nltk resources are downloaded first if they cannot be found.
+    The tagger is loaded once and reused, instead of being loaded again for every
+    sentence.
+
+    Returns
+    -------
+    PerceptronTagger
+    """
+    download_nltk_resources()
+    from nltk.tag.perceptron import PerceptronTagger
+
+    return PerceptronTagger()
 
 # Define regular expressions used by tokenizer.
 # Matches one or more whitespace characters
@@ -69,6 +140,34 @@ PUNCTUATION_TOKENISER = re.compile(r"([\(\)\[\]\{\}\,/:;])")
 # is preceded by a a full stop then a word character.
 FULL_STOP_TOKENISER = re.compile(r"(?<!\.\w)(\.)$")
 
+# Matches each token of the three tokenisers above in a single pass. A "piece" is a
+# run of characters that are neither whitespace nor punctuation. The alternatives, in
+# order, match:
+#   a piece that does not end in a full stop (the most common token)
+#   a punctuation mark
+#   a piece ending in a full stop, a word character and a full stop e.g. "e.g.",
+#   which keeps its full stop
+#   a piece ending in a full stop, without the full stop
+#   the full stop at the end of a piece
+# The pattern uses the standard library re module, like the other patterns in this
+# module, because it only needs fixed width lookarounds. The regex package pinned in
+# requirements.txt is not needed here.
+_PIECE = r"[^\s\(\)\[\]\{\}\,/:;]"
+_PIECE_END = r"[^\s\(\)\[\]\{\}\,/:;\.]"
+TOKEN_PATTERN = re.compile(
+    rf"""
+    {_PIECE}*{_PIECE_END}(?!{_PIECE})
+    |[\(\)\[\]\{{\}}\,/:;]
+    |{_PIECE}*\.\w\.(?!{_PIECE})
+    |{_PIECE}+?(?=\.(?!{_PIECE}))
+    |\.
+    """,
+    re.VERBOSE,
+)
+
+# Name of the tokenizer used by tokenize unless configured otherwise, see TOKENIZERS
+DEFAULT_TOKENIZER = "single_pass"
+
 
 def tokenize(sentence: str) -> list[str]:
     """Tokenise an ingredient sentence.
@@ -80,6 +179,9 @@ def tokenize(sentence: str) -> list[str]:
 
     The returned list of tokens has any empty tokens removed.
 
+    The tokenizer that does this is selected with TOKENIZER.configure(), see
+    TOKENIZERS.
+
     Parameters
     ----------
     sentence : str
@@ -104,6 +206,42 @@ def tokenize(sentence: str) -> list[str]:
     >>> tokenize("Freshly grated Parmesan cheese, for garnish.")
     ["Freshly", "grated", "Parmesan", "cheese", ",", "for", "garnish", "."]
     """
+    return TOKENIZER.tokenize(sentence)
+
+
+def tokenize_single_pass(sentence: str) -> list[str]:
+    """Tokenise an ingredient sentence in a single pass with TOKEN_PATTERN.
+
+    Parameters
+    ----------
+    sentence : str
+        Ingredient sentence to tokenize
+
+    Returns
+    -------
+    list[str]
+        List of tokens from sentence, the same as tokenize_multipass.
+    """
+    return TOKEN_PATTERN.findall(sentence)
+
+
+def tokenize_multipass(sentence: str) -> list[str]:
+    """Tokenise an ingredient sentence in three passes.
+
+    The sentence is split on whitespace with WHITESPACE_TOKENISER, then each token is
+    split on punctuation with PUNCTUATION_TOKENISER and has its final full stop split
+    off with FULL_STOP_TOKENISER. This is the reference for tokenize_single_pass.
+
+    Parameters
+    ----------
+    sentence : str
+        Ingredient sentence to tokenize
+
+    Returns
+    -------
+    list[str]
+        List of tokens from sentence.
+    """
     tokens = [
         PUNCTUATION_TOKENISER.split(tok)
         for tok in WHITESPACE_TOKENISER.findall(sentence)
@@ -116,13 +254,178 @@ def tokenize(sentence: str) -> list[str]:
     return [tok for tok in chain.from_iterable(tokens) if tok]
 
 
-@lru_cache(maxsize=512)
-def stem(token: str) -> str:
-    """Stem function with cache to improve performance.
+# Tokenizers that can be selected with TOKENIZER.configure(). They return the same
+# tokens for every sentence.
+TOKENIZERS = {
+    "single_pass": tokenize_single_pass,
+    "multipass": tokenize_multipass,
+}
+
 
-    The stem of a word output by the PorterStemmer is always the same, so we can
-    cache the result the first time and return that for subsequent future calls
-    without the need to do all the processing again.
+class Tokenizer:
+    """Selection of the tokenizer used by tokenize.
+
+    Parameters
+    ----------
+    name : str, optional
+        Name of the tokenizer in TOKENIZERS.
+        Default is DEFAULT_TOKENIZER.
+
+    Attributes
+    ----------
+    name : str
+        Name of the selected tokenizer.
+    tokenize : Callable[[str], list[str]]
+        The selected tokenizer.
+    """
+
+    def __init__(self, name: str = DEFAULT_TOKENIZER):
+        self.configure(name=name)
+
+    def configure(self, name: str = DEFAULT_TOKENIZER) -> None:
+        """Select the tokenizer.
+
+        Parameters
+        ----------
+        name : str, optional
+            Name of the tokenizer in TOKENIZERS.
+            Default is DEFAULT_TOKENIZER.
+
+        Raises
+        ------
+        ValueError
+            If there is no tokenizer with this name.
+        """
+        if name not in TOKENIZERS:
+            raise ValueError(
+                f"Unknown tokenizer '{name}', expected one of: {', '.join(TOKENIZERS)}"
+            )
+
+        self.name = name
+        self.tokenize = TOKENIZERS[name]
+
+
+# Tokenizer used by tokenize.
+# Use TOKENIZER.configure() to select another one.
+TOKENIZER = Tokenizer()
+
+
+class StemCache:
+    """Cache of the stems output by the PorterStemmer.
+
+    The stem of a word output by the PorterStemmer is always the same, so stems are
+    looked up instead of calculated wherever possible. The stems of the model
+    vocabulary are precomputed and shipped with the model (see STEMS_FILE), so they
+    never need the PorterStemmer. Stems of other tokens are kept in a size-bounded
+    LRU once they have been calculated.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        Maximum number of stems of tokens outside the model vocabulary kept in
+        memory.
+        Default is STEM_CACHE_SIZE.
+
+    Attributes
+    ----------
+    maxsize : int
+        Maximum number of stems of tokens outside the model vocabulary kept in
+        memory.
+    precomputed_hits : int
+        Number of lookups served from the precomputed stems. This is not locked, so
+        it may miss a few lookups made by several threads at the same time.
+    """
+
+    def __init__(self, maxsize: int = STEM_CACHE_SIZE):
+        self._precomputed: dict[str, str] | None = None
+        self.configure(maxsize=maxsize)
+
+    def configure(self, maxsize: int = STEM_CACHE_SIZE) -> None:
+        """Change the size of the LRU.
+
+        The LRU is emptied and the statistics are reset. The precomputed stems are
+        kept.
+
+        Parameters
+        ----------
+        maxsize : int, optional
+            Maximum number of stems of tokens outside the model vocabulary kept in
+            memory. If 0, only the precomputed stems are cached.
+            Default is STEM_CACHE_SIZE.
+        """
+        self.maxsize = maxsize
+        self.precomputed_hits = 0
+        self._runtime = lru_cache(maxsize=maxsize)(_porter_stem)
+
+    def load(self) -> dict[str, str]:
+        """Return the precomputed stems, loading them on first use.
+
+        Returns
+        -------
+        dict[str, str]
+            Stem of each token of the model vocabulary
+        """
+        if self._precomputed is None:
+            text = (files(__package__) / STEMS_FILE).read_text(encoding="utf-8")
+            self._precomputed = json.loads(text)
+
+        return self._precomputed
+
+    def stem(self, token: str) -> str:
+        """Return the stem of a token.
+
+        Parameters
+        ----------
+        token : str
+            Token to stem
+
+        Returns
+        -------
+        str
+            Stem of token
+        """
+        precomputed = self._precomputed
+        if precomputed is None:
+            precomputed = self.load()
+
+        token_stem = precomputed.get(token)
+        if token_stem is None:
+            return self._runtime(token)
+
+        self.precomputed_hits += 1
+        return token_stem
+
+    def info(self) -> dict[str, int | float]:
+        """Return the statistics of the cache.
+
+        Returns
+        -------
+        dict[str, int | float]
+            Number of hits from the precomputed stems and from the LRU, number of
+            misses, the fraction of lookups that were hits, maximum and current size
+            of the LRU and the number of precomputed stems.
+
+        Examples
+        --------
+        >>> STEM_CACHE.info()
+        {'precomputed_hits': 1116, 'hits': 1, 'misses': 17, 'hit_rate': 0.985...,
+        'maxsize': 4096, 'currsize': 17, 'precomputed': 4152}
+        """
+        runtime = self._runtime.cache_info()
+        lookups = self.precomputed_hits + runtime.hits + runtime.misses
+        return {
+            "precomputed_hits": self.precomputed_hits,
+            "hits": runtime.hits,
+            "misses": runtime.misses,
+            "hit_rate": (lookups - runtime.misses) / lookups if lookups else 0.0,
+            "maxsize": self.maxsize,
+            "currsize": runtime.currsize,
+            "precomputed": len(self._precomputed or {}),
+        }
+
+
+def _porter_stem(token: str) -> str:
+    """Return the stem of a token calculated by the PorterStemmer.
 
     Parameters
     ----------
@@ -134,7 +437,56 @@ def stem(token: str) -> str:
     str
         Stem of token
     """
-    return STEMMER.stem(token)
+    return get_stemmer().stem(token)
+
+
+# Cache of stems shared by all PreProcessor objects.
+# Use STEM_CACHE.configure() to change the size of its LRU.
+STEM_CACHE = StemCache()
+
+
+def stem(token: str) -> str:
+    """Return the stem of a token, using STEM_CACHE to improve performance.
+
+    Parameters
+    ----------
+    token : str
+        Token to stem
+
+    Returns
+    -------
+    str
+        Stem of token
+    """
+    return STEM_CACHE.stem(token)
+
+
+def build_stem_table() -> dict[str, str]:
+    """Calculate the stems of the model vocabulary.
+
+    The vocabulary is every token the model has seen, taken from the token and stem
+    features of the model, plus the units, stop words, string numbers and the
+    approximate and singular tokens. The result is what is stored in STEMS_FILE. It
+    must be rebuilt whenever the model is retrained:
+
+    >>> with open("stems.en.json", "w", encoding="utf-8") as f:
+    ...     json.dump(build_stem_table(), f, indent=0, sort_keys=True)
+
+    Returns
+    -------
+    dict[str, str]
+        Stem of each token of the vocabulary
+    """
+    vocabulary = set(chain(UNITS.keys(), UNITS.values(), STOP_WORDS))
+    vocabulary.update(STRING_NUMBERS.keys(), APPROXIMATE_TOKENS, SINGULAR_TOKENS)
+
+    for attribute, _ in TAGGERS.get().info().state_features:
+        name, _, value = attribute.partition(":")
+        if name in ("token", "stem") and value:
+            vocabulary.add(value)
+
+    stemmer = get_stemmer()
+    return {token: stemmer.stem(token) for token in sorted(vocabulary)}
 
 
 def pluralise_units(sentence: str) -> str:
@@ -175,6 +527,9 @@ def convert_to_pint_unit(unit: str, imperial_units: bool = False) -> str | pint.
 
     If the unit is not found in the pint Unit Registry, just return the input unit.
 
+    The result is cached for each (unit, imperial_units) pair, so pint only has to
+    parse each distinct unit once. See pint_unit_cache_info for the cache statistics.
+
     Parameters
     ----------
     unit : str
@@ -202,6 +557,26 @@ def convert_to_pint_unit(unit: str, imperial_units: bool = False) -> str | pint.
     >>> convert_to_pint_unit("cup", imperial_units=True)
     <Unit('imperial_cup')>
     """
+    # Always call the cached function with positional arguments, so that calls with
+    # and without the imperial_units keyword share the same cache entry
+    return _convert_to_pint_unit(unit, bool(imperial_units))
+
+
+@lru_cache(maxsize=PINT_UNIT_CACHE_SIZE)
+def _convert_to_pint_unit(unit: str, imperial_units: bool) -> str | pint.Unit:
+    """Cached implementation of convert_to_pint_unit.
+
+    Parameters
+    ----------
+    unit : str
+        Unit to find in pint Unit Registry
+    imperial_units : bool
+        If True, use imperial units instead of US customary units.
+
+    Returns
+    -------
+    str | pint.Unit
+    """
     if "-" in unit:
         # When checking if a unit is in the unit registry, pint will parse any
         # '-' as a subtraction and attempt to evaluate it, causing an exception.
@@ -224,12 +599,43 @@ def convert_to_pint_unit(unit: str, imperial_units: bool = False) -> str | pint.
 
     # If unit not empty string and found in Unit Registry,
     # return pint.Unit object for unit
-    if unit != "" and unit in UREG:
-        return UREG(unit).units
+    ureg = get_unit_registry()
+    if unit != "" and unit in ureg:
+        return ureg(unit).units
 
     return unit
 
 
+def pint_unit_cache_info() -> dict[str, int]:
+    """Return the statistics of the pint unit cache used by convert_to_pint_unit.
+
+    Returns
+    -------
+    dict[str, int]
+        Number of cache hits and misses, the maximum size of the cache and the
+        number of units currently in the cache.
+
+    Examples
+    --------
+    >>> pint_unit_cache_info()
+    {'hits': 0, 'misses': 744, 'maxsize': 2048, 'currsize': 744}
+    """
+    return _convert_to_pint_unit.cache_info()._asdict()
+
+
+@cache
+def warm_pint_unit_cache() -> None:
+    """Pre-populate the pint unit cache with every unit in UNITS.
+
+    Both the plural and singular form of each unit are converted, for US customary
+    as well as imperial units, so that parsing sentences rarely needs to call pint.
+    This only does any work the first time it is called.
+    """
+    for unit in set(UNITS.keys()) | set(UNITS.values()):
+        for imperial_units in (False, True):
+            _convert_to_pint_unit(unit, imperial_units)
+
+
 def ingredient_amount_factory(
     quantity: str,
     unit: str,
@@ -1,34 +1,52 @@
 #!/usr/bin/env python3
 
-from importlib.resources import as_file, files
-
-import pycrfsuite
+import time
 
 from app.utils.ingredient_parser._common import group_consecutive_idx
-from app.utils.ingredient_parser.dataclasses import ParsedIngredient, ParserDebugInfo
-from app.utils.ingredient_parser.en._utils import pluralise_units
+from app.utils.ingredient_parser.dataclasses import (
+    IngredientAmount,
+    IngredientText,
+    ParsedIngredient,
+    ParserDebugInfo,
+)
+from app.utils.ingredient_parser.en._utils import (
+    STEM_CACHE,
+    get_pos_tagger,
+    get_stemmer,
+    pluralise_units,
+    warm_pint_unit_cache,
+)
+from app.utils.ingredient_parser.en._tagger import TAGGERS, TaggedSentence
 from app.utils.ingredient_parser.en.postprocess import PostProcessor
-from app.utils.ingredient_parser.en.preprocess import PreProcessor
-
-# Create TAGGER object that can be reused between function calls
-# We only want to load the model into TAGGER once, but only do it
-# when we need to (from parse_ingredient() or inspect_parser()) and
-# not whenever anything from ingredient_parser is imported.
-TAGGER = pycrfsuite.Tagger()
+from app.utils.ingredient_parser.en.preprocess import PreProcessor, preprocess_sentences
+from app.utils.ingredient_parser.profiling import (
+    ACTIVE_PROFILERS,
+    record_stage,
+    timed_stage,
+)
 
 
 def load_model_if_not_loaded():
-    """Load model into TAGGER variable if not loaded.
+    """Load model into the tagger of the current thread if not loaded.
+
+    The first parse also pays for creating the pint Unit Registry, so every known
+    unit is converted at the same time and later sentences hardly need pint at all.
+    """
+    TAGGERS.get()
+    warm_pint_unit_cache()
 
-    There isn't a simple way to check if the model if loaded or not, so
-    we try to call TAGGER.labels() which will raise a ValueError if the
-    model is not loaded yet.
+
+def preload_en() -> None:
+    """Load all resources used by the English parser.
+
+    This loads the model, the part of speech tagger, the stemmer, the precomputed
+    stems and the pint Unit Registry, which otherwise are loaded on the first parse.
+    Call this during application start up to avoid the first parse being slow.
     """
-    try:
-        TAGGER.labels()
-    except ValueError:
-        with as_file(files(__package__) / "model.en.crfsuite") as p:
-            TAGGER.open(str(p))
+    load_model_if_not_loaded()
+    get_pos_tagger()
+    get_stemmer()
+    STEM_CACHE.load()
 
 
 def parse_ingredient_en(
@@ -69,37 +87,201 @@ def parse_ingredient_en(
     ParsedIngredient
         ParsedIngredient object of structured data parsed from input string
     """
+    if ACTIVE_PROFILERS:
+        return _parse_ingredient_en_profiled(
+            sentence,
+            discard_isolated_stop_words=discard_isolated_stop_words,
+            expect_name_in_output=expect_name_in_output,
+            string_units=string_units,
+            imperial_units=imperial_units,
+        )
+
     load_model_if_not_loaded()
 
     processed_sentence = PreProcessor(sentence)
-    tokens = processed_sentence.tokenized_sentence
-    labels = TAGGER.tag(processed_sentence.sentence_features())
-    scores = [TAGGER.marginal(label, i) for i, label in enumerate(labels)]
+    tagged = TAGGERS.tag(processed_sentence.sentence_attributes())
 
-    # Re-pluralise tokens that were singularised if the label isn't UNIT
-    # For tokens with UNIT label, we'll deal with them below
-    for idx in processed_sentence.singularised_indices:
-        token = tokens[idx]
-        label = labels[idx]
-        if label != "UNIT":
-            tokens[idx] = pluralise_units(token)
-
-    if expect_name_in_output and all(label != "NAME" for label in labels):
-        # No tokens were assigned the NAME label, so guess if there's a name
-        labels, scores = guess_ingredient_name(labels, scores)
-
-    postprocessed_sentence = PostProcessor(
+    postprocessed_sentence = _postprocess(
         sentence,
-        tokens,
-        labels,
-        scores,
+        processed_sentence,
+        tagged,
         discard_isolated_stop_words=discard_isolated_stop_words,
+        expect_name_in_output=expect_name_in_output,
         string_units=string_units,
         imperial_units=imperial_units,
     )
     return postprocessed_sentence.parsed
 
 
+def _parse_ingredient_en_profiled(
+    sentence: str,
+    discard_isolated_stop_words: bool,
+    expect_name_in_output: bool,
+    string_units: bool,
+    imperial_units: bool,
+) -> ParsedIngredient:
+    """Parse an English language ingredient sentence, recording the stage durations.
+
+    This does the same as parse_ingredient_en, but records the duration of each stage
+    with the active profilers (see profile_parser). The stages are:
+
+    * normalise: PreProcessor normalisation of the sentence
+    * tokenize: tokenization and singularisation of the units
+    * pos_tagging: part of speech tagging
+    * features: calculation of the features of the tokens
+    * crf: labelling of the tokens by the CRF model
+    * marginals: marginal probabilities of the labels
+    * postprocess: PostProcessor, including the two stages below
+    * postprocess_amounts: PostProcessor._postprocess_amounts
+    * postprocess_text: PostProcessor._postprocess_text, all text fields at once
+    * total: all of the above
+
+    Parameters
+    ----------
+    sentence : str
+        Ingredient sentence to parse
+    discard_isolated_stop_words : bool
+        If True, any isolated stop words in the name, preparation, or comment fields
+        are discarded.
+    expect_name_in_output : bool
+        If True, guess the name if the model doesn't label any words as the name.
+    string_units : bool
+        If True, return all IngredientAmount units as strings.
+    imperial_units : bool
+        If True, use imperial units instead of US customary units for pint.Unit
+        objects.
+
+    Returns
+    -------
+    ParsedIngredient
+        ParsedIngredient object of structured data parsed from input string
+    """
+    with timed_stage("total"):
+        load_model_if_not_loaded()
+
+        processed_sentence = _ProfiledPreProcessor(sentence)
+        with timed_stage("features"):
+            features = processed_sentence.sentence_attributes()
+
+        tagger = TAGGERS.get()
+        with timed_stage("crf"):
+            labels = tagger.tag(features)
+        with timed_stage("marginals"):
+            tagged = TAGGERS.marginals(tagger, labels)
+
+        with timed_stage("postprocess"):
+            return _postprocess(
+                sentence,
+                processed_sentence,
+                tagged,
+                discard_isolated_stop_words=discard_isolated_stop_words,
+                expect_name_in_output=expect_name_in_output,
+                string_units=string_units,
+                imperial_units=imperial_units,
+                postprocessor=_ProfiledPostProcessor,
+            ).parsed
+
+
+class _ProfiledPreProcessor(PreProcessor):
+    """PreProcessor that records the duration of its stages with active profilers."""
+
+    def _normalise(self, sentence: str) -> str:
+        with timed_stage("normalise"):
+            normalised = super()._normalise(sentence)
+
+        # Tokenization starts straight after normalisation in __init__
+        self._tokenize_start = time.perf_counter()
+        return normalised
+
+    def _singlarise_units(
+        self, tokenised_sentence: list[str]
+    ) -> tuple[list[str], list[int]]:
+        singularised = super()._singlarise_units(tokenised_sentence)
+        record_stage("tokenize", time.perf_counter() - self._tokenize_start)
+        return singularised
+
+    def _tag_partofspeech(self, tokens: list[str]) -> list[str]:
+        with timed_stage("pos_tagging"):
+            return super()._tag_partofspeech(tokens)
+
+
+class _ProfiledPostProcessor(PostProcessor):
+    """PostProcessor that records the duration of its stages with active profilers."""
+
+    def _postprocess_amounts(self) -> list[IngredientAmount]:
+        with timed_stage("postprocess_amounts"):
+            return super()._postprocess_amounts()
+
+    def _postprocess_text(self) -> dict[str, IngredientText | None]:
+        with timed_stage("postprocess_text"):
+            return super()._postprocess_text()
+
+
+def parse_multiple_ingredients_en(
+    sentences: list[str],
+    discard_isolated_stop_words: bool = True,
+    expect_name_in_output: bool = True,
+    string_units: bool = False,
+    imperial_units: bool = False,
+) -> list[ParsedIngredient]:
+    """Parse multiple English language ingredient sentences in one batch.
+
+    This gives the same result as calling parse_ingredient_en for each sentence, but
+    the part of speech tagging of all sentences is done in one batch (see
+    preprocess_sentences) and all sentences are labelled with the same tagger.
+
+    Parameters
+    ----------
+    sentences : list[str]
+        List of ingredient sentences to parse
+    discard_isolated_stop_words : bool, optional
+        If True, any isolated stop words in the name, preparation, or comment fields
+        are discarded.
+        Default is True.
+    expect_name_in_output : bool, optional
+        If True, if the model doesn't label any words in the sentence as the name,
+        fallback to selecting the most likely name from all tokens even though the
+        model gives it a different label. Note that this does guarantee the output
+        contains a name.
+        Default is True.
+    string_units : bool, optional
+        If True, return all IngredientAmount units as strings.
+        If False, convert IngredientAmount units to pint.Unit objects where possible.
+        Default is False.
+    imperial_units : bool, optional
+        If True, use imperial units instead of US customary units for pint.Unit objects
+        for the the following units: fluid ounce, cup, pint, quart, gallon.
+        Default is False, which results in US customary units being used.
+        This has no effect if string_units=True.
+
+    Returns
+    -------
+    list[ParsedIngredient]
+        ParsedIngredient object for each sentence, in the same order as the input
+    """
+    load_model_if_not_loaded()
+
+    processed_sentences = preprocess_sentences(sentences)
+    tagged_sentences = TAGGERS.tag_many(
+        [processed.sentence_attributes() for processed in processed_sentences]
+    )
+
+    return [
+        _postprocess(
+            sentence,
+            processed_sentence,
+            tagged,
+            discard_isolated_stop_words=discard_isolated_stop_words,
+            expect_name_in_output=expect_name_in_output,
+            string_units=string_units,
+            imperial_units=imperial_units,
+        ).parsed
+        for sentence, processed_sentence, tagged in zip(
+            sentences, processed_sentences, tagged_sentences
+        )
+    ]
+
+
 def inspect_parser_en(
     sentence: str,
     discard_isolated_stop_words: bool = True,
@@ -142,11 +324,69 @@ def inspect_parser_en(
     load_model_if_not_loaded()
 
     processed_sentence = PreProcessor(sentence)
+    tagged = TAGGERS.tag(processed_sentence.sentence_attributes())
+
+    postprocessed_sentence = _postprocess(
+        sentence,
+        processed_sentence,
+        tagged,
+        discard_isolated_stop_words=discard_isolated_stop_words,
+        expect_name_in_output=expect_name_in_output,
+        string_units=string_units,
+        imperial_units=imperial_units,
+    )
+
+    return ParserDebugInfo(
+        sentence=sentence,
+        PreProcessor=processed_sentence,
+        PostProcessor=postprocessed_sentence,
+        tagger=TAGGERS.get(),
+    )
+
+
+def _postprocess(
+    sentence: str,
+    processed_sentence: PreProcessor,
+    tagged: TaggedSentence,
+    discard_isolated_stop_words: bool,
+    expect_name_in_output: bool,
+    string_units: bool,
+    imperial_units: bool,
+    postprocessor: type[PostProcessor] = PostProcessor,
+) -> PostProcessor:
+    """Create the PostProcessor from the labelled tokens of a sentence.
+
+    Parameters
+    ----------
+    sentence : str
+        Ingredient sentence
+    processed_sentence : PreProcessor
+        PreProcessor object of the sentence
+    tagged : TaggedSentence
+        Labels and marginal probabilities of the tokens of the sentence
+    discard_isolated_stop_words : bool
+        If True, any isolated stop words in the name, preparation, or comment fields
+        are discarded.
+    expect_name_in_output : bool
+        If True, guess the name if the model doesn't label any words as the name.
+    string_units : bool
+        If True, return all IngredientAmount units as strings.
+    imperial_units : bool
+        If True, use imperial units instead of US customary units for pint.Unit
+        objects.
+    postprocessor : type[PostProcessor], optional
+        Class of the returned object.
+        Default is PostProcessor.
+
+    Returns
+    -------
+    PostProcessor
+        PostProcessor object of the sentence
+    """
     tokens = processed_sentence.tokenized_sentence
-    labels = TAGGER.tag(processed_sentence.sentence_features())
-    scores = [TAGGER.marginal(label, i) for i, label in enumerate(labels)]
+    labels, scores = tagged.labels, tagged.scores
 
-    # Re-plurise tokens that were singularised if the label isn't UNIT
+    # Re-pluralise tokens that were singularised if the label isn't UNIT
     # For tokens with UNIT label, we'll deal with them below
     for idx in processed_sentence.singularised_indices:
         token = tokens[idx]
@@ -156,9 +396,11 @@ def inspect_parser_en(
 
     if expect_name_in_output and all(label != "NAME" for label in labels):
         # No tokens were assigned the NAME label, so guess if there's a name
-        labels, scores = guess_ingredient_name(labels, scores)
+        labels, scores = guess_ingredient_name(
+            labels, scores, name_scores=tagged.label_scores("NAME")
+        )
 
-    postprocessed_sentence = PostProcessor(
+    return postprocessor(
         sentence,
         tokens,
         labels,
@@ -168,16 +410,12 @@ def inspect_parser_en(
         imperial_units=imperial_units,
     )
 
-    return ParserDebugInfo(
-        sentence=sentence,
-        PreProcessor=processed_sentence,
-        PostProcessor=postprocessed_sentence,
-        tagger=TAGGER,
-    )
-
 
 def guess_ingredient_name(
-    labels: list[str], scores: list[float], min_score: float = 0.2
+    labels: list[str],
+    scores: list[float],
+    min_score: float = 0.2,
+    name_scores: list[float] | None = None,
 ) -> tuple[list[str], list[float]]:
     """Guess ingredient name from list of labels and scores.
 
@@ -195,6 +433,11 @@ def guess_ingredient_name(
         List of scores
     min_score : float
         Minimum score to consider as candidate name
+    name_scores : list[float] | None, optional
+        Confidence of each token being labelled NAME, see
+        TaggedSentence.label_scores.
+        If None, it is read from the tagger of the current thread, which must have
+        tagged the sentence last.
 
     Returns
     -------
@@ -203,7 +446,9 @@ def guess_ingredient_name(
     """
     # Calculate confidence of each token being labelled NAME and get indices where that
     # confidence is greater than min_score.
-    name_scores = [TAGGER.marginal("NAME", i) for i, _ in enumerate(labels)]
+    if name_scores is None:
+        tagger = TAGGERS.get()
+        name_scores = [tagger.marginal("NAME", i) for i, _ in enumerate(labels)]
     candidate_indices = [i for i, score in enumerate(name_scores) if score >= min_score]
 
     if len(candidate_indices) == 0:
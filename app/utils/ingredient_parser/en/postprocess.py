@@ -6,9 +6,12 @@ from dataclasses import dataclass
 from functools import cached_property
 from itertools import chain, pairwise
 from statistics import mean
-from typing import Any
+from typing import Any, Iterable
 
-from app.utils.ingredient_parser._common import consume, group_consecutive_idx
+from app.utils.ingredient_parser._common import (
+    LabelPatternMatcher,
+    group_consecutive_idx,
+)
 from app.utils.ingredient_parser.dataclasses import (
     CompositeIngredientAmount,
     IngredientAmount,
@@ -24,6 +27,118 @@ from app.utils.ingredient_parser.en._utils import ingredient_amount_factory
 
 WORD_CHAR = re.compile(r"\w")
 
+# Labels of the IngredientText fields of ParsedIngredient, in the order they are
+# assembled. PUNC tokens next to tokens of two fields go to the first of the two.
+TEXT_FIELD_LABELS = ("SIZE", "NAME", "PREP", "COMMENT", "PURPOSE")
+
+# Punctuation that cannot start a phrase, see PostProcessor._remove_invalid_indices
+INVALID_LEADING_PUNCTUATION = frozenset([")", "]", "}", ",", ":", ";", "-", "."])
+
+# Punctuation that cannot end a phrase, see PostProcessor._remove_invalid_indices
+INVALID_TRAILING_PUNCTUATION = frozenset(["[", "(", "{", ",", ":", ";", "-"])
+
+# Tokens after which a new amount is related to the previous amount, see
+# PostProcessor._fallback_pattern
+RELATED_AMOUNT_TOKENS = frozenset(["(", "/", "["])
+
+# Label patterns of amounts with a sizable unit, see
+# PostProcessor._sizable_unit_pattern. We assume that the pattern will not be longer
+# than the longest pattern defined here.
+SIZABLE_UNIT_PATTERNS = [
+    ["QTY", "QTY", "UNIT", "QTY", "UNIT", "QTY", "UNIT", "UNIT"],
+    ["QTY", "QTY", "UNIT", "QTY", "UNIT", "UNIT"],
+    ["QTY", "QTY", "UNIT", "UNIT"],
+]
+SIZABLE_UNIT_MATCHER = LabelPatternMatcher(
+    SIZABLE_UNIT_PATTERNS, ignore_other_labels=True
+)
+
+# List of possible units at end of sizable unit pattern that constitute a match
+SIZABLE_END_UNITS = frozenset(
+    [
+        "bag",
+        "block",
+        "box",
+        "can",
+        "envelope",
+        "jar",
+        "package",
+        "packet",
+        "piece",
+        "sachet",
+        "slice",
+        "tin",
+    ]
+)
+
+# Patterns for composite amounts based on a sequence of labels, see
+# PostProcessor._composite_amounts_pattern.
+# Also set the indices of the pattern sequence where the first and second amounts
+# start, set the string used to join the two amounts together in text, and set
+# whether the amounts combine subtractively or not.
+COMPOSITE_AMOUNT_PATTERNS = {
+    "ptfloz": {
+        "pattern": ["QTY", "UNIT", "QTY", "UNIT", "UNIT"],
+        "start1": 0,
+        "start2": 2,
+        "join": "",
+        "subtractive": False,
+    },
+    "lboz": {
+        "pattern": ["QTY", "UNIT", "QTY", "UNIT"],
+        "start1": 0,
+        "start2": 2,
+        "join": "",
+        "subtractive": False,
+    },
+    "plus": {
+        "pattern": ["QTY", "UNIT", "COMMENT", "QTY", "UNIT"],
+        "start1": 0,
+        "start2": 3,
+        "join": " plus ",
+        "subtractive": False,
+    },
+    "minus": {
+        "pattern": ["QTY", "UNIT", "COMMENT", "QTY", "UNIT"],
+        "start1": 0,
+        "start2": 3,
+        "join": " minus ",
+        "subtractive": True,
+    },
+    "less": {
+        "pattern": ["QTY", "UNIT", "COMMENT", "QTY", "UNIT"],
+        "start1": 0,
+        "start2": 3,
+        "join": " minus ",
+        "subtractive": True,
+    },
+}
+COMPOSITE_AMOUNT_MATCHER = LabelPatternMatcher(
+    [info["pattern"] for info in COMPOSITE_AMOUNT_PATTERNS.values()],
+    ignore_other_labels=False,
+)
+
+
+def _mean(values: list[float]) -> float:
+    """Return the mean of values.
+
+    Most text field groups have a single token, whose mean is the value itself, so
+    statistics.mean and its exact fraction arithmetic are only used for longer lists.
+
+    Parameters
+    ----------
+    values : list[float]
+        Values to average
+
+    Returns
+    -------
+    float
+        Mean of values
+    """
+    if len(values) == 1:
+        return values[0]
+    return mean(values)
+
 
 @dataclass
 class _PartialIngredientAmount:
@@ -89,9 +204,10 @@ class PostProcessor:
         for the the following units: fluid ounce, cup, pint, quart, gallon.
         Default is False, which results in US customary units being used.
         This has no effect if string_units=True.
-    consumed : list[int]
-        List of indices of tokens consumed as part of setting the APPROXIMATE and
-        SINGULAR flags. These tokens should not end up in the parsed output.
+    consumed : list[bool]
+        For each token, True if the token has been consumed, e.g. as part of an amount
+        or setting the APPROXIMATE and SINGULAR flags. Consumed tokens should not end
+        up in the parsed output again.
     """
 
     def __init__(
@@ -111,7 +227,7 @@ class PostProcessor:
         self.discard_isolated_stop_words = discard_isolated_stop_words
         self.string_units = string_units
         self.imperial_units = imperial_units
-        self.consumed = []
+        self.consumed = [False] * len(tokens)
 
     def __repr__(self) -> str:
         """__repr__ method.
@@ -147,46 +263,107 @@ class PostProcessor:
             Object containing structured data from sentence.
         """
         amounts = self._postprocess_amounts()
-        size = self._postprocess("SIZE")
-        name = self._postprocess("NAME")
-        preparation = self._postprocess("PREP")
-        comment = self._postprocess("COMMENT")
-        purpose = self._postprocess("PURPOSE")
+        text_fields = self._postprocess_text()
 
         return ParsedIngredient(
-            name=name,
-            size=size,
+            name=text_fields["NAME"],
+            size=text_fields["SIZE"],
             amount=amounts,
-            preparation=preparation,
-            comment=comment,
-            purpose=purpose,
+            preparation=text_fields["PREP"],
+            comment=text_fields["COMMENT"],
+            purpose=text_fields["PURPOSE"],
             sentence=self.sentence,
         )
 
-    def _postprocess(self, selected: str) -> IngredientText | None:
-        """Process tokens, labels and scores with selected label into IngredientText.
+    def _postprocess_text(self) -> dict[str, IngredientText | None]:
+        """Process tokens, labels and scores into the IngredientText of each field.
+
+        The tokens are bucketed by field in a single sweep (see _text_field_indices),
+        then each field is assembled from its own tokens in the order of
+        TEXT_FIELD_LABELS.
+
+        Returns
+        -------
+        dict[str, IngredientText | None]
+            IngredientText of each label in TEXT_FIELD_LABELS, or None if there is no
+            text for that label
+        """
+        return {
+            label: self._postprocess(idx) if idx else None
+            for label, idx in self._text_field_indices().items()
+        }
+
+    def _text_field_indices(self) -> dict[str, list[int]]:
+        """Return the indices of the tokens that can be part of each text field.
+
+        A single sweep splits the unconsumed tokens into runs of consecutive tokens
+        with the same label. The tokens of a field are the tokens of its runs and of
+        the PUNC runs directly before or after them.
+
+        PUNC runs that are not next to a run of a field are left out, because they
+        could only form groups of PUNC tokens, which are discarded anyway.
+
+        Returns
+        -------
+        dict[str, list[int]]
+            Indices of the tokens of each label in TEXT_FIELD_LABELS, in ascending
+            order. Empty if there are no unconsumed tokens with that label.
+        """
+        consumed = self.consumed
+        runs = []  # [label, start, stop] of each run of tokens
+        for i, label in enumerate(self.labels):
+            if consumed[i]:
+                continue
+            if runs and runs[-1][0] == label and runs[-1][2] == i:
+                runs[-1][2] = i + 1
+            else:
+                runs.append([label, i, i + 1])
+
+        field_indices = {label: [] for label in TEXT_FIELD_LABELS}
+        for k, (label, start, stop) in enumerate(runs):
+            idx = field_indices.get(label)
+            if idx is None:
+                continue
+
+            # PUNC run before this run, unless it was already added as the PUNC run
+            # after the previous run of this field
+            if k > 0:
+                prev_label, prev_start, prev_stop = runs[k - 1]
+                if (
+                    prev_label == "PUNC"
+                    and prev_stop == start
+                    and not (idx and idx[-1] == prev_stop - 1)
+                ):
+                    idx.extend(range(prev_start, prev_stop))
+
+            idx.extend(range(start, stop))
+
+            # PUNC run after this run
+            if k + 1 < len(runs):
+                next_label, next_start, next_stop = runs[k + 1]
+                if next_label == "PUNC" and next_start == stop:
+                    idx.extend(range(next_start, next_stop))
+
+        return field_indices
+
+    def _postprocess(self, idx: list[int]) -> IngredientText | None:
+        """Process tokens, labels and scores of a text field into IngredientText.
 
         Parameters
         ----------
-        selected : str
-            Label of tokens to postprocess
+        idx : list[int]
+            Indices of the tokens of the field and the PUNC tokens next to them, in
+            ascending order, from _text_field_indices. PUNC tokens consumed by a
+            field assembled earlier are skipped.
 
         Returns
         -------
         IngredientText
             Object containing ingredient comment text and confidence
         """
-        # Select indices of tokens, labels and scores for selected label
-        # Do not include tokens, labels and scores in self.consumed
-        idx = [
-            i
-            for i, label in enumerate(self.labels)
-            if label in [selected, "PUNC"] and i not in self.consumed
-        ]
-
-        # If idx is empty or all the selected idx are PUNC, return None
-        if not idx or all(self.labels[i] == "PUNC" for i in idx):
-            return None
+        # Do not include tokens, labels and scores that have been consumed
+        consumed = self.consumed
+        idx = [i for i in idx if not consumed[i]]
 
         # Join consecutive tokens together and average their score
         parts = []
@@ -200,13 +377,14 @@ class PostProcessor:
                 continue
 
             joined = " ".join([self.tokens[i] for i in idx])
-            confidence = mean([self.scores[i] for i in idx])
+            confidence = _mean([self.scores[i] for i in idx])
 
             if self.discard_isolated_stop_words and joined in STOP_WORDS:
                 # Discard part if it's a stop word
                 continue
 
-            self.consumed.extend(idx)
+            for i in idx:
+                consumed[i] = True
             parts.append(joined)
             confidence_parts.append(confidence)
 
@@ -226,7 +404,7 @@ class PostProcessor:
 
         return IngredientText(
             text=text,
-            confidence=round(mean(confidence_parts), 6),
+            confidence=round(_mean(confidence_parts), 6),
         )
 
     def _postprocess_amounts(self) -> list[IngredientAmount]:
@@ -254,10 +432,11 @@ class PostProcessor:
 
         amounts = []
         for func in funcs:
-            idx = self._unconsumed(list(range(len(self.tokens))))
-            tokens = self._unconsumed(self.tokens)
-            labels = self._unconsumed(self.labels)
-            scores = self._unconsumed(self.scores)
+            # Each function consumes tokens, so find the unconsumed tokens again
+            idx = self._unconsumed_indices()
+            tokens = [self.tokens[i] for i in idx]
+            labels = [self.labels[i] for i in idx]
+            scores = [self.scores[i] for i in idx]
 
             parsed_amounts = func(idx, tokens, labels, scores)
             amounts.extend(parsed_amounts)
@@ -265,7 +444,7 @@ class PostProcessor:
         return sorted(amounts, key=lambda x: x.starting_index)
 
     def _unconsumed(self, list_: list[Any]) -> list[Any]:
-        """Return elements from list whose index is not in the list of consumed indices.
+        """Return elements from list whose token has not been consumed.
 
         Parameters
         ----------
@@ -277,7 +456,29 @@ class PostProcessor:
         list[Any]
             List of items without consumed elements
         """
-        return [el for i, el in enumerate(list_) if i not in self.consumed]
+        return [el for el, consumed in zip(list_, self.consumed) if not consumed]
+
+    def _unconsumed_indices(self) -> list[int]:
+        """Return the indices of the tokens that have not been consumed.
+
+        Returns
+        -------
+        list[int]
+            Indices of tokens without consumed tokens
+        """
+        return [i for i, consumed in enumerate(self.consumed) if not consumed]
+
+    def _consume(self, indices: Iterable[int]) -> None:
+        """Mark tokens as consumed.
+
+        Parameters
+        ----------
+        indices : Iterable[int]
+            Indices of tokens in the full tokenized sentence
+        """
+        consumed = self.consumed
+        for i in indices:
+            consumed[i] = True
 
     def _remove_invalid_indices(self, idx: list[int]) -> list[int]:
         """Remove indices of tokens that aren't valid in the group.
@@ -298,27 +499,10 @@ class PostProcessor:
         """
         # For groups with more than 1 element, remove invliad leading and trailing
         # punctuation so they don't get incorrectly consumed.
-        while len(idx) > 1 and self.tokens[idx[0]] in [
-            ")",
-            "]",
-            "}",
-            ",",
-            ":",
-            ";",
-            "-",
-            ".",
-        ]:
+        while len(idx) > 1 and self.tokens[idx[0]] in INVALID_LEADING_PUNCTUATION:
             idx = idx[1:]
 
-        while len(idx) > 1 and self.tokens[idx[-1]] in [
-            "[",
-            "(",
-            "{",
-            ",",
-            ":",
-            ";",
-            "-",
-        ]:
+        while len(idx) > 1 and self.tokens[idx[-1]] in INVALID_TRAILING_PUNCTUATION:
             idx = idx[:-1]
 
         # Remove brackets that aren't part of a matching pair
@@ -344,6 +528,7 @@ class PostProcessor:
         # Insert anything left in stack into idx_to_remove and remove
         for stack_idx in stack.values():
             idx_to_remove.extend(stack_idx)
+        idx_to_remove = set(idx_to_remove)
         idx = [idx[i] for i, _ in enumerate(idx) if i not in idx_to_remove]
 
         return idx
@@ -443,43 +628,22 @@ class PostProcessor:
         list[IngredientAmount]
             List of IngredientAmount objects
         """
-        # We assume that the pattern will not be longer than the longest list
-        # defined here.
-        patterns = [
-            ["QTY", "QTY", "UNIT", "QTY", "UNIT", "QTY", "UNIT", "UNIT"],
-            ["QTY", "QTY", "UNIT", "QTY", "UNIT", "UNIT"],
-            ["QTY", "QTY", "UNIT", "UNIT"],
-        ]
-
-        # List of possible units at end of pattern that constitute a match
-        end_units = [
-            "bag",
-            "block",
-            "box",
-            "can",
-            "envelope",
-            "jar",
-            "package",
-            "packet",
-            "piece",
-            "sachet",
-            "slice",
-            "tin",
-        ]
-
+        # Find all patterns in one scan of the labels. The labels do not change while
+        # the matches are processed, so this gives the same matches as searching for
+        # each pattern in turn.
         amounts = []
-        for pattern in patterns:
-            for match in self._match_pattern(labels, pattern, ignore_other_labels=True):
+        for pattern_matches in SIZABLE_UNIT_MATCHER.match(labels):
+            for match in pattern_matches:
                 # If the pattern ends with one of end_units, we have found a match for
                 # this pattern!
-                if tokens[match[-1]] in end_units:
+                if tokens[match[-1]] in SIZABLE_END_UNITS:
                     # Get tokens and scores that are part of match
                     matching_tokens = [tokens[i] for i in match]
                     matching_scores = [scores[i] for i in match]
 
                     # Keep track of indices of matching elements so we don't use them
                     # again elsewhere
-                    self.consumed.extend([idx[i] for i in match])
+                    self._consume(idx[i] for i in match)
 
                     # The first amount is made up of the first and last items
                     # Note that this cannot be singular, but may be approximate
@@ -568,64 +732,22 @@ class PostProcessor:
         list[CompositeIngredientAmount]
             List of IngredientAmount objects
         """
-        # Define patterns for composite amounts based on a sequence of labels.
-        # Also set the indices of the pattern sequence where the first and
-        # second amounts start, set the string used to join the two amounts
-        # together in text, and set whether the amounts combine subtractively or not.
-        patterns = {
-            "ptfloz": {
-                "pattern": ["QTY", "UNIT", "QTY", "UNIT", "UNIT"],
-                "start1": 0,
-                "start2": 2,
-                "join": "",
-                "subtractive": False,
-            },
-            "lboz": {
-                "pattern": ["QTY", "UNIT", "QTY", "UNIT"],
-                "start1": 0,
-                "start2": 2,
-                "join": "",
-                "subtractive": False,
-            },
-            "plus": {
-                "pattern": ["QTY", "UNIT", "COMMENT", "QTY", "UNIT"],
-                "start1": 0,
-                "start2": 3,
-                "join": " plus ",
-                "subtractive": False,
-            },
-            "minus": {
-                "pattern": ["QTY", "UNIT", "COMMENT", "QTY", "UNIT"],
-                "start1": 0,
-                "start2": 3,
-                "join": " minus ",
-                "subtractive": True,
-            },
-            "less": {
-                "pattern": ["QTY", "UNIT", "COMMENT", "QTY", "UNIT"],
-                "start1": 0,
-                "start2": 3,
-                "join": " minus ",
-                "subtractive": True,
-            },
-        }
-
         # List of possible units for first and second amount matched for
         # pltfloz and lboz patterns.
         valid_first_units = {"lb", "pound", "pt", "pint"}
         valid_last_units = {"oz", "ounce"}
 
         composite_amounts = []
-        for pattern_name, pattern_info in patterns.items():
-            pattern = pattern_info["pattern"]
+        all_matches = COMPOSITE_AMOUNT_MATCHER.match(labels)
+        for (pattern_name, pattern_info), pattern_matches in zip(
+            COMPOSITE_AMOUNT_PATTERNS.items(), all_matches
+        ):
             start1 = pattern_info["start1"]
             start2 = pattern_info["start2"]
             join = pattern_info["join"]
             subtractive = pattern_info["subtractive"]
 
-            for match in self._match_pattern(
-                labels, pattern, ignore_other_labels=False
-            ):
+            for match in pattern_matches:
                 # Check if match fits with "ptfloz" or "lboz" pattern constraints
                 if pattern_name in ["pltfloz", "lboz"]:
                     first_unit = tokens[match[start1 + 1]]
@@ -687,7 +809,7 @@ class PostProcessor:
 
                 # Keep track of indices of matching elements so we don't use them
                 # again elsewhere
-                self.consumed.extend([idx[i] for i in match])
+                self._consume(idx[i] for i in match)
 
         return composite_amounts
 
@@ -726,33 +848,8 @@ class PostProcessor:
         list[list[int]]
             List of label index lists that match the pattern.
         """
-        plen = len(pattern)
-        plabels = set(pattern)
-
-        if ignore_other_labels:
-            # Select just the labels and indices of labels that are in the pattern.
-            lbls = [label for label in labels if label in plabels]
-            idx = [i for i, label in enumerate(labels) if label in plabels]
-        else:
-            # Consider all labels
-            lbls = labels
-            idx = [i for i, _ in enumerate(labels)]
-
-        if len(pattern) > len(lbls):
-            # We can never find a match.
-            return []
-
-        matches = []
-        indices = iter(range(len(lbls)))
-        for i in indices:
-            # Short circuit: If the lbls[i] is not equal to the first element
-            # of pattern skip to next iteration
-            if lbls[i] == pattern[0] and lbls[i : i + plen] == pattern:
-                matches.append(idx[i : i + plen])
-                # Advance iterator to prevent overlapping matches
-                consume(indices, plen)
-
-        return matches
+        matcher = LabelPatternMatcher([pattern], ignore_other_labels)
+        return matcher.match(labels)[0]
 
     def _fallback_pattern(
         self,
@@ -792,9 +889,9 @@ class PostProcessor:
         # is related to the previous amount
         # We use idx+1 here so we can check the index in the iteration a new amount is
         # created and avoid needing to check things like i >= 0
-        related_idx = [
-            idx + 1 for idx, tok in enumerate(tokens) if tok in ["(", "/", "["]
-        ]
+        related_idx = {
+            idx + 1 for idx, tok in enumerate(tokens) if tok in RELATED_AMOUNT_TOKENS
+        }
 
         for i, (token, label, score) in enumerate(zip(tokens, labels, scores)):
             if label == "QTY":
@@ -880,7 +977,7 @@ class PostProcessor:
         This is determined by the token label being QTY and the previous token being in
         a list of approximate tokens.
 
-        If returning True, also add index of i - 1 token to self.consumed list.
+        If returning True, also mark the i - 1 token as consumed.
 
         Parameters
         ----------
@@ -923,7 +1020,7 @@ class PostProcessor:
 
         if labels[i] == "QTY" and tokens[i - 1].lower() in APPROXIMATE_TOKENS:
             # Mark i - 1 element as consumed
-            self.consumed.append(idx[i - 1])
+            self.consumed[idx[i - 1]] = True
             return True
         elif (
             labels[i] == "QTY"
@@ -932,8 +1029,8 @@ class PostProcessor:
         ):
             # Special case for "approx."
             # Mark i - 1 and i - 2 elements as consumed
-            self.consumed.append(idx[i - 1])
-            self.consumed.append(idx[i - 2])
+            self.consumed[idx[i - 1]] = True
+            self.consumed[idx[i - 2]] = True
             return True
 
         return False
@@ -946,7 +1043,7 @@ class PostProcessor:
         This is determined by the token label being UNIT and the next token being in
         a list of singular tokens.
 
-        If returning True, also add index of i + 1 token to self.consumed list.
+        If returning True, also mark the i + 1 token as consumed.
 
         Parameters
         ----------
@@ -980,7 +1077,7 @@ class PostProcessor:
 
         if labels[i] == "UNIT" and tokens[i + 1].lower() in SINGULAR_TOKENS:
             # Mark i - 1 element as consumed
-            self.consumed.append(idx[i + 1])
+            self.consumed[idx[i + 1]] = True
             return True
 
         if i == len(tokens) - 2:
@@ -993,7 +1090,7 @@ class PostProcessor:
             and tokens[i + 2].lower() in SINGULAR_TOKENS
         ):
             # Mark i - 1 element as consumed
-            self.consumed.append(idx[i + 2])
+            self.consumed[idx[i + 2]] = True
             return True
 
         return False
@@ -1006,8 +1103,7 @@ class PostProcessor:
         This is determined by the token label being QTY and is preceded by a token in
         a list of singular tokens, then token in a list of approximate tokens.
 
-        If returning True, also add index of i - 1 and i - 2 tokens to
-        self.consumed list.
+        If returning True, also mark the i - 1 and i - 2 tokens as consumed.
 
         e.g. each nearly 3 ...
 
@@ -1047,8 +1143,8 @@ class PostProcessor:
             and tokens[i - 2].lower() in SINGULAR_TOKENS
         ):
             # Mark i - 1 and i - 2 elements as consumed
-            self.consumed.append(idx[i - 1])
-            self.consumed.append(idx[i - 2])
+            self.consumed[idx[i - 1]] = True
+            self.consumed[idx[i - 2]] = True
             return True
 
         return False
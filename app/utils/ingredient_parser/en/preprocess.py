@@ -3,31 +3,229 @@
 import re
 import string
 from fractions import Fraction
+from functools import lru_cache
 from html import unescape
 
-from nltk.tag import pos_tag
-
 from app.utils.ingredient_parser.en._constants import (
     AMBIGUOUS_UNITS,
     FLATTENED_UNITS_LIST,
+    SINGULAR_UNITS,
     STRING_NUMBERS,
+    STRING_NUMBERS_PATTERN,
     STRING_NUMBERS_REGEXES,
     UNICODE_FRACTIONS,
+    UNICODE_FRACTIONS_PATTERN,
     UNITS,
 )
 from app.utils.ingredient_parser.en._regex import (
     CAPITALISED_PATTERN,
+    DIGIT_PATTERN,
     DUPE_UNIT_RANGES_PATTERN,
     EXPANDED_RANGE,
     FRACTION_PARTS_PATTERN,
     FRACTION_SPLIT_AND_PATTERN,
+    NUMERIC_TOKEN_PATTERN,
     QUANTITY_UNITS_PATTERN,
     QUANTITY_X_PATTERN,
     STRING_RANGE_PATTERN,
     UNITS_HYPHEN_QUANTITY_PATTERN,
     UNITS_QUANTITY_PATTERN,
 )
-from app.utils.ingredient_parser.en._utils import stem, tokenize
+from app.utils.ingredient_parser.en._utils import get_pos_tagger, stem, tokenize
+
+# Names of the attributes computed for every token by PreProcessor._token_attributes.
+# The features of a token include the attributes of the token and its neighbours,
+# prefixed and suffixed according to their position relative to the token.
+TOKEN_ATTRIBUTES = (
+    "stem",
+    "is_capitalised",
+    "is_unit",
+    "is_punc",
+    "is_ambiguous",
+    "is_in_parens",
+    "is_after_comma",
+    "is_after_plus",
+)
+PREV_ATTRIBUTES = tuple(f"prev_{name}" for name in TOKEN_ATTRIBUTES)
+PREV2_ATTRIBUTES = tuple(f"prev_{name}2" for name in TOKEN_ATTRIBUTES)
+NEXT_ATTRIBUTES = tuple(f"next_{name}" for name in TOKEN_ATTRIBUTES)
+NEXT2_ATTRIBUTES = tuple(f"next_{name}2" for name in TOKEN_ATTRIBUTES)
+
+# Maximum number of distinct token attributes kept with their encoded attribute
+# strings, see encode_token_attributes
+ENCODED_ATTRIBUTES_CACHE_SIZE = 4096
+
+# Maximum number of distinct tokens kept with their numeric classification, see
+# is_numeric_token
+NUMERIC_TOKEN_CACHE_SIZE = 4096
+
+# Maximum number of distinct fractions kept with their decimal value, see
+# fraction_to_decimal
+FRACTION_CACHE_SIZE = 1024
+
+
+
+@lru_cache(maxsize=ENCODED_ATTRIBUTES_CACHE_SIZE)
+def encode_token_attributes(
+    attributes: tuple[str | bool, ...],
+) -> tuple[str | tuple[str, ...], ...]:
+    """Encode the attributes of a token as CRF attribute strings.
+
+    pycrfsuite turns a {"name": "value"} feature into the attribute "name:value" and
+    a {"name": True} feature into the attribute "name". A {"name": False} feature
+    has zero weight, so it does not change the output of the model and is left out.
+
+    The attributes of a token are used in the features of the token and of its
+    neighbours, each time under a different name. The encoded attributes of every
+    position are returned at once, and cached, because the same tokens occur in many
+    sentences.
+
+    Parameters
+    ----------
+    attributes : tuple[str | bool, ...]
+        Values of the attributes listed in TOKEN_ATTRIBUTES, from
+        PreProcessor._token_attributes
+
+    Returns
+    -------
+    str
+        Encoded stem of the token itself
+    tuple[str, ...]
+        Encoded boolean attributes of the token itself
+    tuple[str, ...]
+        Encoded attributes as the previous token, the token before the previous
+        token, the next token and the token after the next token
+    """
+    stem_value = attributes[0]
+    flags = tuple(
+        name for name, value in zip(TOKEN_ATTRIBUTES[1:], attributes[1:]) if value
+    )
+
+    neighbours = []
+    for names in (
+        PREV_ATTRIBUTES,
+        PREV2_ATTRIBUTES,
+        NEXT_ATTRIBUTES,
+        NEXT2_ATTRIBUTES,
+    ):
+        encoded = [f"{names[0]}:{stem_value}"]
+        encoded.extend(name for name, value in zip(names[1:], attributes[1:]) if value)
+        neighbours.append(tuple(encoded))
+
+    return (f"stem:{stem_value}", flags, *neighbours)
+
+
+@lru_cache(maxsize=NUMERIC_TOKEN_CACHE_SIZE)
+def is_numeric_token(token: str) -> bool:
+    """Return True if token is numeric.
+
+    A token is numeric if it is a number, optionally followed by "x", the word
+    "dozen", or numeric tokens joined by hyphens. Most numeric tokens are matched by
+    NUMERIC_TOKEN_PATTERN without converting them to a float. The classification is
+    cached because the same tokens occur in many sentences.
+
+    Parameters
+    ----------
+    token : str
+        Token to check
+
+    Returns
+    -------
+    bool
+        True if token is numeric, else False
+
+    Examples
+    --------
+    >>> is_numeric_token("1.5-2")
+    True
+
+    >>> is_numeric_token("dozen-1")
+    True
+
+    >>> is_numeric_token("beef")
+    False
+    """
+    if NUMERIC_TOKEN_PATTERN.fullmatch(token):
+        return True
+
+    if "-" in token:
+        return all(is_numeric_token(part) for part in token.split("-"))
+
+    if token == "dozen":
+        return True
+
+    if token.endswith("x"):
+        token = token[:-1]
+
+    try:
+        float(token)
+        return True
+    except ValueError:
+        return False
+
+
+@lru_cache(maxsize=FRACTION_CACHE_SIZE)
+def fraction_to_decimal(fraction: str) -> str:
+    """Return the decimal value of a fraction, rounded to 3 decimal places.
+
+    The value is cached because the same few fractions occur in most sentences.
+
+    Parameters
+    ----------
+    fraction : str
+        Fraction, optionally preceded by an integer e.g. 1/2, 1 1/2
+
+    Returns
+    -------
+    str
+        Decimal value of the fraction
+
+    Examples
+    --------
+    >>> fraction_to_decimal("1 1/2")
+    "1.5"
+
+    >>> fraction_to_decimal("1/3")
+    "0.333"
+    """
+    summed = float(sum(Fraction(part) for part in fraction.split()))
+    return f"{round(summed, 3):g}"
+
+
+# Stages of PreProcessor._normalise, in the order they are applied, each with a
+# prefilter. The prefilter is a cheap check that returns False if the stage cannot
+# change the sentence, e.g. because a character the stage looks for is absent, so the
+# stage can be skipped. Stages without a prefilter are always applied.
+NORMALISE_STAGES = (
+    ("_replace_en_em_dash", lambda s: "\u2013" in s or "\u2014" in s),
+    ("_replace_string_numbers", None),
+    ("_replace_html_fractions", lambda s: "&" in s),
+    ("_replace_unicode_fractions", None),
+    ("_combine_quantities_split_by_and", lambda s: "and" in s and "/" in s),
+    ("_replace_fake_fractions", lambda s: "/" in s or "\u2044" in s),
+    ("_split_quantity_and_units", lambda s: DIGIT_PATTERN.search(s) is not None),
+    ("_remove_unit_trailing_period", lambda s: "." in s),
+    (
+        "_replace_string_range",
+        lambda s: ("to" in s or "or" in s) and DIGIT_PATTERN.search(s) is not None,
+    ),
+    # DUPE_UNIT_RANGES_PATTERN ignores case, so "to" and "or" are found in any case
+    (
+        "_replace_dupe_units_ranges",
+        lambda s: "-" in s or "to" in s.lower() or "or" in s.lower(),
+    ),
+    ("_merge_quantity_x", lambda s: "x" in s or "X" in s),
+    (
+        "_collapse_ranges",
+        lambda s: "-" in s and DIGIT_PATTERN.search(s) is not None,
+    ),
+)
+
+# Text that may follow a hyphenated string number for it to be replaced, see
+# PreProcessor._valid_string_number_replacement
+STRING_NUMBER_SUFFIXES = tuple(
+    f"{unit_or_num} " for unit_or_num in FLATTENED_UNITS_LIST + list(STRING_NUMBERS)
+)
 
 
 class PreProcessor:
@@ -183,28 +381,14 @@ class PreProcessor:
         str
             Normalised ingredient sentence
         """
-        # List of functions to apply to sentence
-        # Note that the order matters
-        funcs = [
-            self._replace_en_em_dash,
-            self._replace_string_numbers,
-            self._replace_html_fractions,
-            self._replace_unicode_fractions,
-            self._combine_quantities_split_by_and,
-            self._replace_fake_fractions,
-            self._split_quantity_and_units,
-            self._remove_unit_trailing_period,
-            self._replace_string_range,
-            self._replace_dupe_units_ranges,
-            self._merge_quantity_x,
-            self._collapse_ranges,
-        ]
-
-        for func in funcs:
-            sentence = func(sentence)
+        # The stages are applied in order, because the order matters. Stages that
+        # cannot change the sentence are skipped, see NORMALISE_STAGES.
+        for name, prefilter in NORMALISE_STAGES:
+            if prefilter is None or prefilter(sentence):
+                sentence = getattr(self, name)(sentence)
 
             if self.show_debug_output:
-                print(f"{func.__name__}: {sentence}")
+                print(f"{name}: {sentence}")
 
         return sentence.strip()
 
@@ -256,10 +440,20 @@ class PreProcessor:
         >>> p._replace_string_numbers("twelve bonbons")
         "12 bonbons"
         """
+        # Find all string numbers in a single scan, so only the regular expressions of
+        # the string numbers in the sentence need to be applied.
+        found = {match.lower() for match in STRING_NUMBERS_PATTERN.findall(sentence)}
+        if not found:
+            return sentence
+
         # STRING_NUMBER_REGEXES is a dict where the values are a tuple of the compiled
         # regular expression for matching a string number e.g. 'one', 'two' and the
         # substitution numerical value for that string number.
-        for regex, substitution in STRING_NUMBERS_REGEXES.values():
+        for string_number, (regex, substitution) in STRING_NUMBERS_REGEXES.items():
+            # "one-half" is found as "one"
+            if string_number.split("-")[0] not in found:
+                continue
+
             # Find matches for current string number
             for match in regex.finditer(sentence):
                 if self._valid_string_number_replacement(match, sentence):
@@ -289,15 +483,9 @@ class PreProcessor:
 
         # If the next character is a hyphen, if the hyphen is followed by
         # a unit or another string number, then also do the substitution.
-        sub_sentence = sentence[next_char_idx + 1 :]
-        units_and_numbers = FLATTENED_UNITS_LIST + list(STRING_NUMBERS.keys())
-        for unit_or_num in units_and_numbers:
-            # Add a space to end of unit_or_num to make sure we don't incorrectly
-            # get a substring match e.g. matching "g" when unit_or_num is grain.
-            if sub_sentence.startswith(unit_or_num + " "):
-                return True
-
-        return False
+        # STRING_NUMBER_SUFFIXES ends each unit and number with a space to make sure
+        # we don't incorrectly get a substring match e.g. matching "g" for grain.
+        return sentence.startswith(STRING_NUMBER_SUFFIXES, next_char_idx + 1)
 
     def _replace_html_fractions(self, sentence: str) -> str:
         """Replace html fractions e.g. &frac12; with unicode equivalents.
@@ -368,10 +556,7 @@ class PreProcessor:
         matches.sort(key=len, reverse=True)
 
         for match in matches:
-            split = match.split()
-            summed = float(sum(Fraction(s) for s in split))
-            rounded = round(summed, 3)
-            sentence = sentence.replace(match, f"{rounded:g}")
+            sentence = sentence.replace(match, fraction_to_decimal(match))
 
         return sentence
 
@@ -401,10 +586,10 @@ class PreProcessor:
         """
         matches = FRACTION_SPLIT_AND_PATTERN.findall(sentence)
 
-        for match in matches:
-            combined_quantity = float(Fraction(match[1]) + Fraction(match[2]))
-            rounded = round(combined_quantity, 3)
-            sentence = sentence.replace(match[0], f"{rounded:g}")
+        for full_match, integer, fraction in matches:
+            sentence = sentence.replace(
+                full_match, fraction_to_decimal(f"{integer} {fraction}")
+            )
 
         return sentence
 
@@ -438,10 +623,9 @@ class PreProcessor:
         >>> p._replace_unicode_fractions("¼-½ teaspoon")
         "1/4-1/2 teaspoon"
         """
-        for f_unicode, f_ascii in UNICODE_FRACTIONS.items():
-            sentence = sentence.replace(f_unicode, f_ascii)
-
-        return sentence
+        return UNICODE_FRACTIONS_PATTERN.sub(
+            lambda match: UNICODE_FRACTIONS[match.group()], sentence
+        )
 
     def _split_quantity_and_units(self, sentence: str) -> str:
         """Insert space between quantity and unit.
@@ -694,14 +878,7 @@ class PreProcessor:
         list[str]
             List of tokens with numeric tokens replaced with "!num"
         """
-        replaced_tokens = []
-        for token in tokens:
-            if self._is_numeric(token):
-                replaced_tokens.append("!num")
-            else:
-                replaced_tokens.append(token)
-
-        return replaced_tokens
+        return ["!num" if is_numeric_token(token) else token for token in tokens]
 
     def _tag_partofspeech(self, tokens: list[str]) -> list[str]:
         """Tag tokens with part of speech using universal tagset.
@@ -716,14 +893,27 @@ class PreProcessor:
         list[str]
             List of part of speech tags
         """
-        tags = []
         # If we don't make each token lower case, that POS tag maybe different in
         # ways that are unhelpful. For example, if a sentence starts with a unit.
-        for token, tag in pos_tag([t.lower() for t in tokens]):
-            if self._is_numeric(token):
-                tag = "CD"
-            tags.append(tag)
-        return tags
+        tagged = get_pos_tagger().tag([t.lower() for t in tokens])
+        return self._pos_tags(tagged)
+
+    def _pos_tags(self, tagged: list[tuple[str, str]]) -> list[str]:
+        """Return the part of speech tags from the output of the tagger.
+
+        Numeric tokens are always tagged as CD (cardinal number).
+
+        Parameters
+        ----------
+        tagged : list[tuple[str, str]]
+            List of (token, tag) tuples from the part of speech tagger
+
+        Returns
+        -------
+        list[str]
+            List of part of speech tags
+        """
+        return ["CD" if is_numeric_token(token) else tag for token, tag in tagged]
 
     def _is_unit(self, token: str) -> bool:
         """Return True if token is a unit.
@@ -748,7 +938,7 @@ class PreProcessor:
         >>> p._is_unit("beef")
         False
         """
-        return token.lower() in UNITS.values()
+        return token.lower() in SINGULAR_UNITS
 
     def _is_punc(self, token: str) -> bool:
         """Return True if token is a punctuation mark.
@@ -810,25 +1000,7 @@ class PreProcessor:
         >>> p._is_numeric("beef")
         False
         """
-        if "-" in token:
-            parts = token.split("-")
-            return all([self._is_numeric(part) for part in parts])
-
-        if token == "dozen":
-            return True
-
-        if token.endswith("x"):
-            try:
-                float(token[:-1])
-                return True
-            except ValueError:
-                return False
-
-        try:
-            float(token)
-            return True
-        except ValueError:
-            return False
+        return is_numeric_token(token)
 
     def _follows_comma(self, index: int) -> bool:
         """Return True if token at index follows a comma (by any amount) in sentence.
@@ -948,13 +1120,90 @@ class PreProcessor:
         """
         return token in AMBIGUOUS_UNITS
 
-    def _token_features(self, index: int) -> dict[str, str | bool]:
+    def _parentheses_mask(self) -> list[bool]:
+        """Return whether each token is inside parentheses or is a parenthesis.
+
+        This gives the same result as calling _is_inside_parentheses for each token,
+        but scans the sentence only once.
+        Like _is_inside_parentheses, the n-th opening parenthesis is paired with the
+        n-th closing parenthesis. The depth of each token, i.e. the number of pairs
+        that it is between, is accumulated from the start and end of each pair.
+
+        Returns
+        -------
+        list[bool]
+            True for each token inside parentheses or is a parenthesis, else False
+        """
+        open_parens, closed_parens = [], []
+        for i, token in enumerate(self.tokenized_sentence):
+            if token == "(" or token == "[":
+                open_parens.append(i)
+            elif token == ")" or token == "]":
+                closed_parens.append(i)
+
+        # Change in depth at each index
+        delta = [0] * (len(self.tokenized_sentence) + 1)
+        for start, end in zip(open_parens, closed_parens):
+            if start + 1 < end:
+                delta[start + 1] += 1
+                delta[end] -= 1
+
+        mask = []
+        depth = 0
+        for i, token in enumerate(self.tokenized_sentence):
+            depth += delta[i]
+            mask.append(depth > 0 or token in ["(", ")", "[", "]"])
+
+        return mask
+
+    def _token_attributes(self) -> list[tuple[str | bool, ...]]:
+        """Return the attributes of each token, used to build the token features.
+
+        Each attribute is computed once per token, so that building the features for
+        all tokens scales linearly with the length of the sentence.
+        Whether a token follows a comma or "plus" is tracked while walking through
+        the sentence, instead of searching all preceding tokens for every token.
+
+        Returns
+        -------
+        list[tuple[str | bool, ...]]
+            For each token, the values of the attributes listed in TOKEN_ATTRIBUTES
+        """
+        in_parens = self._parentheses_mask()
+        after_comma, after_plus = False, False
+
+        attributes = []
+        for index, token in enumerate(self._feature_tokens):
+            attributes.append(
+                (
+                    stem(token),
+                    self._is_capitalised(token),
+                    self._is_unit(token),
+                    self._is_punc(token),
+                    self._is_ambiguous_unit(token),
+                    in_parens[index],
+                    after_comma,
+                    after_plus,
+                )
+            )
+
+            # The token itself doesn't count as following a comma or "plus"
+            after_comma = after_comma or self.tokenized_sentence[index] == ","
+            after_plus = after_plus or self.tokenized_sentence[index] == "plus"
+
+        return attributes
+
+    def _token_features(
+        self, index: int, attributes: list[tuple[str | bool, ...]]
+    ) -> dict[str, str | bool]:
         """Return the features for each token in the sentence.
 
         Parameters
         ----------
         index : int
             Index of token to get features for.
+        attributes : list[tuple[str | bool, ...]]
+            Attributes of each token in the sentence, from _token_attributes
 
         Returns
         -------
@@ -962,39 +1211,40 @@ class PreProcessor:
             Dictionary of features for token at index
         """
         token = self._feature_tokens[index]
+        (
+            token_stem,
+            is_capitalised,
+            is_unit,
+            is_punc,
+            is_ambiguous,
+            is_in_parens,
+            is_after_comma,
+            is_after_plus,
+        ) = attributes[index]
         features = {
             "bias": "",
-            "stem": stem(token),
+            "stem": token_stem,
             "pos": self.pos_tags[index],
-            "is_capitalised": self._is_capitalised(token),
-            "is_unit": self._is_unit(token),
-            "is_punc": self._is_punc(token),
-            "is_ambiguous": self._is_ambiguous_unit(token),
-            "is_in_parens": self._is_inside_parentheses(index),
-            "is_after_comma": self._follows_comma(index),
-            "is_after_plus": self._follows_plus(index),
+            "is_capitalised": is_capitalised,
+            "is_unit": is_unit,
+            "is_punc": is_punc,
+            "is_ambiguous": is_ambiguous,
+            "is_in_parens": is_in_parens,
+            "is_after_comma": is_after_comma,
+            "is_after_plus": is_after_plus,
             "is_short_phrase": len(self.tokenized_sentence) < 3,
         }
 
-        if token != stem(token):
+        if token != token_stem:
             features["token"] = token
 
         if index > 0:
-            prev_token = self._feature_tokens[index - 1]
             features["prev_pos"] = "+".join(
                 (self.pos_tags[index - 1], self.pos_tags[index])
             )
-            features["prev_stem"] = stem(prev_token)
-            features["prev_is_capitalised"] = self._is_capitalised(prev_token)
-            features["prev_is_unit"] = self._is_unit(prev_token)
-            features["prev_is_punc"] = self._is_punc(prev_token)
-            features["prev_is_ambiguous"] = self._is_ambiguous_unit(prev_token)
-            features["prev_is_in_parens"] = self._is_inside_parentheses(index - 1)
-            features["prev_is_after_comma"] = self._follows_comma(index - 1)
-            features["prev_is_after_plus"] = self._follows_plus(index - 1)
+            features.update(zip(PREV_ATTRIBUTES, attributes[index - 1]))
 
         if index > 1:
-            prev_token2 = self._feature_tokens[index - 2]
             features["prev_pos2"] = "+".join(
                 (
                     self.pos_tags[index - 2],
@@ -1002,31 +1252,15 @@ class PreProcessor:
                     self.pos_tags[index],
                 )
             )
-            features["prev_stem2"] = stem(prev_token2)
-            features["prev_is_capitalised2"] = self._is_capitalised(prev_token2)
-            features["prev_is_unit2"] = self._is_unit(prev_token2)
-            features["prev_is_punc2"] = self._is_punc(prev_token2)
-            features["prev_is_ambiguous2"] = self._is_ambiguous_unit(prev_token2)
-            features["prev_is_in_parens2"] = self._is_inside_parentheses(index - 2)
-            features["prev_is_after_comma2"] = self._follows_comma(index - 2)
-            features["prev_is_after_plus2"] = self._follows_plus(index - 2)
+            features.update(zip(PREV2_ATTRIBUTES, attributes[index - 2]))
 
         if index < len(self._feature_tokens) - 1:
-            next_token = self._feature_tokens[index + 1]
             features["next_pos"] = "+".join(
                 (self.pos_tags[index], self.pos_tags[index + 1])
             )
-            features["next_stem"] = stem(next_token)
-            features["next_is_capitalised"] = self._is_capitalised(next_token)
-            features["next_is_unit"] = self._is_unit(next_token)
-            features["next_is_punc"] = self._is_punc(next_token)
-            features["next_is_ambiguous"] = self._is_ambiguous_unit(next_token)
-            features["next_is_in_parens"] = self._is_inside_parentheses(index + 1)
-            features["next_is_after_comma"] = self._follows_comma(index + 1)
-            features["next_is_after_plus"] = self._follows_plus(index + 1)
+            features.update(zip(NEXT_ATTRIBUTES, attributes[index + 1]))
 
         if index < len(self._feature_tokens) - 2:
-            next_token2 = self._feature_tokens[index + 2]
             features["next_pos2"] = "+".join(
                 (
                     self.pos_tags[index + 2],
@@ -1034,14 +1268,7 @@ class PreProcessor:
                     self.pos_tags[index],
                 )
             )
-            features["next_stem2"] = stem(next_token2)
-            features["next_is_capitalised2"] = self._is_capitalised(next_token2)
-            features["next_is_unit2"] = self._is_unit(next_token2)
-            features["next_is_punc2"] = self._is_punc(next_token2)
-            features["next_is_ambiguous2"] = self._is_ambiguous_unit(next_token2)
-            features["next_is_in_parens2"] = self._is_inside_parentheses(index + 2)
-            features["next_is_after_comma2"] = self._follows_comma(index + 2)
-            features["next_is_after_plus2"] = self._follows_plus(index + 2)
+            features.update(zip(NEXT2_ATTRIBUTES, attributes[index + 2]))
 
         return features
 
@@ -1057,8 +1284,106 @@ class PreProcessor:
             # If part of speech tagging was deferred, do it now
             self.pos_tags = self._tag_partofspeech(self.tokenized_sentence)
 
+        attributes = self._token_attributes()
+
         features = []
         for idx, _ in enumerate(self.tokenized_sentence):
-            features.append(self._token_features(idx))
+            features.append(self._token_features(idx, attributes))
 
         return features
+
+    def sentence_attributes(self) -> list[list[str]]:
+        """Return the features of all tokens in sentence as CRF attribute strings.
+
+        This gives the same features as sentence_features, in the same order, but
+        already encoded as the attribute strings pycrfsuite turns the features into
+        (see encode_token_attributes). pycrfsuite can use these directly instead of
+        converting a dict for every token, and the attributes of each token are
+        encoded once for all the windows they appear in.
+
+        Returns
+        -------
+        list[list[str]]
+            List of attribute strings for each token in sentence
+        """
+        if self.defer_pos_tagging:
+            # If part of speech tagging was deferred, do it now
+            self.pos_tags = self._tag_partofspeech(self.tokenized_sentence)
+
+        attributes = self._token_attributes()
+        encoded = [encode_token_attributes(attrs) for attrs in attributes]
+        pos = self.pos_tags
+        last = len(self._feature_tokens) - 1
+        short_phrase = ["is_short_phrase"] if len(self.tokenized_sentence) < 3 else []
+
+        sentence = []
+        for index, _ in enumerate(self.tokenized_sentence):
+            token = self._feature_tokens[index]
+            token_stem, flags = encoded[index][:2]
+
+            items = ["bias:", token_stem, f"pos:{pos[index]}", *flags, *short_phrase]
+            if token != attributes[index][0]:
+                items.append(f"token:{token}")
+
+            if index > 0:
+                items.append(f"prev_pos:{pos[index - 1]}+{pos[index]}")
+                items.extend(encoded[index - 1][2])
+
+            if index > 1:
+                items.append(
+                    f"prev_pos2:{pos[index - 2]}+{pos[index - 1]}+{pos[index]}"
+                )
+                items.extend(encoded[index - 2][3])
+
+            if index < last:
+                items.append(f"next_pos:{pos[index]}+{pos[index + 1]}")
+                items.extend(encoded[index + 1][4])
+
+            if index < last - 1:
+                items.append(
+                    f"next_pos2:{pos[index + 2]}+{pos[index + 1]}+{pos[index]}"
+                )
+                items.extend(encoded[index + 2][5])
+
+            sentence.append(items)
+
+        return sentence
+
+
+def preprocess_sentences(sentences: list[str]) -> list[PreProcessor]:
+    """Preprocess multiple sentences, tagging their part of speech in one batch.
+
+    Each sentence is preprocessed with part of speech tagging deferred, then the
+    tokens of all sentences are tagged in a single call to the part of speech
+    tagger, instead of one call per sentence.
+
+    Parameters
+    ----------
+    sentences : list[str]
+        List of ingredient sentences
+
+    Returns
+    -------
+    list[PreProcessor]
+        PreProcessor object for each sentence, with part of speech tags set
+
+    Examples
+    --------
+    >>> [p.pos_tags for p in preprocess_sentences(["1 cup milk", "2 eggs"])]
+    [['CD', 'NN', 'NN'], ['CD', 'NNS']]
+    """
+    processors = [
+        PreProcessor(sentence, defer_pos_tagging=True) for sentence in sentences
+    ]
+
+    # If we don't make each token lower case, that POS tag maybe different in
+    # ways that are unhelpful. For example, if a sentence starts with a unit.
+    tagged_sentences = get_pos_tagger().tag_sents(
+        [[t.lower() for t in p.tokenized_sentence] for p in processors]
+    )
+
+    for processor, tagged in zip(processors, tagged_sentences):
+        processor.pos_tags = processor._pos_tags(tagged)
+        processor.defer_pos_tagging = False
+
+    return processors
@@ -1,10 +1,46 @@
 #!/usr/bin/env python3
 
-from app.utils.ingredient_parser.en import inspect_parser_en, parse_ingredient_en
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import chain, islice, repeat
+from typing import Any, Iterable, Iterator
+
+from app.utils.ingredient_parser.en import (
+    inspect_parser_en,
+    parse_ingredient_en,
+    parse_multiple_ingredients_en,
+    preload_en,
+)
+from app.utils.ingredient_parser.en._utils import get_unit_registry
 
 from app.utils.ingredient_parser import SUPPORTED_LANGUAGES
+from app.utils.ingredient_parser._cache import (
+    PARSE_CACHE,
+    cache_key,
+    decode_parsed,
+    encode_parsed,
+)
 from app.utils.ingredient_parser.dataclasses import ParsedIngredient, ParserDebugInfo
 
+# Minimum number of sentences before parse_multiple_ingredients uses worker processes.
+# For fewer sentences, starting the workers and loading the model in each of them
+# takes longer than parsing the sentences in this process.
+MIN_PARALLEL_SENTENCES = 200
+
+# Number of chunks per worker when no chunksize is given, so that workers that finish
+# early can pick up more work.
+CHUNKS_PER_WORKER = 4
+
+# Number of sentences iter_parse_ingredients parses at a time when no chunksize is
+# given.
+STREAM_CHUNKSIZE = 100
+
+# Number of chunks iter_parse_ingredients keeps in flight per worker process when no
+# limit is given, so a worker can start on its next chunk while the results of its
+# previous chunk are consumed.
+IN_FLIGHT_CHUNKS_PER_WORKER = 2
+
 
 def parse_ingredient(
     sentence: str,
@@ -13,9 +49,13 @@ def parse_ingredient(
     expect_name_in_output: bool = True,
     string_units: bool = False,
     imperial_units: bool = False,
+    use_cache: bool = True,
 ) -> ParsedIngredient:
     """Parse an ingredient sentence to return structured data.
 
+    Parsed sentences are cached (see PARSE_CACHE), keyed by the sentence, the options
+    and the model, so repeated sentences are not parsed again.
+
     Parameters
     ----------
     sentence : str
@@ -42,6 +82,10 @@ def parse_ingredient(
         for the the following units: fluid ounce, cup, pint, quart, gallon.
         Default is False, which results in US customary units being used.
         This has no effect if string_units=True.
+    use_cache : bool, optional
+        If True, return the cached result if the sentence was parsed before with the
+        same options, and cache the result otherwise.
+        Default is True.
 
     Returns
     -------
@@ -51,9 +95,22 @@ def parse_ingredient(
     if lang not in SUPPORTED_LANGUAGES:
         raise ValueError(f'Unsupported language "{lang}"')
 
+    if use_cache:
+        key = cache_key(
+            sentence,
+            lang,
+            discard_isolated_stop_words,
+            expect_name_in_output,
+            string_units,
+            imperial_units,
+        )
+        cached = PARSE_CACHE.get(key)
+        if cached is not None:
+            return cached
+
     match lang:
         case "en":
-            return parse_ingredient_en(
+            parsed = parse_ingredient_en(
                 sentence,
                 discard_isolated_stop_words=discard_isolated_stop_words,
                 expect_name_in_output=expect_name_in_output,
@@ -63,6 +120,11 @@ def parse_ingredient(
         case _:
             raise ValueError(f'Unrecognised value "{lang}"')
 
+    if use_cache:
+        PARSE_CACHE.put(key, parsed)
+
+    return parsed
+
 
 def parse_multiple_ingredients(
     sentences: list[str],
@@ -71,14 +133,28 @@ def parse_multiple_ingredients(
     expect_name_in_output: bool = True,
     string_units: bool = False,
     imperial_units: bool = False,
+    workers: int | None = 1,
+    chunksize: int | None = None,
+    use_cache: bool = True,
 ) -> list[ParsedIngredient]:
     """Parse multiple ingredient sentences in one go.
 
     This function accepts a list of sentences, with element of the list representing
     one ingredient sentence.
     A list of dictionaries is returned, with optional confidence values.
-    This function is a simple for-loop that iterates through each element of the
-    input list.
+    The sentences are parsed in one batch, which gives the same result as calling
+    parse_ingredient for each sentence, but tags the part of speech of all sentences
+    in one go.
+
+    If more than one worker is requested, the sentences are parsed in chunks by a pool
+    of worker processes. Each worker loads the model and the part of speech tagger
+    once, when it starts. The results are returned in the same order as the input
+    sentences. If there are fewer than MIN_PARALLEL_SENTENCES sentences, they are
+    parsed in this process instead, because starting the workers would take longer
+    than parsing the sentences.
+
+    Sentences found in the parse cache (see PARSE_CACHE) are not parsed again and
+    each distinct sentence is only parsed once.
 
     Parameters
     ----------
@@ -106,6 +182,18 @@ def parse_multiple_ingredients(
         for the the following units: fluid ounce, cup, pint, quart, gallon.
         Default is False, which results in US customary units being used.
         This has no effect if string_units=True.
+    workers : int | None, optional
+        Number of worker processes to parse the sentences with.
+        If None, one worker per CPU is used.
+        Default is 1, which parses the sentences in this process.
+    chunksize : int | None, optional
+        Number of sentences sent to a worker process at a time.
+        If None, the sentences are split into CHUNKS_PER_WORKER chunks per worker.
+        This has no effect if the sentences are parsed in this process.
+    use_cache : bool, optional
+        If True, return the cached results of sentences that were parsed before with
+        the same options, and cache the other results.
+        Default is True.
 
     Returns
     -------
@@ -113,17 +201,377 @@ def parse_multiple_ingredients(
         List of ParsedIngredient objects of structured data parsed
         from input sentences
     """
-    return [
-        parse_ingredient(
-            sentence,
-            lang=lang,
-            discard_isolated_stop_words=discard_isolated_stop_words,
-            expect_name_in_output=expect_name_in_output,
-            string_units=string_units,
-            imperial_units=imperial_units,
+    if lang not in SUPPORTED_LANGUAGES:
+        raise ValueError(f'Unsupported language "{lang}"')
+
+    options = {
+        "lang": lang,
+        "discard_isolated_stop_words": discard_isolated_stop_words,
+        "expect_name_in_output": expect_name_in_output,
+        "string_units": string_units,
+        "imperial_units": imperial_units,
+    }
+
+    if not use_cache:
+        return _parse_sentences(sentences, options, workers, chunksize)
+
+    keys, results, missing = _lookup_cached(sentences, options)
+    parsed = _parse_sentences(missing, options, workers, chunksize)
+    return _merge_parsed(sentences, keys, results, dict(zip(missing, parsed)))
+
+
+def iter_parse_ingredients(
+    sentences: Iterable[str],
+    lang: str = "en",
+    discard_isolated_stop_words: bool = True,
+    expect_name_in_output: bool = True,
+    string_units: bool = False,
+    imperial_units: bool = False,
+    workers: int | None = 1,
+    chunksize: int | None = None,
+    max_in_flight: int | None = None,
+    use_cache: bool = True,
+) -> Iterator[ParsedIngredient]:
+    """Parse ingredient sentences lazily, yielding the results as they are produced.
+
+    The sentences are consumed from the iterable in chunks, e.g. from an open file or
+    a generator, so only a bounded number of sentences and results is held in memory
+    at any time, however many sentences there are. Each chunk is parsed like
+    parse_multiple_ingredients. A trailing newline is removed from each sentence, so
+    the lines of a file can be passed directly.
+
+    If more than one worker is requested, chunks are parsed by a pool of worker
+    processes. At most max_in_flight chunks are submitted to the workers before their
+    results are consumed. The results are yielded in the same order as the input
+    sentences.
+
+    Parameters
+    ----------
+    sentences : Iterable[str]
+        Sentences to parse
+    lang : str
+        Language of sentence.
+        Currently supported options are: en
+    discard_isolated_stop_words : bool, optional
+        If True, any isolated stop words in the name, preparation, or comment fields
+        are discarded.
+        Default is True.
+    expect_name_in_output : bool, optional
+        If True, if the model doesn't label any words in the sentence as the name,
+        fallback to selecting the most likely name from all tokens even though the
+        model gives it a different label. Note that this does guarantee the output
+        contains a name.
+        Default is True.
+    string_units : bool
+        If True, return all IngredientAmount units as strings.
+        If False, convert IngredientAmount units to pint.Unit objects where possible.
+        Default is False.
+    imperial_units : bool
+        If True, use imperial units instead of US customary units for pint.Unit objects
+        for the the following units: fluid ounce, cup, pint, quart, gallon.
+        Default is False, which results in US customary units being used.
+        This has no effect if string_units=True.
+    workers : int | None, optional
+        Number of worker processes to parse the sentences with.
+        If None, one worker per CPU is used.
+        Default is 1, which parses the sentences in this process.
+    chunksize : int | None, optional
+        Number of sentences parsed at a time.
+        Default is STREAM_CHUNKSIZE.
+    max_in_flight : int | None, optional
+        Maximum number of chunks submitted to the worker processes whose results have
+        not been yielded yet.
+        Default is IN_FLIGHT_CHUNKS_PER_WORKER chunks per worker.
+        This has no effect if the sentences are parsed in this process.
+    use_cache : bool, optional
+        If True, return the cached results of sentences that were parsed before with
+        the same options, and cache the other results.
+        Default is True.
+
+    Yields
+    ------
+    ParsedIngredient
+        ParsedIngredient object of structured data parsed from each input sentence
+
+    Examples
+    --------
+    >>> with open("ingredients.txt") as f:
+    ...     for parsed in iter_parse_ingredients(f, workers=4):
+    ...         print(parsed.name)
+    """
+    if lang not in SUPPORTED_LANGUAGES:
+        raise ValueError(f'Unsupported language "{lang}"')
+
+    options = {
+        "lang": lang,
+        "discard_isolated_stop_words": discard_isolated_stop_words,
+        "expect_name_in_output": expect_name_in_output,
+        "string_units": string_units,
+        "imperial_units": imperial_units,
+    }
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = STREAM_CHUNKSIZE
+    if max_in_flight is None:
+        max_in_flight = workers * IN_FLIGHT_CHUNKS_PER_WORKER
+
+    chunks = _chunked(
+        (sentence.removesuffix("\n") for sentence in sentences), chunksize
+    )
+
+    if workers <= 1:
+        for chunk in chunks:
+            yield from parse_multiple_ingredients(
+                chunk, **options, use_cache=use_cache
+            )
+        return
+
+    if not string_units:
+        # pint.Unit objects from the workers are unpickled into the Unit Registry,
+        # so make sure it exists before the first result comes back
+        get_unit_registry()
+
+    executor = ProcessPoolExecutor(
+        max_workers=workers, initializer=preload_parser, initargs=(lang,)
+    )
+    pending = deque()
+    try:
+        for chunk in chunks:
+            if use_cache:
+                keys, results, missing = _lookup_cached(chunk, options)
+            else:
+                keys, results, missing = None, [None] * len(chunk), chunk
+
+            future = None
+            if missing:
+                future = executor.submit(_parse_chunk, missing, options)
+            pending.append((chunk, keys, results, missing, future))
+
+            # Wait for the oldest chunk once the limit of chunks in flight is reached
+            while len(pending) >= max_in_flight:
+                yield from _collect_chunk(*pending.popleft())
+
+        while pending:
+            yield from _collect_chunk(*pending.popleft())
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def _collect_chunk(
+    chunk: list[str],
+    keys: list[str] | None,
+    results: list[ParsedIngredient | None],
+    missing: list[str],
+    future: Future | None,
+) -> list[ParsedIngredient]:
+    """Return the results of a chunk submitted by iter_parse_ingredients.
+
+    Parameters
+    ----------
+    chunk : list[str]
+        Sentences of the chunk
+    keys : list[str] | None
+        Cache key of each sentence, or None if the cache is not used
+    results : list[ParsedIngredient | None]
+        Cached result of each sentence, None if not cached
+    missing : list[str]
+        Sentences submitted to the worker processes
+    future : Future | None
+        Future of the results of the missing sentences, None if there are none
+
+    Returns
+    -------
+    list[ParsedIngredient]
+        List of ParsedIngredient objects, in the same order as the sentences
+    """
+    parsed = future.result() if future is not None else []
+    if keys is None:
+        return parsed
+
+    return _merge_parsed(chunk, keys, results, dict(zip(missing, parsed)))
+
+
+def _lookup_cached(
+    sentences: list[str], options: dict[str, Any]
+) -> tuple[list[str], list[ParsedIngredient | None], list[str]]:
+    """Look up sentences in the parse cache.
+
+    Parameters
+    ----------
+    sentences : list[str]
+        List of sentences
+    options : dict[str, Any]
+        Keyword arguments for parse_ingredient, including lang
+
+    Returns
+    -------
+    list[str]
+        Cache key of each sentence
+    list[ParsedIngredient | None]
+        Cached result of each sentence, None if not cached
+    list[str]
+        Distinct sentences that are not cached, which need to be parsed
+    """
+    keys = [cache_key(sentence, **options) for sentence in sentences]
+    results = [PARSE_CACHE.get(key) for key in keys]
+    missing = list(
+        dict.fromkeys(
+            sentence for sentence, result in zip(sentences, results) if result is None
+        )
+    )
+    return keys, results, missing
+
+
+def _merge_parsed(
+    sentences: list[str],
+    keys: list[str],
+    results: list[ParsedIngredient | None],
+    parsed: dict[str, ParsedIngredient],
+) -> list[ParsedIngredient]:
+    """Fill in the results of sentences that were not cached, and cache them.
+
+    Parameters
+    ----------
+    sentences : list[str]
+        List of sentences
+    keys : list[str]
+        Cache key of each sentence
+    results : list[ParsedIngredient | None]
+        Cached result of each sentence, None if not cached. This list is modified.
+    parsed : dict[str, ParsedIngredient]
+        Result of each sentence that was not cached
+
+    Returns
+    -------
+    list[ParsedIngredient]
+        List of ParsedIngredient objects, in the same order as the sentences
+    """
+    first_index = {}
+    new_entries = []
+    for i, (sentence, key) in enumerate(zip(sentences, keys)):
+        if results[i] is not None:
+            continue
+
+        if sentence not in first_index:
+            first_index[sentence] = i
+            results[i] = parsed[sentence]
+            new_entries.append((key, results[i]))
+        else:
+            # Repeated sentence in the input, return a copy of the first result
+            results[i] = decode_parsed(encode_parsed(results[first_index[sentence]]))
+
+    # Cache the whole batch at once, in a single transaction of the persistent tier
+    PARSE_CACHE.put_many(new_entries)
+
+    return results
+
+
+def _parse_sentences(
+    sentences: list[str],
+    options: dict[str, Any],
+    workers: int | None,
+    chunksize: int | None,
+) -> list[ParsedIngredient]:
+    """Parse sentences, in this process or with a pool of worker processes.
+
+    See parse_multiple_ingredients for when worker processes are used.
+
+    Parameters
+    ----------
+    sentences : list[str]
+        List of sentences to parse
+    options : dict[str, Any]
+        Keyword arguments for parse_ingredient, including lang
+    workers : int | None
+        Number of worker processes, None for one worker per CPU
+    chunksize : int | None
+        Number of sentences sent to a worker process at a time
+
+    Returns
+    -------
+    list[ParsedIngredient]
+        List of ParsedIngredient objects, in the same order as the sentences
+    """
+    string_units = options["string_units"]
+    lang = options["lang"]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1 or len(sentences) < MIN_PARALLEL_SENTENCES:
+        return _parse_chunk(sentences, options)
+
+    if chunksize is None:
+        chunksize = -(-len(sentences) // (workers * CHUNKS_PER_WORKER))
+
+    if not string_units:
+        # pint.Unit objects from the workers are unpickled into the Unit Registry,
+        # so make sure it exists before the first result comes back
+        get_unit_registry()
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=preload_parser, initargs=(lang,)
+    ) as executor:
+        results = executor.map(
+            _parse_chunk, _chunked(sentences, chunksize), repeat(options)
         )
-        for sentence in sentences
-    ]
+        return list(chain.from_iterable(results))
+
+
+def _parse_chunk(
+    sentences: list[str], options: dict[str, Any]
+) -> list[ParsedIngredient]:
+    """Parse a chunk of sentences in one batch in the current process.
+
+    This is the unit of work sent to worker processes by parse_multiple_ingredients.
+
+    Parameters
+    ----------
+    sentences : list[str]
+        List of sentences to parse
+    options : dict[str, Any]
+        Keyword arguments for parse_ingredient, including lang
+
+    Returns
+    -------
+    list[ParsedIngredient]
+        List of ParsedIngredient objects, in the same order as the sentences
+    """
+    options = dict(options)
+    lang = options.pop("lang")
+
+    match lang:
+        case "en":
+            return parse_multiple_ingredients_en(sentences, **options)
+        case _:
+            raise ValueError(f'Unrecognised value "{lang}"')
+
+
+def _chunked(sentences: Iterable[str], size: int) -> Iterator[list[str]]:
+    """Yield successive lists of size sentences.
+
+    Parameters
+    ----------
+    sentences : Iterable[str]
+        Sentences to split into chunks
+    size : int
+        Number of sentences per chunk. The last chunk may be smaller.
+
+    Yields
+    ------
+    list[str]
+        Chunk of sentences
+
+    Examples
+    --------
+    >>> list(_chunked(["a", "b", "c"], 2))
+    [["a", "b"], ["c"]]
+    """
+    iterator = iter(sentences)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
 
 
 def inspect_parser(
@@ -183,3 +631,31 @@ def inspect_parser(
             )
         case _:
             raise ValueError(f'Unrecognised value "{lang}"')
+
+
+def preload_parser(lang: str = "en") -> None:
+    """Load the resources used to parse sentences ahead of the first parse.
+
+    The model, part of speech tagger and unit registry are loaded lazily on the
+    first parse. Calling this function loads them immediately instead, for example
+    when an application starts, so the first request is not slowed down.
+
+    Parameters
+    ----------
+    lang : str
+        Language of the parser to load.
+        Currently supported options are: en
+
+    Raises
+    ------
+    ValueError
+        Raised if the language is not supported.
+    """
+    if lang not in SUPPORTED_LANGUAGES:
+        raise ValueError(f'Unsupported language "{lang}"')
+
+    match lang:
+        case "en":
+            preload_en()
+        case _:
+            raise ValueError(f'Unrecognised value "{lang}"')
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+# Upper bounds of the histogram buckets, in microseconds. Each bucket is twice as wide
+# as the previous one. Durations longer than the last bound are counted in a final
+# overflow bucket.
+HISTOGRAM_BOUNDS_US = tuple(2**i for i in range(21))
+
+# Profilers that are currently recording, see profile_parser.
+# Parsers only record timings if this list is not empty, so profiling costs nothing
+# when it is not enabled.
+ACTIVE_PROFILERS: list["ParserProfiler"] = []
+
+
+class StageStats:
+    """Statistics of the durations recorded for one stage of the parser.
+
+    Attributes
+    ----------
+    count : int
+        Number of recorded durations.
+    total : float
+        Sum of the recorded durations, in seconds.
+    min : float
+        Shortest recorded duration, in seconds.
+    max : float
+        Longest recorded duration, in seconds.
+    buckets : list[int]
+        Number of durations in each histogram bucket, see HISTOGRAM_BOUNDS_US.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.buckets = [0] * (len(HISTOGRAM_BOUNDS_US) + 1)
+
+    def add(self, seconds: float) -> None:
+        """Add a duration to the statistics.
+
+        Parameters
+        ----------
+        seconds : float
+            Duration in seconds
+        """
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        self.buckets[bisect_left(HISTOGRAM_BOUNDS_US, seconds * 1e6)] += 1
+
+    def export(self) -> dict[str, Any]:
+        """Return the statistics as a dictionary of plain values.
+
+        The histogram is cumulative, like a Prometheus histogram: each count is the
+        number of durations less than or equal to the bound, in microseconds. The
+        last bound is "+Inf".
+
+        Returns
+        -------
+        dict[str, Any]
+            Count, total, mean, minimum and maximum duration and histogram
+        """
+        cumulative = []
+        running = 0
+        for bucket in self.buckets:
+            running += bucket
+            cumulative.append(running)
+
+        return {
+            "count": self.count,
+            "total_seconds": self.total,
+            "mean_us": self.total / self.count * 1e6 if self.count else 0.0,
+            "min_us": self.min * 1e6 if self.count else 0.0,
+            "max_us": self.max * 1e6,
+            "histogram": {
+                "le_us": [*HISTOGRAM_BOUNDS_US, "+Inf"],
+                "counts": cumulative,
+            },
+        }
+
+
+class ParserProfiler:
+    """Recorder of the wall time spent in each stage of the parser.
+
+    Durations are aggregated per stage into a count, total and histogram (see
+    StageStats). Recording is thread safe, so one profiler can be shared by all
+    threads that parse sentences.
+
+    Parameters
+    ----------
+    callback : Callable[[str, float], None] | None, optional
+        Function called with the stage and duration in seconds of every recorded
+        duration, e.g. to forward timings to a metrics library.
+        Default is None.
+
+    Attributes
+    ----------
+    stages : dict[str, StageStats]
+        Statistics of each stage, in the order the stages were first recorded.
+    callback : Callable[[str, float], None] | None
+        Function called with every recorded duration.
+    """
+
+    def __init__(self, callback: Callable[[str, float], None] | None = None):
+        self.stages: dict[str, StageStats] = {}
+        self.callback = callback
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float) -> None:
+        """Record the duration of a stage.
+
+        Parameters
+        ----------
+        stage : str
+            Name of stage
+        seconds : float
+            Duration in seconds
+        """
+        with self._lock:
+            stats = self.stages.get(stage)
+            if stats is None:
+                stats = self.stages[stage] = StageStats()
+            stats.add(seconds)
+
+        if self.callback is not None:
+            self.callback(stage, seconds)
+
+    @contextmanager
+    def stage(self, stage: str) -> Iterator[None]:
+        """Record the duration of the code in the with block as a stage.
+
+        Parameters
+        ----------
+        stage : str
+            Name of stage
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def reset(self) -> None:
+        """Discard all recorded durations."""
+        with self._lock:
+            self.stages = {}
+
+    def export(self) -> dict[str, dict[str, Any]]:
+        """Return the statistics of each stage as a dictionary of plain values.
+
+        The result can be serialised as JSON. See StageStats.export for the
+        statistics of each stage.
+
+        Returns
+        -------
+        dict[str, dict[str, Any]]
+            Statistics of each stage
+        """
+        with self._lock:
+            return {stage: stats.export() for stage, stats in self.stages.items()}
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    """Record the duration of a stage with all active profilers.
+
+    Parameters
+    ----------
+    stage : str
+        Name of stage
+    seconds : float
+        Duration in seconds
+    """
+    for profiler in list(ACTIVE_PROFILERS):
+        profiler.record(stage, seconds)
+
+
+@contextmanager
+def timed_stage(stage: str) -> Iterator[None]:
+    """Record the duration of the code in the with block with all active profilers.
+
+    Parameters
+    ----------
+    stage : str
+        Name of stage
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start)
+
+
+@contextmanager
+def profile_parser(
+    profiler: ParserProfiler | None = None,
+) -> Iterator[ParserProfiler]:
+    """Record the time spent in each stage of the parser within the with block.
+
+    While the with block runs, every sentence parsed by parse_ingredient_en, in any
+    thread, records the duration of each stage with the profiler. Profilers can be
+    nested; durations are then recorded with all of them. Sentences served from the
+    parse cache are not parsed, so they record no durations.
+
+    Parameters
+    ----------
+    profiler : ParserProfiler | None, optional
+        Profiler to record the durations with, e.g. to keep aggregating durations
+        across multiple with blocks.
+        Default is None, which creates a new profiler.
+
+    Yields
+    ------
+    ParserProfiler
+        Profiler the durations are recorded with
+
+    Examples
+    --------
+    >>> with profile_parser() as profiler:
+    ...     parse_ingredient("2 cups flour", use_cache=False)
+    >>> profiler.export()["crf"]["count"]
+    1
+    """
+    if profiler is None:
+        profiler = ParserProfiler()
+
+    ACTIVE_PROFILERS.append(profiler)
+    try:
+        yield profiler
+    finally:
+        ACTIVE_PROFILERS.remove(profiler)
@@ -8,6 +8,8 @@ from werkzeug.utils import secure_filename
 from app.utils.data.load_nevo import from_csv
 from app.utils.data.load_fdc import fdc_from_csv
 from app.utils.data import allowed_file
+from app.utils.calc.resolve import RESOLVER
+from app.utils.calc.convertion import CONVERSIONS
 from app.utils.authentication import admin_required
 
 #--------------------
@@ -55,6 +57,8 @@ def update_nevo():
 
             # Process the CSV file and store data in the database
             from_csv(filepath)
+            RESOLVER.invalidate()
+            CONVERSIONS.invalidate()
 
             flash('File successfully uploaded and processed', category='success')
             current_app.logger.info(f'NEVO database succesfully updated by user {current_user.username}')
@@ -98,6 +102,8 @@ def update_fdc():
             res_files['food_nutrient'], 
             res_files['food_portion']
             )
+        RESOLVER.invalidate()
+        CONVERSIONS.invalidate()
 
         flash('Files successfully uploaded and processed', category='success')
         current_app.logger.info(f'FoodData Central database succesfully updated by user {current_user.username}')
@@ -0,0 +1,129 @@
+import json
+
+from flask import Blueprint, request, current_app
+
+from app.utils.ingredient_parser import PARSE_CACHE, encode_parsed, parse_ingredient, parse_multiple_ingredients
+
+#--------------------
+
+# Ingredient parser service, for scrapers and nutrition jobs in other processes to parse sentences without loading the parser themselves.
+# The routes are not authenticated, so only expose them to internal callers.
+parser = Blueprint('parser', __name__, url_prefix='/parse')
+
+# Options of parse_multiple_ingredients that callers can set, with their default value
+PARSE_OPTIONS = {
+    'discard_isolated_stop_words': True,
+    'expect_name_in_output': True,
+    'string_units': False,
+    'imperial_units': False,
+}
+
+# Version of the response format, see parse_batch
+RESPONSE_VERSION = 1
+
+
+def json_response(body: dict, status: int = 200):
+    """
+    This function returns a response with compact JSON, without the whitespace jsonify adds in debug mode
+
+    Arguments:
+        body (dict): The JSON body of the response
+        status (int): The HTTP status code
+
+    Returns:
+        flask.Response: The response
+    """
+    return current_app.response_class(json.dumps(body, separators=(',', ':')), status=status, mimetype='application/json')
+
+
+def read_batch() -> tuple[list[str], dict[str, bool]]:
+    """
+    This function reads the sentences and parse options of a batch request
+
+    The body is either JSON, {"lines": [...], "options": {...}}, or plain text with one sentence per line and the options
+    in the query string (e.g. ?string_units=true)
+
+    Returns:
+        tuple[list[str], dict[str, bool]]: The sentences and the parse options
+
+    Raises:
+        ValueError: If the body or the options are invalid
+    """
+    if request.is_json:
+        body = request.get_json(silent=True)
+        if not isinstance(body, dict) or not isinstance(body.get('lines'), list):
+            raise ValueError('The JSON body must be an object with a "lines" list')
+        lines = body['lines']
+        options = body.get('options', {})
+        if not isinstance(options, dict):
+            raise ValueError('"options" must be an object')
+    else:
+        lines = request.get_data(as_text=True).splitlines()
+        options = {name: value.lower() in ('true', '1') for name, value in request.args.items()}
+
+    if not all(isinstance(line, str) for line in lines):
+        raise ValueError('Every line must be a string')
+
+    unknown = set(options) - set(PARSE_OPTIONS)
+    if unknown:
+        raise ValueError(f'Unknown options: {", ".join(sorted(unknown))}')
+    if not all(isinstance(value, bool) for value in options.values()):
+        raise ValueError('Every option must be true or false')
+
+    return lines, PARSE_OPTIONS | options
+
+
+def parse_lines(lines: list[str], options: dict[str, bool]) -> tuple[list[list | None], list[dict]]:
+    """
+    This function parses the lines in one batch, falling back to parsing them one by one if the batch fails, so a single
+    sentence the parser cannot handle does not fail the whole request
+
+    Arguments:
+        lines (list[str]): The sentences to parse
+        options (dict[str, bool]): The parse options
+
+    Returns:
+        tuple[list[list | None], list[dict]]: The encoded parsed sentences (None for the sentences that failed) and the
+        index and message of each failed sentence
+    """
+    try:
+        return [encode_parsed(parsed) for parsed in parse_multiple_ingredients(lines, **options)], []
+    except Exception:
+        current_app.logger.exception('Parsing a batch of %d lines failed, parsing the lines one by one', len(lines))
+
+    results, errors = [], []
+    for index, line in enumerate(lines):
+        try:
+            results.append(encode_parsed(parse_ingredient(line, **options)))
+        except Exception as error:
+            results.append(None)
+            errors.append({'index': index, 'error': str(error)})
+    return results, errors
+
+
+# Parse a batch of ingredient sentences.
+# The sentences go through the batched tagging path and the parse cache. Each result is a parsed sentence in the compact
+# encoding of the parse cache, in the order of the lines, which callers decode with app.utils.ingredient_parser.decode_parsed.
+@parser.route('/batch', methods=['POST'])
+def parse_batch():
+    try:
+        lines, options = read_batch()
+    except ValueError as error:
+        return json_response({'error': str(error)}, 400)
+
+    max_lines = current_app.config['PARSER_SERVICE_MAX_LINES']
+    if len(lines) > max_lines:
+        return json_response({'error': f'At most {max_lines} lines can be parsed per request, got {len(lines)}'}, 413)
+
+    results, errors = parse_lines(lines, options)
+
+    body = {'version': RESPONSE_VERSION, 'options': options, 'results': results}
+    if errors:
+        body['errors'] = errors
+    return json_response(body)
+
+
+# Health check and statistics of the parse cache, e.g. for a load balancer
+@parser.route('/status', methods=['GET'])
+def status():
+    return json_response({'version': RESPONSE_VERSION, 'max_lines': current_app.config['PARSER_SERVICE_MAX_LINES'], 'cache': PARSE_CACHE.info()})
@@ -0,0 +1,82 @@
+import argparse
+import os
+import sys
+import time
+
+#--------------------
+
+# Make the app package importable when the script is run directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.calc.convertion import ConversionIndex, normalize_unit
+
+# Portion descriptions as they appear in FoodData Central, with parentheses, inch marks and undetermined units
+PORTION_DESCRIPTIONS = [
+    'slice (1 oz)', 'large (3" dia)', 'medium (2-1/2" dia)', 'small (2-1/4" dia)', 'extra large (3-1/4" dia)',
+    'cup (8 fl oz)', 'package (10 oz)', 'bar (2.2 oz)', 'container (6 oz)', 'can (12 fl oz)', 'fl oz', 'tbsp', 'tsp',
+    'cup, chopped', 'cup, sliced', 'cup (1" pieces)', 'cup, chopped or diced', 'piece (1" cube)', 'cubic inch',
+    'slice, thin (approx 2" x 1-1/2" x 1/8")', 'stalk, medium (7-1/2" - 8" long)', 'wedge (1/8 of 12" dia)',
+    'spear (about 5" long or 1/2" dia)', 'oz, with bone (yield after bone removed)', 'cup, whole (2" pieces',
+    'medium (7" to 7-7/8" long)', "large (8'' to 8-3/4'' long)", 'NLEA serving', 'Quantity not specified',
+    'undetermined', 'undetermined (1 oz)', 'serving (2 tbsp)', '1 cup', '1/2 cup', '',
+]
+
+# Portions as returned by the FDC API, the unit is often "undetermined" with the unit in the description
+API_PORTIONS = [
+    {'amount': 1.0, 'unit': 'undetermined', 'portionDescription': 'slice (1 oz)', 'modifier': None, 'gramWeight': 28.0},
+    {'amount': 1.0, 'unit': 'undetermined', 'portionDescription': 'large (3" dia)', 'modifier': None, 'gramWeight': 223.0},
+    {'amount': 1.0, 'unit': 'cup', 'portionDescription': None, 'modifier': 'chopped', 'gramWeight': 128.0},
+    {'amount': 2.0, 'unit': 'undetermined', 'portionDescription': 'tbsp', 'modifier': None, 'gramWeight': 30.0},
+    {'amount': 1.0, 'unit': 'undetermined', 'portionDescription': 'Quantity not specified', 'modifier': None, 'gramWeight': 50.0},
+    {'amount': 1.0, 'unit': 'undetermined', 'portionDescription': 'undetermined', 'modifier': None, 'gramWeight': 10.0},
+    {'amount': 1.0, 'unit': None, 'portionDescription': 'stalk, medium (7-1/2" - 8" long)', 'modifier': None, 'gramWeight': 40.0},
+]
+
+
+def main() -> int:
+    """
+    This function checks FDC portion descriptions are normalised and added to a conversion index without errors and times the normalisation
+
+    Returns:
+        int: The exit code, 1 if any portion description raises an error, otherwise 0
+    """
+    parser = argparse.ArgumentParser(description="Check and benchmark of the unit normalisation of FDC portion descriptions")
+    parser.add_argument('--rounds', type=int, default=1000, help="Number of rounds over the portion descriptions, the fastest one is reported")
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'portion description':>45}  {'unit':<15}  plain")
+    for description in PORTION_DESCRIPTIONS:
+        try:
+            unit, plain = normalize_unit(description)
+            ConversionIndex().add(1, 1.0, description, 100.0)
+        except Exception as error:
+            failures.append((description, error))
+            continue
+        print(f"{description!r:>45}  {unit!r:<15}  {plain}")
+
+    try:
+        index = ConversionIndex.from_portions(1, API_PORTIONS)
+        print(f"\nIndexed {len(index)} gram factors from {len(API_PORTIONS)} API portions")
+    except Exception as error:
+        failures.append(('API portions', error))
+
+    # Time the normalisation itself, not the cache in front of it
+    fastest = float('inf')
+    for _ in range(args.rounds):
+        start = time.perf_counter()
+        for description in PORTION_DESCRIPTIONS:
+            normalize_unit.__wrapped__(description)
+        fastest = min(fastest, time.perf_counter() - start)
+    print(f"Normalised {len(PORTION_DESCRIPTIONS)} portion descriptions in {fastest / len(PORTION_DESCRIPTIONS) * 1e6:.2f} us each")
+
+    for description, error in failures:
+        print(f"  {description!r}: {type(error).__name__}: {error}")
+    if failures:
+        print("FAIL: a portion description raises an error")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,143 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+#--------------------
+
+# Make the app package importable when the script is run directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.ingredient_parser.en import PreProcessor
+from app.utils.ingredient_parser.en._tagger import TAGGERS
+from app.utils.ingredient_parser.en.parser import preload_en
+
+# Corpus of ingredient sentences, one per line, shared with the parser benchmark
+CORPUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app', 'utils', 'ingredient_parser', 'benchmark', 'corpus.txt')
+
+# Short sentences, which get the is_short_phrase feature and have incomplete feature windows
+EDGE_CASES = ['', 'salt', 'Salt', '1 cup', 'salt and pepper', '2 x 3', '( )', 'to taste', '1, 2']
+
+
+def load_sentences(fuzz: int, seed: int) -> list[str]:
+    """
+    This function loads the corpus and adds the edge cases and random sentences made from the words of the corpus
+
+    Arguments:
+        fuzz (int): The number of random sentences
+        seed (int): The seed of the random generator, so failures can be reproduced
+
+    Returns:
+        list[str]: The sentences to check
+    """
+    with open(CORPUS, encoding='utf-8') as file:
+        corpus = [line.strip() for line in file if line.strip()]
+
+    rng = random.Random(seed)
+    words = sorted({word for sentence in corpus for word in sentence.split()})
+    fuzzed = [' '.join(rng.choice(words) for _ in range(rng.randint(1, 12))) for _ in range(fuzz)]
+    return corpus + EDGE_CASES + [sentence.upper() for sentence in corpus] + fuzzed
+
+
+def encode_features(features: list[dict[str, str | bool]]) -> list[list[str]]:
+    """
+    This function encodes the feature dicts the way pycrfsuite does, leaving out features with a False (zero weight) value
+
+    Arguments:
+        features (list[dict[str, str | bool]]): The features of each token, from PreProcessor.sentence_features
+
+    Returns:
+        list[list[str]]: The attribute strings of each token
+    """
+    return [[f"{name}:{value}" if isinstance(value, str) else name for name, value in token.items() if value is not False] for token in features]
+
+
+def check_sentence(sentence: str) -> list[str]:
+    """
+    This function checks the attribute path gives the same attributes, labels and marginal probabilities as the dict path
+
+    Arguments:
+        sentence (str): The ingredient sentence to check
+
+    Returns:
+        list[str]: The description of each difference, empty if the paths are identical
+    """
+    processor = PreProcessor(sentence)
+    features = processor.sentence_features()
+    attributes = processor.sentence_attributes()
+
+    differences = []
+    if encode_features(features) != attributes:
+        differences.append("attributes differ")
+
+    by_dict = TAGGERS.tag(features, full_marginals=True)
+    by_attributes = TAGGERS.tag(attributes, full_marginals=True)
+    if by_dict.labels != by_attributes.labels:
+        differences.append(f"labels {by_dict.labels} != {by_attributes.labels}")
+    elif by_dict.marginals != by_attributes.marginals:
+        differences.append("marginal probabilities differ")
+
+    return differences
+
+
+def time_path(processors: list[PreProcessor], method: str, rounds: int) -> float:
+    """
+    This function measures how long it takes to build the features of all sentences and tag them
+
+    Arguments:
+        processors (list[PreProcessor]): The preprocessed sentences
+        method (str): The PreProcessor method that builds the features, sentence_features or sentence_attributes
+        rounds (int): The number of times all sentences are tagged, the fastest round is reported
+
+    Returns:
+        float: The fastest time per sentence in microseconds
+    """
+    fastest = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for processor in processors:
+            TAGGERS.tag(getattr(processor, method)())
+        fastest = min(fastest, time.perf_counter() - start)
+
+    return fastest / len(processors) * 1e6
+
+
+def main() -> int:
+    """
+    This function checks the CRF attribute strings give identical labels to the feature dicts and compares their speed
+
+    Returns:
+        int: The exit code, 1 if any sentence is tagged differently, otherwise 0
+    """
+    parser = argparse.ArgumentParser(description="A/B check and benchmark of tagging with CRF attribute strings against feature dicts")
+    parser.add_argument('--rounds', type=int, default=10, help="Number of rounds over the corpus, the fastest one is reported")
+    parser.add_argument('--fuzz', type=int, default=2000, help="Number of random sentences added to the check")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the random sentences")
+    args = parser.parse_args()
+
+    preload_en()
+    sentences = load_sentences(args.fuzz, args.seed)
+
+    failures = [(sentence, differences) for sentence in sentences if (differences := check_sentence(sentence))]
+    print(f"Identical: {len(sentences) - len(failures)}/{len(sentences)} sentences")
+    for sentence, differences in failures:
+        print(f"  {sentence!r}: {'; '.join(differences)}")
+
+    processors = [PreProcessor(sentence) for sentence in sentences if sentence]
+    dict_time = time_path(processors, 'sentence_features', args.rounds)
+    attributes_time = time_path(processors, 'sentence_attributes', args.rounds)
+
+    print(f"\n{'features + crf':>16}  {'us/sentence':>12}")
+    print(f"{'dicts':>16}  {dict_time:>12.2f}")
+    print(f"{'attributes':>16}  {attributes_time:>12.2f}")
+    print(f"\nSpeed up: {dict_time / attributes_time:.2f}x")
+
+    if failures:
+        print("FAIL: the attribute strings change the output of the model")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,70 @@
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+from itertools import islice, cycle
+
+#--------------------
+
+# Make the app package importable when the script is run directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.ingredient_parser import parse_multiple_ingredients
+from app.utils.ingredient_parser.dataclasses import ParsedBatch
+
+# Corpus of ingredient sentences, one per line, shared with the parser benchmark
+CORPUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app', 'utils', 'ingredient_parser', 'benchmark', 'corpus.txt')
+
+
+def traced_memory() -> int:
+    """
+    This function returns the memory currently allocated since tracing started, after collecting garbage
+
+    Returns:
+        int: The allocated memory in bytes
+    """
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def main() -> int:
+    """
+    This function measures the memory used by parsed sentences, kept as ParsedIngredient objects and as a ParsedBatch
+
+    Returns:
+        int: The exit code, always 0
+    """
+    parser = argparse.ArgumentParser(description="Measure the memory used by parsed ingredient sentences")
+    parser.add_argument('--lines', type=int, default=100_000, help="Number of parsed sentences, taken from the corpus in turn")
+    args = parser.parse_args()
+
+    with open(CORPUS, encoding='utf-8') as file:
+        corpus = [line.strip() for line in file if line.strip()]
+    lines = list(islice(cycle(corpus), args.lines))
+
+    # Parse the corpus once, so the parser resources and the parse cache are not part of the measurement.
+    # Repeated sentences are then served from the cache, each as a new ParsedIngredient object.
+    parse_multiple_ingredients(corpus)
+
+    tracemalloc.start()
+    start = traced_memory()
+
+    parsed = parse_multiple_ingredients(lines)
+    objects = traced_memory() - start
+
+    batch = ParsedBatch.from_parsed(parsed)
+    del parsed
+    columnar = traced_memory() - start
+
+    tracemalloc.stop()
+
+    print(f"Parsed sentences: {len(batch)}")
+    print(f"{'':>20}  {'MB':>8}  {'bytes/line':>10}")
+    print(f"{'ParsedIngredient':>20}  {objects / 1e6:>8.1f}  {objects / len(batch):>10.0f}")
+    print(f"{'ParsedBatch':>20}  {columnar / 1e6:>8.1f}  {columnar / len(batch):>10.0f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,219 @@
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+#--------------------
+
+# Make the app package importable when the script is run directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.ingredient_parser.en import PreProcessor
+from app.utils.ingredient_parser.en._constants import FLATTENED_UNITS_LIST, STRING_NUMBERS, STRING_NUMBERS_REGEXES, UNICODE_FRACTIONS
+
+# Corpus of ingredient sentences, one per line, shared with the parser benchmark
+CORPUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app', 'utils', 'ingredient_parser', 'benchmark', 'corpus.txt')
+
+# Sentences that trigger edge cases of the normalisation stages, checked in addition to the corpus
+EDGE_CASES = [
+    '',
+    ' ',
+    'one-half',
+    'One-Half cup milk',
+    'one-one cup',
+    'two-two',
+    'one-cup measure and one-tsp',
+    'someone brought two',
+    'ONE TWO THREE',
+    'seventeen-seventeen',
+    '--½ cup',
+    '-½-¼',
+    '½½',
+    '1⁄2⁄3 cup',
+    '&amp; 1 &frac14; cup',
+    '&',
+    '. x . x',
+    '. g - . g',
+    'x 2 x 3 X',
+    '1 and 1/2 and 1/3 cup',
+    'tsp.. tb.. lb.s.',
+    '1 to to 2 or or 3',
+    '1 -- 2 - - 3',
+    '5- or 6- large apples',
+    '—–—–',
+    '1 Cup To 2 Cup sugar',
+    '100 g TO 200 g sugar',
+    '100 g OR 200 g sugar',
+    '1 TSP Or 2 TSP salt',
+    '2 cups tO 3 cups flour',
+    '1 Lb - 2 Lb beef',
+]
+
+
+class SequentialPreProcessor(PreProcessor):
+    """
+    This class normalises sentences the way PreProcessor did before the normalisation pipeline, as the reference for the equivalence check
+    """
+
+    def _normalise(self, sentence: str) -> str:
+        funcs = [
+            self._replace_en_em_dash,
+            self._replace_string_numbers,
+            self._replace_html_fractions,
+            self._replace_unicode_fractions,
+            self._combine_quantities_split_by_and,
+            self._replace_fake_fractions,
+            self._split_quantity_and_units,
+            self._remove_unit_trailing_period,
+            self._replace_string_range,
+            self._replace_dupe_units_ranges,
+            self._merge_quantity_x,
+            self._collapse_ranges,
+        ]
+
+        for func in funcs:
+            sentence = func(sentence)
+
+        return sentence.strip()
+
+    def _replace_string_numbers(self, sentence: str) -> str:
+        for regex, substitution in STRING_NUMBERS_REGEXES.values():
+            for match in regex.finditer(sentence):
+                if self._valid_string_number_replacement(match, sentence):
+                    sentence = regex.sub(rf"{substitution}", sentence)
+
+        return sentence
+
+    def _valid_string_number_replacement(self, match: re.Match, sentence: str) -> bool:
+        next_char_idx = match.span()[-1]
+        if next_char_idx >= len(sentence) or sentence[next_char_idx] != "-":
+            return True
+
+        sub_sentence = sentence[next_char_idx + 1 :]
+        units_and_numbers = FLATTENED_UNITS_LIST + list(STRING_NUMBERS.keys())
+        for unit_or_num in units_and_numbers:
+            if sub_sentence.startswith(unit_or_num + " "):
+                return True
+
+        return False
+
+    def _replace_unicode_fractions(self, sentence: str) -> str:
+        for f_unicode, f_ascii in UNICODE_FRACTIONS.items():
+            sentence = sentence.replace(f_unicode, f_ascii)
+
+        return sentence
+
+
+def load_sentences() -> list[str]:
+    """
+    This function loads the corpus and adds the edge cases and upper, lower and title case variants of every sentence
+
+    Returns:
+        list[str]: The sentences to normalise
+    """
+    with open(CORPUS, encoding='utf-8') as file:
+        corpus = [line.rstrip('\n') for line in file if line.strip()]
+
+    sentences = corpus + EDGE_CASES
+    return sentences + [variant(sentence) for variant in (str.upper, str.lower, str.title) for sentence in sentences]
+
+
+def fuzz_sentences(sentences: list[str], count: int, seed: int) -> list[str]:
+    """
+    This function builds random sentences from the words and characters of the given sentences, to check combinations the corpus does not contain
+
+    Arguments:
+        sentences (list[str]): The sentences to take the words and characters from
+        count (int): The number of random sentences
+        seed (int): The seed of the random generator, so failures can be reproduced
+
+    Returns:
+        list[str]: The random sentences
+    """
+    rng = random.Random(seed)
+    words = sorted({word for sentence in sentences for word in sentence.split()})
+    characters = sorted({character for sentence in sentences for character in sentence})
+    # Range connectors in mixed case, as the range stages match them in any case
+    separators = [' ', ' ', ' ', '', '-', ' - ', ' to ', ' TO ', ' Or ']
+
+    fuzzed = []
+    for _ in range(count):
+        parts = [rng.choice(words) if rng.random() < 0.8 else rng.choice(characters) for _ in range(rng.randint(1, 10))]
+        fuzzed.append(''.join(part + rng.choice(separators) for part in parts))
+    return fuzzed
+
+
+def time_normalise(processor: PreProcessor, sentences: list[str], rounds: int) -> float:
+    """
+    This function measures how long it takes to normalise all sentences
+
+    Arguments:
+        processor (PreProcessor): The processor whose _normalise method is measured
+        sentences (list[str]): The sentences to normalise
+        rounds (int): The number of times all sentences are normalised, the fastest round is reported
+
+    Returns:
+        float: The fastest time per sentence in microseconds
+
+    Raises:
+        None
+    """
+    fastest = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for sentence in sentences:
+            processor._normalise(sentence)
+        fastest = min(fastest, time.perf_counter() - start)
+
+    return fastest / len(sentences) * 1e6
+
+
+def main() -> int:
+    """
+    This function checks the normalisation pipeline gives the same output as the sequential stages and compares their speed
+
+    Returns:
+        int: The exit code, 1 if any sentence is normalised differently or the speed up is too small, otherwise 0
+    """
+    parser = argparse.ArgumentParser(description="Check and benchmark the PreProcessor normalisation pipeline against the sequential stages")
+    parser.add_argument('--rounds', type=int, default=10, help="Number of rounds over the corpus, the fastest one is reported")
+    parser.add_argument('--fuzz', type=int, default=5000, help="Number of random sentences added to the equivalence check")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the random sentences")
+    parser.add_argument('--min-speedup', type=float, default=1.0, help="Minimum required speed up of the pipeline over the sequential stages")
+    args = parser.parse_args()
+
+    sentences = load_sentences()
+    pipeline = PreProcessor('', defer_pos_tagging=True)
+    sequential = SequentialPreProcessor('', defer_pos_tagging=True)
+
+    failed = False
+
+    checked = sentences + fuzz_sentences(sentences, args.fuzz, args.seed)
+    mismatches = [(sentence, expected, actual) for sentence in checked if (expected := sequential._normalise(sentence)) != (actual := pipeline._normalise(sentence))]
+    print(f"Equivalence: {len(checked) - len(mismatches)}/{len(checked)} sentences normalised identically")
+    for sentence, expected, actual in mismatches:
+        print(f"  {sentence!r}\n    expected {expected!r}\n    got      {actual!r}")
+    if mismatches:
+        print("FAIL: the normalisation pipeline changes the output")
+        failed = True
+
+    sequential_time = time_normalise(sequential, sentences, args.rounds)
+    pipeline_time = time_normalise(pipeline, sentences, args.rounds)
+    speedup = sequential_time / pipeline_time
+
+    print(f"\n{'':>12}  {'us/sentence':>12}")
+    print(f"{'sequential':>12}  {sequential_time:>12.2f}")
+    print(f"{'pipeline':>12}  {pipeline_time:>12.2f}")
+    print(f"\nSpeed up: {speedup:.2f}x (required {args.min_speedup:.2f}x)")
+
+    if speedup < args.min_speedup:
+        print("FAIL: the normalisation pipeline is not fast enough")
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,87 @@
+import argparse
+import os
+import sys
+import time
+
+#--------------------
+
+# Make the app package importable when the script is run directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.ingredient_parser.en import PostProcessor
+
+# Labelled phrase with composite amounts ("1 lb 2 oz", "2 cups plus 1 tablespoon"), a sizable unit ("1 28 ounce can"),
+# approximate and singular amounts, repeated to build sentences of increasing length
+PHRASE = [
+    ('1', 'QTY'), ('lb', 'UNIT'), ('2', 'QTY'), ('oz', 'UNIT'), ('beef', 'NAME'), (',', 'PUNC'),
+    ('2', 'QTY'), ('cups', 'UNIT'), ('plus', 'COMMENT'), ('1', 'QTY'), ('tablespoon', 'UNIT'), ('flour', 'NAME'),
+    ('1', 'QTY'), ('28', 'QTY'), ('ounce', 'UNIT'), ('can', 'UNIT'), ('tomatoes', 'NAME'),
+    ('about', 'COMMENT'), ('3', 'QTY'), ('oz', 'UNIT'), ('each', 'COMMENT'),
+    ('finely', 'PREP'), ('chopped', 'PREP'), ('(', 'PUNC'), ('optional', 'COMMENT'), (')', 'PUNC'),
+    ('large', 'SIZE'), ('for', 'PURPOSE'), ('serving', 'PURPOSE'), (',', 'PUNC'),
+]
+
+# Number of times the phrase is repeated for each measured sentence
+REPEATS = [1, 4, 16, 64]
+
+
+def time_postprocess(repeats: int, rounds: int, string_units: bool) -> tuple[int, float]:
+    """
+    This function measures how long it takes to postprocess a sentence made of the repeated phrase
+
+    Arguments:
+        repeats (int): The number of times the phrase is repeated
+        rounds (int): The number of times the sentence is postprocessed, the fastest round is reported
+        string_units (bool): Whether units are kept as strings instead of converted to pint units
+
+    Returns:
+        tuple[int, float]: The number of tokens and the fastest time per token in microseconds
+
+    Raises:
+        None
+    """
+    tokens = [token for token, _ in PHRASE] * repeats
+    labels = [label for _, label in PHRASE] * repeats
+    scores = [0.9] * len(tokens)
+    sentence = ' '.join(tokens)
+
+    fastest = float('inf')
+    for _ in range(rounds):
+        processor = PostProcessor(sentence, list(tokens), list(labels), list(scores), string_units=string_units)
+        start = time.perf_counter()
+        processor.parsed
+        fastest = min(fastest, time.perf_counter() - start)
+
+    return (len(tokens), fastest / len(tokens) * 1e6)
+
+
+def main() -> int:
+    """
+    This function measures the postprocessing time per token for increasingly long sentences with composite amounts
+
+    Returns:
+        int: The exit code, 1 if the time per token grows more than the allowed factor, otherwise 0
+    """
+    parser = argparse.ArgumentParser(description="Check that PostProcessor scales linearly with the length of sentences with composite amounts")
+    parser.add_argument('--rounds', type=int, default=10, help="Number of rounds per sentence, the fastest one is reported")
+    parser.add_argument('--string-units', action='store_true', help="Keep units as strings, leaving out the pint unit conversion")
+    parser.add_argument('--max-growth', type=float, default=1.5, help="Maximum allowed growth of the time per token between the shortest and longest sentence")
+    args = parser.parse_args()
+
+    results = [time_postprocess(repeats, args.rounds, args.string_units) for repeats in REPEATS]
+
+    print(f"{'tokens':>8}  {'us/token':>10}")
+    for tokens, per_token in results:
+        print(f"{tokens:>8}  {per_token:>10.2f}")
+
+    growth = results[-1][1] / results[0][1]
+    print(f"\nGrowth of time per token: {growth:.2f}x (allowed {args.max_growth:.2f}x)")
+
+    if growth > args.max_growth:
+        print("FAIL: postprocessing does not scale linearly with the sentence length")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+import argparse
+import gc
+import json
+import os
+import sys
+
+#--------------------
+
+# Make the app package importable when the script is run directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.ingredient_parser import parse_multiple_ingredients, preload_parser
+
+# Corpus of ingredient sentences, one per line, shared with the parser benchmark
+CORPUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app', 'utils', 'ingredient_parser', 'benchmark', 'corpus.txt')
+
+
+def memory_usage() -> dict[str, float]:
+    """
+    This function returns the memory used by the current process, read from /proc/self/smaps_rollup (Linux only)
+
+    Returns:
+        dict[str, float]: The resident (rss), proportional (pss) and private (uss) memory in MB
+    """
+    with open('/proc/self/smaps_rollup', encoding='utf-8') as file:
+        fields = {line.split(':')[0]: int(line.split()[1]) for line in file if line.endswith('kB\n')}
+
+    return {
+        'rss': fields['Rss'] / 1024,
+        'pss': fields['Pss'] / 1024,
+        'uss': (fields['Private_Clean'] + fields['Private_Dirty']) / 1024,
+    }
+
+
+def run_worker(sentences: list[str], report: int, release: int) -> None:
+    """
+    This function runs in a forked worker: it parses the sentences like a worker serving requests, reports its memory and
+    waits until all workers have reported, so the shared pages are divided between all of them
+
+    Arguments:
+        sentences (list[str]): The sentences to parse
+        report (int): The file descriptor to write the memory report to
+        release (int): The file descriptor that is closed by the master when all workers have reported
+
+    Returns:
+        None
+    """
+    parse_multiple_ingredients(sentences, use_cache=False)
+    os.write(report, (json.dumps(memory_usage()) + '\n').encode())
+    os.read(release, 1)
+
+
+def main() -> int:
+    """
+    This function forks workers like gunicorn does, with or without preloading the parser in the master, and reports the
+    memory used by each worker after parsing the corpus
+
+    Returns:
+        int: The exit code, always 0
+    """
+    parser = argparse.ArgumentParser(description="Measure the memory of forked workers with and without the parser preloaded in the master (Linux only)")
+    parser.add_argument('--workers', type=int, default=4, help="Number of forked workers")
+    parser.add_argument('--preload', action='store_true', help="Preload the parser in the master before forking, as with PRELOAD_INGREDIENT_PARSER")
+    args = parser.parse_args()
+
+    with open(CORPUS, encoding='utf-8') as file:
+        sentences = [line.strip() for line in file if line.strip()]
+
+    if args.preload:
+        preload_parser()
+        gc.freeze()
+
+    report_read, report_write = os.pipe()
+    release_read, release_write = os.pipe()
+
+    pids = []
+    for _ in range(args.workers):
+        pid = os.fork()
+        if pid == 0:
+            os.close(report_read)
+            os.close(release_write)
+            run_worker(sentences, report_write, release_read)
+            os._exit(0)
+        pids.append(pid)
+
+    os.close(report_write)
+    os.close(release_read)
+    with os.fdopen(report_read) as reports:
+        workers = [json.loads(next(reports)) for _ in pids]
+    os.close(release_write)
+    for pid in pids:
+        os.waitpid(pid, 0)
+
+    print(f"Parser preloaded in master: {args.preload}")
+    print(f"{'worker':>8}  {'RSS MB':>8}  {'PSS MB':>8}  {'USS MB':>8}")
+    for index, memory in enumerate(workers):
+        print(f"{index:>8}  {memory['rss']:>8.1f}  {memory['pss']:>8.1f}  {memory['uss']:>8.1f}")
+    print(f"{'total':>8}  {sum(m['rss'] for m in workers):>8.1f}  {sum(m['pss'] for m in workers):>8.1f}  {sum(m['uss'] for m in workers):>8.1f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
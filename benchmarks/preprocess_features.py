@@ -0,0 +1,77 @@
+import argparse
+import os
+import sys
+import time
+
+#--------------------
+
+# Make the app package importable when the script is run directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.ingredient_parser.en import PreProcessor
+
+# Phrase repeated to build ingredient sentences of increasing length
+PHRASE = "2 cups (500 ml) warm milk, plus 1 tbsp Butter, cloves [optional]"
+
+# Number of times the phrase is repeated for each measured sentence
+REPEATS = [1, 4, 16, 64]
+
+
+def time_features(sentence: str, rounds: int) -> tuple[int, float]:
+    """
+    This function measures how long it takes to build the token features of a sentence
+
+    Arguments:
+        sentence (str): The ingredient sentence
+        rounds (int): The number of times the features are built, the fastest round is reported
+
+    Returns:
+        tuple[int, float]: The number of tokens and the fastest time per token in microseconds
+
+    Raises:
+        None
+    """
+    # Part of speech tagging is not part of the measurement, so use fixed tags
+    processor = PreProcessor(sentence, defer_pos_tagging=True)
+    processor.defer_pos_tagging = False
+    processor.pos_tags = ['NN'] * len(processor.tokenized_sentence)
+
+    tokens = len(processor.tokenized_sentence)
+    fastest = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        processor.sentence_features()
+        fastest = min(fastest, time.perf_counter() - start)
+
+    return (tokens, fastest / tokens * 1e6)
+
+
+def main() -> int:
+    """
+    This function measures the feature time per token for increasingly long sentences and checks it stays constant
+
+    Returns:
+        int: The exit code, 1 if the time per token grows more than the allowed factor, otherwise 0
+    """
+    parser = argparse.ArgumentParser(description="Check that PreProcessor.sentence_features() scales linearly with the sentence length")
+    parser.add_argument('--rounds', type=int, default=20, help="Number of rounds per sentence, the fastest one is reported")
+    parser.add_argument('--max-growth', type=float, default=3.0, help="Maximum allowed growth of the time per token between the shortest and longest sentence")
+    args = parser.parse_args()
+
+    results = [time_features(' '.join([PHRASE] * repeats), args.rounds) for repeats in REPEATS]
+
+    print(f"{'tokens':>8}  {'us/token':>10}")
+    for tokens, per_token in results:
+        print(f"{tokens:>8}  {per_token:>10.2f}")
+
+    growth = results[-1][1] / results[0][1]
+    print(f"\nGrowth of time per token: {growth:.2f}x (allowed {args.max_growth:.2f}x)")
+
+    if growth > args.max_growth:
+        print("FAIL: building the token features does not scale linearly with the sentence length")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
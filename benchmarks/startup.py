@@ -0,0 +1,97 @@
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+#--------------------
+
+# Root of the repository, the working directory of the measured processes
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Code run in a fresh interpreter to measure a cold start of the app
+COLD_START = "from app import create_app; create_app()"
+
+# Modules that must not be imported by a cold start, because they are only needed once an ingredient is parsed
+LAZY_MODULES = ['nltk']
+
+# Matches a line of the -X importtime output: self time, cumulative time and (indented) module name
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def run_cold_start(env: dict) -> tuple[float, list[tuple[str, int, int]]]:
+    """
+    This function starts the app in a new interpreter with -X importtime
+
+    Arguments:
+        env (dict): The environment variables of the new interpreter
+
+    Returns:
+        tuple[float, list[tuple[str, int, int]]]: The wall clock time in seconds and the (module, self us, cumulative us) of every import
+
+    Raises:
+        RuntimeError: If the app fails to start
+    """
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', COLD_START], cwd=ROOT, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+
+    if result.returncode != 0:
+        raise RuntimeError(f"App failed to start:\n{result.stderr}")
+
+    imports = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            imports.append((match.group(4), int(match.group(1)), int(match.group(2))))
+
+    return (elapsed, imports)
+
+
+def main() -> int:
+    """
+    This function measures the cold start of create_app() and checks it against the given budget
+
+    Returns:
+        int: The exit code, 1 if the budget is exceeded or a lazy module is imported, otherwise 0
+    """
+    parser = argparse.ArgumentParser(description="Measure the cold start time of create_app()")
+    parser.add_argument('--runs', type=int, default=5, help="Number of cold starts, the fastest one is reported")
+    parser.add_argument('--max-seconds', type=float, default=2.0, help="Maximum allowed cold start time in seconds")
+    parser.add_argument('--top', type=int, default=15, help="Number of slowest imports to show")
+    args = parser.parse_args()
+
+    # Use a throwaway database unless one is configured, and do not preload the parser
+    env = dict(os.environ)
+    env.setdefault('DATABASE_URL', 'sqlite://')
+    env['PRELOAD_INGREDIENT_PARSER'] = 'False'
+
+    # The app writes its log file on start up
+    os.makedirs(os.path.join(ROOT, 'app', 'logs'), exist_ok=True)
+
+    runs = [run_cold_start(env) for _ in range(args.runs)]
+    elapsed, imports = min(runs, key=lambda run: run[0])
+
+    print(f"Cold start of create_app(): {elapsed:.3f}s (fastest of {args.runs}, budget {args.max_seconds:.3f}s)")
+    print(f"Modules imported: {len(imports)}")
+    print("\nSlowest imports (cumulative ms):")
+    for module, _, cumulative in sorted(imports, key=lambda entry: entry[2], reverse=True)[:args.top]:
+        print(f"  {cumulative / 1000:9.1f}  {module}")
+
+    failed = False
+
+    lazy_imported = sorted({module for module, _, _ in imports for lazy in LAZY_MODULES if module == lazy or module.startswith(lazy + '.')})
+    if lazy_imported:
+        print(f"\nFAIL: modules that should be loaded lazily were imported on start up: {', '.join(lazy_imported)}")
+        failed = True
+
+    if elapsed > args.max_seconds:
+        print(f"\nFAIL: cold start took {elapsed:.3f}s, which exceeds the budget of {args.max_seconds:.3f}s")
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
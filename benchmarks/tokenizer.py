@@ -0,0 +1,108 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+#--------------------
+
+# Make the app package importable when the script is run directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.ingredient_parser.en import PreProcessor
+from app.utils.ingredient_parser.en._utils import TOKENIZERS
+
+# Corpus of ingredient sentences, one per line, shared with the parser benchmark
+CORPUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app', 'utils', 'ingredient_parser', 'benchmark', 'corpus.txt')
+
+# Sentences around the full stop and punctuation rules of the tokenizer, checked in addition to the corpus
+EDGE_CASES = ['', ' ', '.', '..', '...', 'x..', '.a.', 'e.g.', 'i.e. salt.', 'a.b.c.', 'tsp.', 'x.y(z.', '_._.', '1/2:3;', '(1.)', 'Mr.. Salt', '\tsalt\n.', 'café.', 'é.é.']
+
+# Characters the random sentences are made of, weighted towards the ones the tokenizer splits on
+FUZZ_CHARACTERS = 'ab1_. .\t,()[]{}/:;-é '
+
+
+def load_sentences(fuzz: int, seed: int) -> list[str]:
+    """
+    This function loads the corpus and its normalised sentences, and adds the edge cases and random strings
+
+    Arguments:
+        fuzz (int): The number of random strings
+        seed (int): The seed of the random generator, so failures can be reproduced
+
+    Returns:
+        list[str]: The sentences to check
+    """
+    with open(CORPUS, encoding='utf-8') as file:
+        corpus = [line.strip() for line in file if line.strip()]
+
+    # The parser tokenizes the normalised sentence, not the raw one
+    processor = PreProcessor('', defer_pos_tagging=True)
+    normalised = [processor._normalise(sentence) for sentence in corpus]
+
+    rng = random.Random(seed)
+    fuzzed = [''.join(rng.choice(FUZZ_CHARACTERS) for _ in range(rng.randint(1, 16))) for _ in range(fuzz)]
+    return corpus + normalised + EDGE_CASES + fuzzed
+
+
+def time_tokenizer(name: str, sentences: list[str], rounds: int) -> float:
+    """
+    This function measures how long a tokenizer takes to tokenize the sentences
+
+    Arguments:
+        name (str): The name of the tokenizer in TOKENIZERS
+        sentences (list[str]): The sentences to tokenize
+        rounds (int): The number of times all sentences are tokenized, the fastest round is reported
+
+    Returns:
+        float: The fastest time per sentence in microseconds
+    """
+    tokenizer = TOKENIZERS[name]
+    fastest = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for sentence in sentences:
+            tokenizer(sentence)
+        fastest = min(fastest, time.perf_counter() - start)
+
+    return fastest / len(sentences) * 1e6
+
+
+def main() -> int:
+    """
+    This function checks every tokenizer gives the same tokens as the multipass tokenizer and compares their speed
+
+    Returns:
+        int: The exit code, 1 if any sentence is tokenized differently, otherwise 0
+    """
+    parser = argparse.ArgumentParser(description="Differential check and benchmark of the tokenizers against the multipass tokenizer")
+    parser.add_argument('--rounds', type=int, default=10, help="Number of rounds over the corpus, the fastest one is reported")
+    parser.add_argument('--fuzz', type=int, default=20000, help="Number of random strings added to the check")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the random strings")
+    args = parser.parse_args()
+
+    sentences = load_sentences(args.fuzz, args.seed)
+    reference = TOKENIZERS['multipass']
+
+    failures = []
+    for name, tokenizer in TOKENIZERS.items():
+        failures += [(name, sentence) for sentence in sentences if tokenizer(sentence) != reference(sentence)]
+    print(f"Checked {len(TOKENIZERS)} tokenizers on {len(sentences)} sentences, {len(failures)} differences")
+    for name, sentence in failures:
+        print(f"  {name} {sentence!r}: {TOKENIZERS[name](sentence)} != {reference(sentence)}")
+
+    corpus = sentences[:len(sentences) - len(EDGE_CASES) - args.fuzz]
+    times = {name: time_tokenizer(name, corpus, args.rounds) for name in TOKENIZERS}
+
+    print(f"\n{'tokenizer':>12}  {'us/sentence':>12}  {'speed up':>9}")
+    for name, per_sentence in times.items():
+        print(f"{name:>12}  {per_sentence:>12.2f}  {times['multipass'] / per_sentence:>8.2f}x")
+
+    if failures:
+        print("FAIL: a tokenizer gives different tokens than the multipass tokenizer")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
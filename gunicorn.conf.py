@@ -0,0 +1,66 @@
+import gc
+import os
+
+#--------------------
+
+# Load the app in the master process before forking the workers when the ingredient parser is preloaded.
+# create_app then loads the parser resources (model, POS tagger, stems, unit registry) once in the master,
+# and the workers share those memory pages copy-on-write instead of each loading their own copy on their first request.
+preload_app = os.getenv('PRELOAD_INGREDIENT_PARSER', 'False').lower() in ('true', '1')
+
+
+def memory_usage() -> dict[str, float]:
+    """
+    This function returns the memory used by the current process, read from /proc/self/smaps_rollup (Linux only)
+
+    Returns:
+        dict[str, float]: The resident (rss), proportional (pss, shared pages divided by the processes sharing them)
+        and private (uss) memory in MB, empty if the memory cannot be read
+
+    Raises:
+        None
+    """
+    try:
+        with open('/proc/self/smaps_rollup', encoding='utf-8') as file:
+            fields = {line.split(':')[0]: int(line.split()[1]) for line in file if line.endswith('kB\n')}
+    except OSError:
+        return {}
+
+    return {
+        'rss': fields['Rss'] / 1024,
+        'pss': fields['Pss'] / 1024,
+        'uss': (fields['Private_Clean'] + fields['Private_Dirty']) / 1024,
+    }
+
+
+def pre_fork(server, worker):
+    """
+    This function runs in the master before each worker is forked
+
+    Objects that exist at this point (including the preloaded parser) are moved out of the reach of the garbage
+    collector, so collections in the workers do not write to, and thereby copy, the pages they share with the master
+
+    Arguments:
+        server (gunicorn.arbiter.Arbiter): The gunicorn master
+        worker (gunicorn.workers.base.Worker): The worker about to be forked
+
+    Returns:
+        None
+    """
+    if preload_app:
+        gc.freeze()
+
+
+def post_worker_init(worker):
+    """
+    This function runs in each worker once the app is loaded, and logs the memory used by the worker
+
+    Arguments:
+        worker (gunicorn.workers.base.Worker): The initialised worker
+
+    Returns:
+        None
+    """
+    memory = memory_usage()
+    if memory:
+        worker.log.info("Worker %s memory: RSS %.1f MB, PSS %.1f MB, USS %.1f MB (parser preloaded: %s)", worker.pid, memory['rss'], memory['pss'], memory['uss'], preload_app)
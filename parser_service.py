@@ -0,0 +1,10 @@
+from app import create_parser_app
+
+#--------------------
+
+# The ingredient parser service is not authenticated, only bind it to an internal interface (see Procfile).
+# The configuration is read from PARSER_SERVICE_CONFIG ('production' by default, see config_dict in app/config.py)
+app = create_parser_app()
+
+if __name__ == '__main__':
+    app.run()